@@ -0,0 +1,194 @@
+import json
+import os
+from datetime import datetime
+
+from lazy_import import lazy_import
+from periods import (GRAIN_MONTHS, MISSING, month_codes, parse_period_labels, period_codes,
+                     period_labels, period_start_months)
+from royalties import normalize_key, normalize_keys
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+RECOUPMENT_COLUMNS = ['Artist', 'Release', 'Period', 'Revenue', 'Advances', 'Payable', 'Balance']
+
+
+def leaves_out_dates(first_date, last_date, start_date, end_date):
+    """Check a date range leaves out part of the revenue dated first_date to last_date.
+
+    Settling periods from such a range would let later periods be recorded
+    past revenue that was never recouped.
+    """
+    if pd.isna(first_date) or pd.isna(last_date):
+        return False
+    return pd.Timestamp(first_date) < pd.Timestamp(start_date) or pd.Timestamp(last_date) > pd.Timestamp(end_date)
+
+
+class AdvancesLedger:
+    """Persistent ledger of advances paid per artist and per release.
+
+    An advance with a release UPC is recouped from that release's revenue,
+    an advance without one from the artist's other revenue. The closing
+    balance of every account is kept, so recording a new period only
+    computes that period instead of replaying all history.
+    """
+
+    def __init__(self, ledger_file):
+        self.ledger_file = ledger_file
+        self.advances = []
+        self.state = {}
+        self.load()
+
+    def load(self):
+        """Load the ledger from disk"""
+        self.advances = []
+        self.state = {}
+        if not os.path.exists(self.ledger_file):
+            return
+        try:
+            with open(self.ledger_file, 'r') as f:
+                data = json.load(f)
+            self.advances = data.get('advances', [])
+            self.state = data.get('state', {})
+        except Exception as e:
+            print(f"Could not load advances ledger: {str(e)}")
+
+    def save(self):
+        """Save the ledger to disk"""
+        os.makedirs(os.path.dirname(self.ledger_file), exist_ok=True)
+        with open(self.ledger_file, 'w') as f:
+            json.dump({'advances': self.advances, 'state': self.state}, f, indent=4)
+
+    @staticmethod
+    def account_key(artist, release=''):
+        return f"{normalize_key(artist)}|{normalize_key(release)}"
+
+    def add_advance(self, artist, amount, date, release=''):
+        """Record an advance paid to an artist, optionally for one release"""
+        self.advances.append({
+            'artist': artist.strip(),
+            'release': str(release).strip(),
+            'amount': float(amount),
+            'date': date,
+            'applied': False,
+            'added': datetime.now().isoformat()
+        })
+        self.save()
+
+    def release_accounts(self):
+        """Return the account keys of release-specific advances"""
+        return set(
+            self.account_key(advance['artist'], advance['release'])
+            for advance in self.advances if advance['release']
+        )
+
+    def recorded_end(self, key):
+        """Return the last month code an account's recorded balance covers, MISSING if none"""
+        state = self.state.get(key)
+        if not state:
+            return MISSING
+        if 'end' in state:
+            return state['end']
+        # Entries written before end months were kept only have the label
+        starts, lengths = parse_period_labels([state['period']])
+        return int(starts[0] + lengths[0] - 1) if starts[0] >= 0 else MISSING
+
+    def recoup(self, revenue, grain, fiscal_start=1, commit=False):
+        """Compute recoupment for every account and period at once.
+
+        revenue is a frame with Artist, Period, Period Start, Period Length
+        and Amount columns (and UPC to match release advances), periods
+        being of the given grain. Periods are ordered and compared by their
+        integer month codes, never by label. Periods starting after an
+        account's recorded ones are computed from its recorded balance,
+        earlier ones are skipped. With commit=True the new closing balances
+        are recorded.
+        Returns a frame with RECOUPMENT_COLUMNS for advanced accounts.
+        """
+        if not self.advances:
+            return pd.DataFrame(columns=RECOUPMENT_COLUMNS)
+
+        artists = normalize_keys(revenue['Artist'])
+        releases = normalize_keys(revenue['UPC']) if 'UPC' in revenue.columns else pd.Series('', index=revenue.index)
+
+        # Route release revenue to its own account when it has an advance
+        release_keys = artists + '|' + releases
+        artist_keys = artists + '|'
+        accounts = release_keys.where(release_keys.isin(self.release_accounts()), artist_keys)
+
+        starts = revenue['Period Start'].astype(np.int64).to_numpy()
+        rows = pd.DataFrame({
+            'account': accounts.to_numpy(),
+            'Period': revenue['Period'].astype(str).to_numpy(),
+            'Start': starts,
+            'End': starts + revenue['Period Length'].astype(np.int64).to_numpy() - 1,
+            'Revenue': revenue['Amount'].astype(float).to_numpy(),
+            'Advances': 0.0,
+            'advance_id': -1
+        })
+        rows = rows[rows['Start'] >= 0]
+
+        # Advances not folded into a recorded balance yet
+        pending = [advance for advance in self.advances if not advance.get('applied')]
+        if pending:
+            codes = period_codes(month_codes([a['date'] for a in pending]), grain, fiscal_start)
+            advance_starts = period_start_months(codes, grain, fiscal_start)
+            advance_rows = pd.DataFrame({
+                'account': [self.account_key(a['artist'], a['release']) for a in pending],
+                'Period': period_labels(codes, grain, fiscal_start),
+                'Start': advance_starts,
+                'End': advance_starts + GRAIN_MONTHS[grain] - 1,
+                'Revenue': 0.0,
+                'Advances': [a['amount'] for a in pending],
+                'advance_id': range(len(pending))
+            })
+            rows = pd.concat([rows, advance_rows], ignore_index=True)
+
+        # Only advanced accounts need recoupment
+        advanced = set(self.account_key(a['artist'], a['release']) for a in self.advances)
+        rows = rows[rows['account'].isin(advanced)]
+
+        # Skip periods already recorded for each account
+        recorded = rows['account'].map({key: self.recorded_end(key) for key in advanced}).to_numpy()
+        is_new = rows['Start'].to_numpy() > recorded
+        # Advances dated in a recorded period count towards the next one
+        first_new = rows[is_new].sort_values('Start', kind='stable').groupby('account')[['Period', 'Start', 'End']].first()
+        late = ~is_new & (rows['Advances'] > 0).to_numpy() & rows['account'].isin(first_new.index).to_numpy()
+        late_accounts = rows.loc[late, 'account']
+        for column in ['Period', 'Start', 'End']:
+            rows.loc[late, column] = late_accounts.map(first_new[column]).to_numpy()
+        rows = rows[is_new | late]
+        if rows.empty:
+            return pd.DataFrame(columns=RECOUPMENT_COLUMNS)
+
+        included = [pending[i] for i in rows.loc[rows['advance_id'] >= 0, 'advance_id']]
+        table = rows.groupby(['account', 'Start', 'End', 'Period'], sort=True)[['Revenue', 'Advances']].sum().reset_index()
+
+        # Running balance clamped at zero: B = S - min(0, running min of S)
+        balances = {key: state['balance'] for key, state in self.state.items()}
+        opening = table['account'].map(balances).fillna(0.0).to_numpy()
+        net = (table['Advances'] - table['Revenue']).to_numpy()
+        first = ~table['account'].duplicated().to_numpy()
+        running = pd.Series(net).groupby(table['account'].to_numpy()).cumsum().to_numpy() + opening
+        floor = pd.Series(np.minimum(running, 0.0)).groupby(table['account'].to_numpy()).cummin().to_numpy()
+        balance = running - floor
+        previous = np.where(first, opening, np.roll(balance, 1))
+        table['Payable'] = balance - (previous + net)
+        table['Balance'] = balance
+
+        table['Artist'] = table['account'].map({self.account_key(a['artist'], a['release']): a['artist'] for a in self.advances})
+        table['Release'] = table['account'].map({self.account_key(a['artist'], a['release']): a['release'] for a in self.advances})
+
+        if commit:
+            self.commit(table, included)
+
+        return table[RECOUPMENT_COLUMNS]
+
+    def commit(self, table, applied):
+        """Record each account's closing balance and mark advances applied"""
+        closing = table.groupby('account').last()
+        for key, row in closing.iterrows():
+            self.state[key] = {'period': row['Period'], 'end': int(row['End']), 'balance': float(row['Balance'])}
+        for advance in applied:
+            advance['applied'] = True
+        self.save()
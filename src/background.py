@@ -0,0 +1,25 @@
+import traceback
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+
+class TaskSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class BackgroundTask(QRunnable):
+    """Run a function on a worker thread and report its result on the UI thread"""
+
+    def __init__(self, function, *args):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.signals = TaskSignals()
+
+    def run(self):
+        try:
+            self.signals.finished.emit(self.function(*self.args))
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(str(e))
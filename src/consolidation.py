@@ -0,0 +1,198 @@
+from cleaning import clean_revenue
+from lazy_import import lazy_import
+from result_set import ResultSet, encode
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Columns identifying a consolidated result row
+RESULT_KEY = ['Period', 'Track']
+
+REVENUE_COLUMNS = ['Total Revenue', 'Artist Revenue']
+
+# Consolidation dialog choices and the aggregation each one runs
+OPERATIONS = {
+    'Union': 'union',
+    'Join': 'join',
+    'Total': 'sum'
+}
+
+# Separators used when combining text values
+UNION_SEPARATOR = ', '
+JOIN_SEPARATOR = '; '
+
+
+def join_groups(groups, strings, separator):
+    """Join the strings of each group in order. Returns a Series indexed by group.
+
+    Rows are stably sorted by group so each group is one contiguous slice
+    joined with a single str.join call; memory stays linear in the rows
+    however large a group is.
+    """
+    order = np.argsort(groups, kind='stable')
+    groups = np.asarray(groups)[order]
+    strings = np.asarray(strings, dtype=object)[order].tolist()
+    group_ids, starts = np.unique(groups, return_index=True)
+    bounds = starts.tolist() + [len(strings)]
+    labels = [separator.join(strings[bounds[i]:bounds[i + 1]]) for i in range(len(group_ids))]
+    return pd.Series(labels, index=group_ids, dtype=object)
+
+
+def join_unique(groups, values, separator=', '):
+    """Join the distinct values of each group in first-seen order.
+
+    Values are factorized into integer codes so duplicate (group, value)
+    pairs are dropped before any string is built. Returns a Series indexed
+    by group.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    strings = pd.Series(uniques, dtype=object).astype(str).to_numpy()
+    pairs = pd.DataFrame({'group': groups, 'code': codes})
+    pairs = pairs[pairs['code'] >= 0]
+    pairs = pairs[strings[pairs['code'].to_numpy()] != '']
+    pairs = pairs.drop_duplicates(['group', 'code'])
+    if pairs.empty:
+        return pd.Series(dtype=object)
+    return join_groups(pairs['group'].to_numpy(), strings[pairs['code'].to_numpy()], separator)
+
+
+def displayed_cents(values):
+    """Return amounts as integer cents, rounded as they are displayed ("{:.2f}")"""
+    codes, uniques = pd.factorize(pd.Series(values).fillna(0.0))
+    cents = np.array([round(float(f"{value:.2f}") * 100) for value in uniques], dtype=np.int64)
+    return cents[codes] if len(cents) else np.zeros(len(codes), dtype=np.int64)
+
+
+def consolidate_results(results):
+    """Consolidate result rows sharing the same Period and Track.
+
+    Works on the result set's dictionary codes: amounts are summed in one
+    grouped aggregation, the currency of the last row in each group is kept
+    and Source values are joined in order of first appearance without
+    duplicates. Other columns keep the group's first row.
+
+    Sums match adding the displayed amounts one row at a time and rounding
+    to cents after every addition: once each amount is rounded to cents,
+    that is an exact sum of integer cents.
+    """
+    frame = results.frame
+    if frame.empty:
+        return results
+
+    groups = frame.groupby(RESULT_KEY, sort=False, observed=True).ngroup().to_numpy()
+    grouped = pd.Series(np.arange(len(frame))).groupby(groups, sort=True)
+    consolidated = frame.iloc[grouped.first().to_numpy()].copy()
+
+    for column in REVENUE_COLUMNS:
+        cents = pd.Series(displayed_cents(frame[column].to_numpy())).groupby(groups, sort=True).sum()
+        consolidated[column] = cents.to_numpy() / 100
+    consolidated['Currency'] = frame['Currency'].iloc[grouped.last().to_numpy()].array
+
+    if 'Source' in frame.columns:
+        sources = join_unique(groups, frame['Source'].to_numpy())
+        first_sources = pd.Series(consolidated['Source'].astype(str).to_numpy(), index=range(len(consolidated)))
+        consolidated['Source'] = encode(sources.reindex(first_sources.index).fillna(first_sources).to_numpy())
+
+    return ResultSet(consolidated)
+
+
+def build_aggregation_spec(keys, operations, columns):
+    """Build a declarative aggregation spec from dialog choices.
+
+    Columns that are neither keys nor given an operation are unioned.
+    """
+    spec = {'keys': list(keys), 'columns': {}}
+    for column in columns:
+        if column in keys:
+            continue
+        spec['columns'][column] = operations.get(column, 'union')
+    return spec
+
+
+def join_all(groups, values, separator=JOIN_SEPARATOR):
+    """Join every value of each group in order. Returns a Series indexed by group"""
+    frame = pd.DataFrame({'group': groups, 'value': values}).dropna()
+    if frame.empty:
+        return pd.Series(dtype=object)
+    return join_groups(frame['group'].to_numpy(), frame['value'].astype(str).to_numpy(), separator)
+
+
+def run_aggregation(frame, spec):
+    """Consolidate rows sharing the spec's key columns.
+
+    Totals parse amounts like statement revenue ("€1,23") and use the
+    built-in grouped sum; unions and joins drop duplicates on integer codes
+    and join each group's strings once.
+    """
+    keys = spec['keys']
+    if keys:
+        groups = frame.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+    else:
+        groups = np.zeros(len(frame), dtype=np.int64)
+    group_count = groups.max() + 1 if len(groups) else 0
+
+    first_rows = pd.Series(np.arange(len(frame))).groupby(groups, sort=True).first().to_numpy()
+    result = frame[keys].iloc[first_rows].reset_index(drop=True) if keys else pd.DataFrame(index=range(group_count))
+
+    for column in frame.columns:
+        if column in keys or column not in spec['columns']:
+            continue
+        operation = spec['columns'][column]
+        values = frame[column]
+        if operation == 'sum':
+            aggregated = clean_revenue(values).groupby(groups).sum()
+        elif operation == 'join':
+            aggregated = join_all(groups, values.to_numpy(), JOIN_SEPARATOR)
+        else:
+            aggregated = join_unique(groups, values.to_numpy(), UNION_SEPARATOR)
+        default = 0 if operation == 'sum' else ''
+        result[column] = aggregated.reindex(range(group_count), fill_value=default).to_numpy()
+
+    return result
+
+
+def run_lambda_aggregation(frame, keys, operations):
+    """Reference implementation calling Python lambdas per group"""
+    functions = {}
+    for column, operation in operations.items():
+        if operation == 'union':
+            functions[column] = lambda x: list(set(x))
+        elif operation == 'join':
+            functions[column] = lambda x: '; '.join(map(str, x))
+        else:
+            functions[column] = 'sum'
+    return frame.groupby(keys, sort=False).agg(functions).reset_index()
+
+
+if __name__ == "__main__":
+    import time
+
+    # Benchmark against the per-group lambda approach on statement-shaped data
+    rows = 1000000
+    rng = np.random.default_rng(0)
+    tracks = np.array([f"Track {i}" for i in range(20000)], dtype=object)
+    stores = np.array(['Spotify', 'Apple Music', 'Deezer', 'YouTube', 'Amazon'], dtype=object)
+    frame = pd.DataFrame({
+        'Track': tracks[rng.integers(0, len(tracks), rows)],
+        'Period': rng.choice(np.array(['2024-01', '2024-02', '2024-03'], dtype=object), rows),
+        'Store': stores[rng.integers(0, len(stores), rows)],
+        'Country': rng.choice(np.array(['FR', 'US', 'GB', 'DE'], dtype=object), rows),
+        'Revenue': rng.random(rows)
+    })
+    spec = build_aggregation_spec(
+        ['Track', 'Period'],
+        {'Store': 'union', 'Country': 'join', 'Revenue': 'sum'},
+        frame.columns
+    )
+
+    start = time.perf_counter()
+    run_lambda_aggregation(frame, spec['keys'], spec['columns'])
+    lambda_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    run_aggregation(frame, spec)
+    engine_time = time.perf_counter() - start
+
+    print(f"{rows} rows, {frame.groupby(spec['keys']).ngroups} groups")
+    print(f"Lambda aggregation: {lambda_time:.2f}s")
+    print(f"Aggregation engine: {engine_time:.2f}s ({lambda_time / engine_time:.1f}x faster)")
@@ -3,6 +3,8 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                            QListWidgetItem)
 from PyQt6.QtCore import Qt
 
+from consolidation import OPERATIONS, build_aggregation_spec
+
 class ConsolidationDialog(QDialog):
     def __init__(self, columns, parent=None):
         super().__init__(parent)
@@ -72,19 +74,17 @@ class ConsolidationDialog(QDialog):
         return [item.text() for item in self.key_list.selectedItems()]
 
     def get_operations(self):
+        """Return the aggregation chosen for each checked column"""
         operations = {}
         for i in range(self.op_list.count()):
             item = self.op_list.item(i)
             if item.checkState() == Qt.CheckState.Checked:
                 column = item.text()
                 combo = self.op_list.itemWidget(item)
-                operation = combo.currentText()
-                
-                if operation == 'Union':
-                    operations[column] = lambda x: list(set(x))
-                elif operation == 'Join':
-                    operations[column] = lambda x: '; '.join(map(str, x))
-                elif operation == 'Total':
-                    operations[column] = 'sum'
+                operations[column] = OPERATIONS[combo.currentText()]
                     
-        return operations 
\ No newline at end of file
+        return operations
+
+    def get_aggregation_spec(self):
+        """Return the declarative aggregation spec for the dialog choices"""
+        return build_aggregation_spec(self.get_key_columns(), self.get_operations(), self.columns)
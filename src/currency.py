@@ -0,0 +1,87 @@
+import os
+
+from lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+class FxRates:
+    """Dated exchange rate tables loaded from local CSV files.
+
+    A table named ``EUR_USD.csv`` in the rates directory holds ``date,rate``
+    rows where 1 EUR = rate USD on that date. The inverse table is used when
+    only the other direction exists. Tables are cached until the file changes.
+    """
+
+    def __init__(self, rates_dir):
+        self.rates_dir = rates_dir
+        self.cache = {}
+
+    def table_path(self, from_currency, to_currency):
+        return os.path.join(self.rates_dir, f"{from_currency}_{to_currency}.csv")
+
+    def load_table(self, path):
+        """Load a rate table, reusing the cached copy while the file is unchanged"""
+        mtime = os.path.getmtime(path)
+        cached = self.cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        table = pd.read_csv(path)
+        table.columns = [str(col).strip().lower() for col in table.columns]
+        table = pd.DataFrame({
+            'date': pd.to_datetime(table['date'], errors='coerce').astype('datetime64[ns]'),
+            'rate': pd.to_numeric(table['rate'], errors='coerce')
+        }).dropna()
+        table = table.sort_values('date').drop_duplicates('date', keep='last').reset_index(drop=True)
+        self.cache[path] = (mtime, table)
+        return table
+
+    def has_rates(self, from_currency, to_currency):
+        """Check a conversion between two currencies is possible"""
+        if from_currency == to_currency:
+            return True
+        return (os.path.exists(self.table_path(from_currency, to_currency)) or
+                os.path.exists(self.table_path(to_currency, from_currency)))
+
+    def rates(self, from_currency, to_currency):
+        """Return the date/rate table converting from_currency into to_currency"""
+        path = self.table_path(from_currency, to_currency)
+        if os.path.exists(path):
+            return self.load_table(path)
+
+        inverse_path = self.table_path(to_currency, from_currency)
+        if os.path.exists(inverse_path):
+            table = self.load_table(inverse_path)
+            return table.assign(rate=1.0 / table['rate'])
+
+        raise ValueError(f"No exchange rates found for {from_currency} to {to_currency} in {self.rates_dir}")
+
+    def convert(self, amounts, dates, from_currency, to_currency):
+        """Convert amounts using the latest rate on or before each date.
+
+        Dates before the first known rate use the earliest rate; missing dates
+        give NaN.
+        """
+        amounts = np.asarray(amounts, dtype=float)
+        if from_currency == to_currency:
+            return amounts
+
+        table = self.rates(from_currency, to_currency)
+        if table.empty:
+            raise ValueError(f"Exchange rate table for {from_currency} to {to_currency} is empty")
+
+        left = pd.DataFrame({
+            'date': pd.to_datetime(pd.Series(dates), errors='coerce').astype('datetime64[ns]').to_numpy(),
+            'position': np.arange(len(amounts))
+        })
+        known = left.dropna(subset=['date']).sort_values('date')
+
+        # One as-of join for the whole statement
+        matched = pd.merge_asof(known, table, on='date', direction='backward')
+        matched['rate'] = matched['rate'].fillna(table['rate'].iloc[0])
+
+        rates = np.full(len(amounts), np.nan)
+        rates[matched['position'].to_numpy()] = matched['rate'].to_numpy()
+        return amounts * rates
@@ -0,0 +1,122 @@
+import json
+import os
+
+from cleaning import clean_text
+from lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+def row_hashes(df, key_columns=None):
+    """Hash each row's key columns into a uint64.
+
+    Values are compared as stripped strings. Identical rows within one file
+    get distinct hashes through their occurrence number, so a file repeating
+    a row twice only overlaps another file that also has it twice.
+    """
+    columns = [col for col in (key_columns or df.columns) if col in df.columns]
+    if not columns:
+        columns = list(df.columns)
+    keys = pd.DataFrame({
+        col: clean_text(df[col]).to_numpy()
+        for col in columns
+    })
+    hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    occurrence = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+    combined = pd.util.hash_pandas_object(pd.DataFrame({'hash': hashes, 'occurrence': occurrence}), index=False)
+    return pd.Series(combined.to_numpy(), index=df.index)
+
+
+class DedupIndex:
+    """Persistent index of row hashes and the statement each one came from.
+
+    A row is a duplicate when its hash was first recorded from a different
+    statement. Hashes live in one sorted uint64 array with a parallel array
+    of source ids, so lookups are a vectorized search over the whole archive.
+    """
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        self.hashes_file = os.path.join(index_dir, 'row_hashes.npz')
+        self.sources_file = os.path.join(index_dir, 'sources.json')
+        self.hashes = None
+        self.source_ids = None
+        self.sources = []
+        self.dirty = False
+
+    def __len__(self):
+        self.ensure_loaded()
+        return len(self.hashes)
+
+    def ensure_loaded(self):
+        """Load the index on first use"""
+        if self.hashes is None:
+            self.load()
+
+    def load(self):
+        """Load the index from disk"""
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.source_ids = np.empty(0, dtype=np.int32)
+        self.sources = []
+        if not os.path.exists(self.hashes_file) or not os.path.exists(self.sources_file):
+            return
+        try:
+            with open(self.sources_file, 'r') as f:
+                self.sources = json.load(f)
+            data = np.load(self.hashes_file)
+            self.hashes = data['hashes']
+            self.source_ids = data['sources']
+        except Exception as e:
+            print(f"Could not load duplicate index: {str(e)}")
+            self.hashes = np.empty(0, dtype=np.uint64)
+            self.source_ids = np.empty(0, dtype=np.int32)
+            self.sources = []
+
+    def save(self):
+        """Save the index to disk if it changed"""
+        if not self.dirty:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        np.savez(self.hashes_file, hashes=self.hashes, sources=self.source_ids)
+        with open(self.sources_file, 'w') as f:
+            json.dump(self.sources, f, indent=4)
+        self.dirty = False
+
+    def source_id(self, source):
+        if source not in self.sources:
+            self.sources.append(source)
+            self.dirty = True
+        return self.sources.index(source)
+
+    def lookup(self, hashes):
+        """Return the source id each hash was recorded from, -1 if unknown"""
+        self.ensure_loaded()
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(self.hashes):
+            return np.full(len(hashes), -1, dtype=np.int32)
+        positions = np.searchsorted(self.hashes, hashes)
+        positions = np.minimum(positions, len(self.hashes) - 1)
+        found = self.hashes[positions] == hashes
+        return np.where(found, self.source_ids[positions], -1)
+
+    def check(self, hashes, source):
+        """Flag rows already recorded from another statement and record the new ones.
+
+        Returns a boolean mask of duplicate rows.
+        """
+        self.ensure_loaded()
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        source_id = self.source_id(source)
+        known = self.lookup(hashes)
+        duplicates = (known >= 0) & (known != source_id)
+
+        # Insert the new hashes, already sorted, at their positions in the
+        # index instead of sorting the whole archive again
+        new_hashes = np.unique(hashes[known < 0])
+        if len(new_hashes):
+            positions = np.searchsorted(self.hashes, new_hashes)
+            self.hashes = np.insert(self.hashes, positions, new_hashes)
+            self.source_ids = np.insert(self.source_ids, positions, np.int32(source_id))
+            self.dirty = True
+        return duplicates
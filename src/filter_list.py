@@ -0,0 +1,163 @@
+from bisect import bisect_left
+
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QListView, QAbstractItemView
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QItemSelection, QItemSelectionModel
+
+
+class DistinctValuesModel(QAbstractListModel):
+    """List model over a sorted array of distinct values.
+
+    Rows are only materialized by the view when painted, so catalogs with
+    tens of thousands of values populate instantly. An optional label row
+    (e.g. "All Tracks") always stays at the top.
+    """
+
+    def __init__(self, all_label=None, parent=None):
+        super().__init__(parent)
+        self.all_label = all_label
+        self.values = []
+        self.keys = []
+        self.visible = []
+        self.search_text = ''
+
+    def set_values(self, values):
+        """Replace the values, sorted case-insensitively"""
+        self.beginResetModel()
+        self.values = sorted(set(values), key=str.lower)
+        self.keys = [value.lower() for value in self.values]
+        self.visible = self.matching_rows(self.search_text)
+        self.endResetModel()
+
+    def set_search_text(self, text):
+        """Show only values containing text, prefix matches first"""
+        self.beginResetModel()
+        self.search_text = text.strip().lower()
+        self.visible = self.matching_rows(self.search_text)
+        self.endResetModel()
+
+    def matching_rows(self, text):
+        """Return indices of the values matching the search text"""
+        if not text:
+            return range(len(self.values))
+
+        # Keys are sorted, so prefix matches form one contiguous range
+        start = bisect_left(self.keys, text)
+        end = bisect_left(self.keys, text + '\uffff', start)
+        prefix_rows = list(range(start, end))
+        other_rows = [
+            i for i, key in enumerate(self.keys)
+            if (i < start or i >= end) and text in key
+        ]
+        return prefix_rows + other_rows
+
+    def offset(self):
+        return 1 if self.all_label else 0
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.visible) + self.offset()
+
+    def value(self, row):
+        """Return the value displayed at a row"""
+        if self.all_label and row == 0:
+            return self.all_label
+        return self.values[self.visible[row - self.offset()]]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return self.value(index.row())
+        return None
+
+
+class SearchableFilterList(QWidget):
+    """Search box over a virtualized multi-selection list of values.
+
+    Selection is tracked by value, so it survives searching and
+    repopulating the list.
+    """
+
+    def __init__(self, all_label=None, parent=None):
+        super().__init__(parent)
+        self.selected = set()
+        self.restoring = False
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(self.search)
+        layout.addWidget(self.search_input)
+
+        self.model = DistinctValuesModel(all_label, self)
+        self.view = QListView()
+        self.view.setModel(self.model)
+        self.view.setUniformItemSizes(True)
+        self.view.setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
+        self.view.selectionModel().selectionChanged.connect(self.selection_changed)
+        layout.addWidget(self.view)
+
+    def set_values(self, values):
+        """Replace the listed values, keeping the selection that still applies"""
+        self.restoring = True
+        try:
+            self.model.set_values(values)
+            available = set(self.model.values)
+            if self.model.all_label:
+                available.add(self.model.all_label)
+            self.selected &= available
+            self.restore_selection()
+        finally:
+            self.restoring = False
+
+    def clear(self):
+        """Remove all values and the selection"""
+        self.selected = set()
+        self.set_values([])
+
+    def search(self, text):
+        self.restoring = True
+        try:
+            self.model.set_search_text(text)
+            self.restore_selection()
+        finally:
+            self.restoring = False
+
+    def restore_selection(self):
+        """Re-select the visible rows whose value is selected"""
+        if not self.selected:
+            self.view.selectionModel().clearSelection()
+            return
+
+        selection = QItemSelection()
+        start = None
+        row_count = self.model.rowCount()
+        for row in range(row_count + 1):
+            is_selected = row < row_count and self.model.value(row) in self.selected
+            if is_selected and start is None:
+                start = row
+            elif not is_selected and start is not None:
+                selection.select(self.model.index(start), self.model.index(row - 1))
+                start = None
+        self.view.selectionModel().select(selection, QItemSelectionModel.SelectionFlag.ClearAndSelect)
+
+    def selection_changed(self, selected, deselected):
+        if self.restoring:
+            return
+        for index in selected.indexes():
+            self.selected.add(self.model.value(index.row()))
+        for index in deselected.indexes():
+            self.selected.discard(self.model.value(index.row()))
+
+    def selected_values(self):
+        """Return the selected values in display order"""
+        ordered = [self.model.all_label] if self.model.all_label in self.selected else []
+        ordered.extend(value for value in self.model.values if value in self.selected)
+        return ordered
+
+    def setMinimumHeight(self, height):
+        self.view.setMinimumHeight(height)
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from ingest import open_statement, statement_stat
+from lazy_import import lazy_import
+
+pd = lazy_import('pandas')
+
+# Bytes read per hashing step
+CHUNK_SIZE = 1024 * 1024
+
+# Disk space parsed copies may take before the least recently used ones are removed
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+
+
+def file_fingerprint(file_path, chunk_size=CHUNK_SIZE):
+    """Return the sha256 of a statement's content, read (and decompressed) in chunks"""
+    digest = hashlib.sha256()
+    with open_statement(file_path) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FingerprintRegistry:
+    """Registry of statement contents already ingested.
+
+    Content digests map to the file first seen with them and to a cached
+    parsed copy. Paths remember their size, mtime and digest so an unchanged
+    file is recognized without hashing it again. The parsed copy of content
+    no path holds anymore is removed, and the least recently used copies go
+    once the cache outgrows max_cache_bytes. Changes are written by save().
+    """
+
+    def __init__(self, cache_dir, max_cache_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.registry_file = os.path.join(cache_dir, 'fingerprints.json')
+        self.max_cache_bytes = max_cache_bytes
+        self.files = {}
+        self.paths = {}
+        self.dirty = False
+        self.lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        """Load the registry from disk"""
+        self.files = {}
+        self.paths = {}
+        self.dirty = False
+        if not os.path.exists(self.registry_file):
+            return
+        try:
+            with open(self.registry_file, 'r') as f:
+                data = json.load(f)
+            self.files = data.get('files', {})
+            self.paths = data.get('paths', {})
+        except Exception as e:
+            print(f"Could not load fingerprint registry: {str(e)}")
+
+    def save(self):
+        """Save the registry to disk if it changed"""
+        with self.lock:
+            if not self.dirty:
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self.registry_file, 'w') as f:
+                json.dump({'files': self.files, 'paths': self.paths}, f, indent=4)
+            self.dirty = False
+
+    def is_current(self, file_path):
+        """Check a path was fingerprinted and has not changed since"""
+        path = os.path.abspath(file_path)
+        with self.lock:
+            known = self.paths.get(path)
+        if not known:
+            return False
+        stat = statement_stat(path)
+        return known['size'] == stat.st_size and known['mtime'] == stat.st_mtime
+
+    def current_digest(self, file_path):
+        """Return the digest recorded for a path, None if it changed or was never recorded"""
+        path = os.path.abspath(file_path)
+        with self.lock:
+            if not self.is_current(path):
+                return None
+            return self.paths[path]['digest']
+
+    def file_info(self, digest):
+        """Return a copy of what is known about ingested content"""
+        with self.lock:
+            return dict(self.files.get(digest, {}))
+
+    def fingerprint(self, file_path, record=True):
+        """Return a file's content digest, hashing it only if it changed.
+
+        The file is hashed without holding the lock. With record=False the
+        path is not remembered, so it still counts as changed until record()
+        is called.
+        """
+        path = os.path.abspath(file_path)
+        digest = self.current_digest(path)
+        if digest is not None:
+            return digest
+
+        stat = statement_stat(path)
+        digest = file_fingerprint(path)
+        if record:
+            self.record(path, digest, stat)
+        return digest
+
+    def record(self, file_path, digest, stat):
+        """Remember the size, mtime and digest of a path so it is not hashed again"""
+        path = os.path.abspath(file_path)
+        with self.lock:
+            previous = self.paths.get(path, {}).get('digest')
+            self.paths[path] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'digest': digest}
+            if digest not in self.files:
+                self.files[digest] = {'path': path, 'added': datetime.now().isoformat()}
+            self.dirty = True
+            # The earlier version of the file is not needed once no path holds it
+            if previous and previous != digest and not any(
+                    known['digest'] == previous for known in self.paths.values()):
+                self.remove_frame(previous)
+
+    def annotate(self, digest, **info):
+        """Store extra information about ingested content"""
+        with self.lock:
+            self.files.setdefault(digest, {}).update(info)
+            self.dirty = True
+
+    def original_path(self, digest):
+        """Return the path a content digest was first ingested from"""
+        return self.files.get(digest, {}).get('path')
+
+    def cache_path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.pkl")
+
+    def load_frame(self, digest):
+        """Return the cached parsed frame for a digest, or None"""
+        path = self.cache_path(digest)
+        if not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_pickle(path)
+        except Exception as e:
+            print(f"Could not read cached statement {digest[:12]}: {str(e)}")
+            return None
+        # The modification time orders copies by last use for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return df
+
+    def store_frame(self, digest, df):
+        """Cache the parsed frame of a digest, evicting old copies past the size limit"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        df.to_pickle(self.cache_path(digest))
+        self.evict(keep=digest)
+
+    def remove_frame(self, digest):
+        try:
+            os.remove(self.cache_path(digest))
+        except OSError:
+            pass
+
+    def evict(self, keep=None):
+        """Remove the least recently used parsed copies until the cache fits max_cache_bytes"""
+        copies = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            copies.append((stat.st_mtime, stat.st_size, name[:-4]))
+        total = sum(size for _, size, _ in copies)
+        for _, size, digest in sorted(copies):
+            if total <= self.max_cache_bytes:
+                break
+            if digest == keep:
+                continue
+            self.remove_frame(digest)
+            total -= size
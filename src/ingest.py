@@ -0,0 +1,372 @@
+import codecs
+import csv
+import gzip
+import hashlib
+import os
+import tempfile
+import zipfile
+from collections import Counter
+from datetime import date, datetime, time
+
+from lazy_import import lazy_import
+
+pd = lazy_import('pandas')
+
+# Number of bytes inspected to sniff a statement's format
+SAMPLE_SIZE = 64 * 1024
+
+# Delimiters seen in distributor exports, in order of preference on ties
+DELIMITERS = [',', ';', '\t', '|']
+
+# Number of lines used to detect the delimiter and header row
+SNIFF_LINES = 50
+
+# Separator between a file and a statement inside it, e.g. export.zip::2024-01.csv or report.xlsx::Sales
+MEMBER_SEPARATOR = '::'
+
+# Excel workbooks, each sheet read as its own statement
+WORKBOOK_EXTENSIONS = ('.xlsx', '.xlsm')
+
+# Files that hold statements: plain CSVs, gzipped CSVs, zips of CSVs and workbooks
+STATEMENT_EXTENSIONS = ('.csv', '.gz', '.zip') + WORKBOOK_EXTENSIONS
+
+# Sheets converted to CSV, so a workbook is only read by openpyxl once per change
+SHEET_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cache', 'sheets')
+
+
+def set_sheet_cache_dir(cache_dir):
+    """Keep converted sheets in another directory"""
+    global SHEET_CACHE_DIR
+    SHEET_CACHE_DIR = cache_dir
+
+
+def split_statement_path(file_path):
+    """Split a statement path into its file on disk and its zip member (or None)"""
+    if MEMBER_SEPARATOR in file_path:
+        container, member = file_path.split(MEMBER_SEPARATOR, 1)
+        return container, member
+    return file_path, None
+
+
+def is_statement_file(file_path):
+    return file_path.lower().endswith(STATEMENT_EXTENSIONS)
+
+
+def is_workbook(file_path):
+    return split_statement_path(file_path)[0].lower().endswith(WORKBOOK_EXTENSIONS)
+
+
+def open_workbook(file_path):
+    """Open a workbook for streaming with openpyxl, which is only needed for Excel statements"""
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError("Reading Excel statements requires openpyxl (pip install openpyxl)")
+    return openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+
+
+def workbook_sheets(file_path):
+    """Return the names of the worksheets of a workbook"""
+    workbook = open_workbook(file_path)
+    try:
+        return [sheet.title for sheet in workbook.worksheets]
+    finally:
+        workbook.close()
+
+
+def statement_paths(file_path):
+    """Expand a file into the statements it holds: each CSV member of a zip, each sheet of a workbook, else the file itself"""
+    container, member = split_statement_path(file_path)
+    if member is not None:
+        return [file_path]
+    if is_workbook(container):
+        return [f"{container}{MEMBER_SEPARATOR}{sheet}" for sheet in workbook_sheets(container)]
+    if not container.lower().endswith('.zip'):
+        return [file_path]
+    with zipfile.ZipFile(container) as archive:
+        return [
+            f"{container}{MEMBER_SEPARATOR}{info.filename}"
+            for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith('.csv')
+            and not info.filename.startswith('__MACOSX/')
+        ]
+
+
+def statement_name(file_path):
+    """Short display name of a statement, archive::member for zip members"""
+    container, member = split_statement_path(file_path)
+    if member is None:
+        return os.path.basename(file_path)
+    return f"{os.path.basename(container)}{MEMBER_SEPARATOR}{os.path.basename(member)}"
+
+
+def statement_stat(file_path):
+    """Return the os.stat of the file on disk holding a statement"""
+    return os.stat(split_statement_path(file_path)[0])
+
+
+def statement_exists(file_path):
+    container, member = split_statement_path(file_path)
+    if not os.path.isfile(container):
+        return False
+    if member is None:
+        return True
+    if is_workbook(container):
+        try:
+            return member in workbook_sheets(container)
+        except Exception:
+            return False
+    try:
+        with zipfile.ZipFile(container) as archive:
+            archive.getinfo(member)
+        return True
+    except (KeyError, zipfile.BadZipFile):
+        return False
+
+
+def sheet_cell_text(value):
+    """Write a cell value the way a CSV export would"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        # Dates without a time of day are written as plain dates
+        if value.time() == time():
+            return value.date().isoformat()
+        return value.isoformat(sep=' ')
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def converted_sheet_path(file_path):
+    """Return the CSV conversion of a worksheet, converting it if the workbook changed"""
+    container, sheet = split_statement_path(file_path)
+    stat = os.stat(container)
+    prefix = hashlib.sha1(f"{os.path.abspath(container)}{MEMBER_SEPARATOR}{sheet}".encode('utf-8')).hexdigest()[:16]
+    converted = os.path.join(SHEET_CACHE_DIR, f"{prefix}-{stat.st_size}-{stat.st_mtime_ns}.csv")
+    if os.path.exists(converted):
+        return converted
+
+    os.makedirs(SHEET_CACHE_DIR, exist_ok=True)
+    workbook = open_workbook(container)
+    try:
+        worksheet = workbook[sheet]
+        fd, temp_path = tempfile.mkstemp(suffix='.csv', dir=SHEET_CACHE_DIR)
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            for row in worksheet.iter_rows(values_only=True):
+                cells = [sheet_cell_text(value) for value in row]
+                # Drop the empty cells padding rows to the sheet width, so
+                # preamble lines stand out from the header when sniffing
+                while cells and cells[-1] == '':
+                    cells.pop()
+                writer.writerow(cells)
+    finally:
+        workbook.close()
+    os.replace(temp_path, converted)
+
+    # Remove conversions of earlier versions of the sheet
+    for name in os.listdir(SHEET_CACHE_DIR):
+        if name.startswith(f"{prefix}-") and name != os.path.basename(converted):
+            try:
+                os.remove(os.path.join(SHEET_CACHE_DIR, name))
+            except OSError:
+                pass
+    print(f"Converted {statement_name(file_path)} to CSV")
+    return converted
+
+
+def open_statement(file_path):
+    """Open a statement for binary reading.
+
+    Zip members and gzip files are decompressed as they are read, so
+    nothing is extracted to disk. Worksheets are read from their CSV
+    conversion.
+    """
+    container, member = split_statement_path(file_path)
+    if member is not None and is_workbook(container):
+        return open(converted_sheet_path(file_path), 'rb')
+    if member is not None:
+        # The member keeps the archive file open until it is closed itself
+        with zipfile.ZipFile(container) as archive:
+            return archive.open(member)
+    if container.lower().endswith('.gz'):
+        return gzip.open(container, 'rb')
+    return open(container, 'rb')
+
+
+class SniffResult:
+    """Format decision for a statement file"""
+
+    def __init__(self, encoding='utf-8', delimiter=',', quotechar='"', header_row=0,
+                 size=None, mtime=None):
+        self.encoding = encoding
+        self.delimiter = delimiter
+        self.quotechar = quotechar
+        self.header_row = header_row
+        self.size = size
+        self.mtime = mtime
+
+    def is_current(self, file_path):
+        """Check the decision still applies to the file on disk"""
+        try:
+            stat = statement_stat(file_path)
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime == self.mtime
+
+    def read_csv_kwargs(self):
+        """Return the pandas.read_csv arguments matching this format"""
+        return {
+            'encoding': self.encoding,
+            'delimiter': self.delimiter,
+            'quotechar': self.quotechar,
+            'skiprows': self.header_row,
+            'quoting': csv.QUOTE_MINIMAL,
+            'escapechar': '\\',
+            'on_bad_lines': 'warn'
+        }
+
+    def to_dict(self):
+        return {
+            'encoding': self.encoding,
+            'delimiter': self.delimiter,
+            'quotechar': self.quotechar,
+            'header_row': self.header_row
+        }
+
+    def __repr__(self):
+        return f"SniffResult({self.to_dict()})"
+
+
+def detect_encoding(sample):
+    """Detect the text encoding of a byte sample"""
+    # Byte order marks are authoritative
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith(codecs.BOM_UTF16_LE) or sample.startswith(codecs.BOM_UTF16_BE):
+        return 'utf-16'
+
+    # UTF-16 without BOM shows up as NUL bytes on every other position
+    if sample:
+        even_nuls = sample[0::2].count(0)
+        odd_nuls = sample[1::2].count(0)
+        half = len(sample) / 2
+        if odd_nuls > half * 0.3 and even_nuls == 0:
+            return 'utf-16-le'
+        if even_nuls > half * 0.3 and odd_nuls == 0:
+            return 'utf-16-be'
+
+    # An incremental decoder tolerates a character cut at the sample end
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    try:
+        sample.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def decode_sample(sample, encoding, truncated):
+    """Decode a byte sample into complete lines"""
+    text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(sample, final=not truncated)
+    lines = text.splitlines()
+    # The last line of a truncated sample is usually incomplete
+    if truncated and len(lines) > 1:
+        lines = lines[:-1]
+    return lines[:SNIFF_LINES]
+
+
+def count_fields(lines, delimiter, quotechar):
+    """Return the number of fields on each line for a delimiter"""
+    reader = csv.reader(lines, delimiter=delimiter, quotechar=quotechar)
+    try:
+        return [len(row) for row in reader]
+    except csv.Error:
+        return [line.count(delimiter) + 1 for line in lines]
+
+
+def detect_quotechar(lines, delimiter):
+    """Detect the quote character wrapping fields"""
+    text = '\n'.join(lines)
+    double = text.count(f'{delimiter}"') + text.count(f'"{delimiter}')
+    single = text.count(f"{delimiter}'") + text.count(f"'{delimiter}")
+    return "'" if single > double else '"'
+
+
+def detect_layout(lines):
+    """Detect delimiter, quote character and header row from sample lines"""
+    non_empty = [line for line in lines if line.strip()]
+    if not non_empty:
+        return ',', '"', 0
+
+    best = (',', 0, 0)  # delimiter, lines agreeing, field count
+    for delimiter in DELIMITERS:
+        counts = count_fields(non_empty, delimiter, '"')
+        field_count, agreeing = Counter(counts).most_common(1)[0]
+        if field_count < 2:
+            continue
+        if (agreeing, field_count) > (best[1], best[2]):
+            best = (delimiter, agreeing, field_count)
+
+    delimiter, _, field_count = best
+    quotechar = detect_quotechar(non_empty, delimiter)
+
+    # Skip title/preamble lines above the real header
+    header_row = 0
+    if field_count:
+        counts = count_fields(lines, delimiter, quotechar)
+        for i, count in enumerate(counts):
+            if count == field_count:
+                header_row = i
+                break
+
+    return delimiter, quotechar, header_row
+
+
+def sniff_csv(file_path, sample_size=SAMPLE_SIZE):
+    """Inspect a sample of a statement once to decide how to parse it"""
+    stat = statement_stat(file_path)
+    with open_statement(file_path) as f:
+        sample = f.read(sample_size)
+
+    encoding = detect_encoding(sample)
+    truncated = len(sample) >= sample_size
+    lines = decode_sample(sample, encoding, truncated)
+    delimiter, quotechar, header_row = detect_layout(lines)
+
+    return SniffResult(encoding, delimiter, quotechar, header_row,
+                       size=stat.st_size, mtime=stat.st_mtime)
+
+
+def read_statement(file_path, sniff=None, **kwargs):
+    """Read a statement with a single full parse using its sniffed format"""
+    if sniff is None:
+        sniff = sniff_csv(file_path)
+    options = sniff.read_csv_kwargs()
+    options['low_memory'] = False
+    options.update(kwargs)
+    with open_statement(file_path) as f:
+        return pd.read_csv(f, **options)
+
+
+def read_statement_header(file_path, sniff=None):
+    """Read only the column names of a statement"""
+    if sniff is None:
+        sniff = sniff_csv(file_path)
+    return read_statement(file_path, sniff, nrows=0).columns.tolist()
+
+
+def read_statement_chunks(file_path, sniff=None, chunksize=100000, **kwargs):
+    """Iterate over a statement in DataFrame chunks of bounded size"""
+    if sniff is None:
+        sniff = sniff_csv(file_path)
+    options = sniff.read_csv_kwargs()
+    options.update(kwargs)
+    with open_statement(file_path) as f:
+        with pd.read_csv(f, chunksize=chunksize, **options) as reader:
+            yield from reader
@@ -0,0 +1,42 @@
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that imports it on first attribute access.
+
+    Once loaded, the real module's attributes are copied onto the proxy so
+    later lookups cost the same as on the module itself.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        if self.__dict__['_module'] is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__.update(module.__dict__)
+            self.__dict__['_module'] = module
+        return self.__dict__['_module']
+
+    def __getattr__(self, name):
+        # Attributes the module only provides through its own __getattr__
+        # are never copied, so keep delegating once it is loaded
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """Return a module if it is already imported, otherwise a proxy importing it when first used"""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+def is_loaded(name):
+    """Check whether a module was actually imported"""
+    return name in sys.modules
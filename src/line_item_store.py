@@ -0,0 +1,276 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Columns of a normalized line item, as returned by queries
+ITEM_COLUMNS = ['Date', 'Track', 'Artist', 'UPC', 'Source', 'Revenue', 'Currency']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS statements (
+    id INTEGER PRIMARY KEY,
+    digest TEXT UNIQUE NOT NULL,
+    name TEXT,
+    source TEXT,
+    currency TEXT,
+    rows INTEGER,
+    added TEXT,
+    mapping TEXT
+);
+CREATE TABLE IF NOT EXISTS line_items (
+    statement_id INTEGER NOT NULL REFERENCES statements(id),
+    date TEXT NOT NULL,
+    track TEXT NOT NULL,
+    artist TEXT NOT NULL DEFAULT '',
+    upc TEXT NOT NULL DEFAULT '',
+    source TEXT NOT NULL DEFAULT '',
+    revenue REAL NOT NULL,
+    currency TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS line_items_date ON line_items(date);
+CREATE INDEX IF NOT EXISTS line_items_track ON line_items(track, date);
+CREATE INDEX IF NOT EXISTS line_items_artist ON line_items(artist, date);
+CREATE INDEX IF NOT EXISTS line_items_upc ON line_items(upc, date);
+CREATE INDEX IF NOT EXISTS line_items_source ON line_items(source, date);
+CREATE INDEX IF NOT EXISTS line_items_statement ON line_items(statement_id);
+CREATE TABLE IF NOT EXISTS rollup_daily (
+    statement_id INTEGER NOT NULL REFERENCES statements(id),
+    date TEXT NOT NULL,
+    track TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    upc TEXT NOT NULL,
+    source TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    revenue REAL NOT NULL,
+    items INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rollup_daily_date ON rollup_daily(date);
+CREATE INDEX IF NOT EXISTS rollup_daily_track ON rollup_daily(track, date);
+CREATE INDEX IF NOT EXISTS rollup_daily_artist ON rollup_daily(artist, date);
+CREATE INDEX IF NOT EXISTS rollup_daily_statement ON rollup_daily(statement_id);
+CREATE TABLE IF NOT EXISTS rollup_monthly (
+    statement_id INTEGER NOT NULL REFERENCES statements(id),
+    date TEXT NOT NULL,
+    track TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    upc TEXT NOT NULL,
+    source TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    revenue REAL NOT NULL,
+    items INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rollup_monthly_date ON rollup_monthly(date);
+CREATE INDEX IF NOT EXISTS rollup_monthly_track ON rollup_monthly(track, date);
+CREATE INDEX IF NOT EXISTS rollup_monthly_artist ON rollup_monthly(artist, date);
+CREATE INDEX IF NOT EXISTS rollup_monthly_statement ON rollup_monthly(statement_id);
+"""
+
+# Rollup tables by grain; monthly rows are dated on the first of the month
+ROLLUP_TABLES = {'day': 'rollup_daily', 'month': 'rollup_monthly'}
+
+# Columns of a rollup row, as returned by queries
+ROLLUP_COLUMNS = ['Date', 'Track', 'Artist', 'UPC', 'Source', 'Currency', 'Revenue', 'Items']
+
+ROLLUP_KEY = ['date', 'track', 'artist', 'upc']
+
+
+def build_rollups(frame):
+    """Aggregate normalized line items to daily and monthly rollups"""
+    daily = frame.groupby(ROLLUP_KEY, sort=False).agg(
+        revenue=('revenue', 'sum'),
+        items=('revenue', 'size')
+    ).reset_index()
+    monthly = daily.assign(date=daily['date'].str[:7] + '-01').groupby(ROLLUP_KEY, sort=False).agg(
+        revenue=('revenue', 'sum'),
+        items=('items', 'sum')
+    ).reset_index()
+    return {'day': daily, 'month': monthly}
+
+
+def month_aligned(start_date, end_date):
+    """Check a date range covers whole months, so monthly rollups answer it exactly"""
+    start_ok = start_date is None or pd.Timestamp(start_date).day == 1
+    end_ok = end_date is None or pd.Timestamp(end_date).is_month_end
+    return start_ok and end_ok
+
+
+class LineItemStore:
+    """SQLite archive of normalized line items from every analyzed statement.
+
+    Each statement is stored once under its content digest together with the
+    column mapping its rows were read with; storing it again with the same
+    mapping is skipped, with another mapping it replaces its rows. Dates are ISO strings so date ranges use the indexes,
+    and amounts stay in the statement's own currency.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.connection = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        """Open the database on first use"""
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.connection.executescript(SCHEMA)
+            # Archives created before mappings were kept lack the column
+            columns = [row[1] for row in self.connection.execute("PRAGMA table_info(statements)")]
+            if 'mapping' not in columns:
+                self.connection.execute("ALTER TABLE statements ADD COLUMN mapping TEXT")
+                self.connection.commit()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def has_statement(self, digest, mapping=''):
+        """Check a statement is archived under the given column mapping"""
+        with self.lock:
+            row = self.connect().execute(
+                "SELECT 1 FROM statements WHERE digest = ? AND mapping IS ?", (digest, mapping)
+            ).fetchone()
+        return row is not None
+
+    def add_statement(self, digest, name, items, source='', currency='', mapping=''):
+        """Store a statement's line items, replacing a copy read with another mapping.
+
+        items is a frame with Date (datetime), Track, Artist, UPC and Revenue;
+        mapping identifies how they were read from the statement. Returns
+        False when the statement is already stored with this mapping.
+        """
+        if self.has_statement(digest, mapping):
+            return False
+
+        dates = pd.to_datetime(items['Date'], errors='coerce')
+        valid = dates.notna().to_numpy()
+        # Format each distinct date once, rows share the resulting strings
+        date_codes, unique_dates = pd.factorize(dates[valid])
+        frame = pd.DataFrame({
+            'date': np.asarray(pd.DatetimeIndex(unique_dates).strftime('%Y-%m-%d'), dtype=object)[date_codes],
+            'track': items['Track'][valid].astype(str).to_numpy(),
+            'artist': items['Artist'][valid].astype(str).to_numpy() if 'Artist' in items.columns else '',
+            'upc': items['UPC'][valid].astype(str).to_numpy() if 'UPC' in items.columns else '',
+            'revenue': items['Revenue'][valid].astype(float).to_numpy()
+        })
+        rollups = build_rollups(frame)
+
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                existing = connection.execute("SELECT id FROM statements WHERE digest = ?", (digest,)).fetchone()
+                if existing:
+                    for table in ['line_items'] + list(ROLLUP_TABLES.values()):
+                        connection.execute(f"DELETE FROM {table} WHERE statement_id = ?", (existing[0],))
+                    connection.execute("DELETE FROM statements WHERE id = ?", (existing[0],))
+                cursor = connection.execute(
+                    "INSERT INTO statements (digest, name, source, currency, rows, added, mapping) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (digest, name, source, currency, len(frame), datetime.now().isoformat(), mapping)
+                )
+                statement_id = cursor.lastrowid
+                connection.executemany(
+                    "INSERT INTO line_items (statement_id, date, track, artist, upc, source, revenue, currency) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((statement_id, date, track, artist, upc, source, revenue, currency)
+                     for date, track, artist, upc, revenue in frame.itertuples(index=False, name=None))
+                )
+                # Keep the rollups in step with the line items
+                for grain, table in ROLLUP_TABLES.items():
+                    connection.executemany(
+                        f"INSERT INTO {table} (statement_id, date, track, artist, upc, source, currency, revenue, items) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        ((statement_id, date, track, artist, upc, source, currency, revenue, int(count))
+                         for date, track, artist, upc, revenue, count in rollups[grain].itertuples(index=False, name=None))
+                    )
+        return True
+
+    @staticmethod
+    def where_clause(start_date=None, end_date=None, tracks=None, artists=None, upcs=None, sources=None):
+        """Build the SQL conditions and parameters of a query on indexed columns"""
+        conditions = []
+        params = []
+        if start_date is not None:
+            conditions.append("date >= ?")
+            params.append(pd.Timestamp(start_date).strftime('%Y-%m-%d'))
+        if end_date is not None:
+            conditions.append("date <= ?")
+            params.append(pd.Timestamp(end_date).strftime('%Y-%m-%d'))
+        # Value lists are bound as one JSON array, so any number of selected
+        # values stays within SQLite's limit on bound variables
+        for column, values in (('track', tracks), ('artist', artists), ('upc', upcs), ('source', sources)):
+            if values:
+                conditions.append(f"{column} IN (SELECT value FROM json_each(?))")
+                params.append(json.dumps([str(value) for value in values]))
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def query(self, start_date=None, end_date=None, tracks=None, artists=None, upcs=None, sources=None):
+        """Return the line items matching a date range and value filters.
+
+        Every condition is on an indexed column, so SQLite only reads the
+        matching rows.
+        """
+        where, params = self.where_clause(start_date, end_date, tracks, artists, upcs, sources)
+        sql = "SELECT date, track, artist, upc, source, revenue, currency FROM line_items" + where
+
+        with self.lock:
+            items = pd.read_sql_query(sql, self.connect(), params=params)
+        items.columns = ITEM_COLUMNS
+        items['Date'] = pd.to_datetime(items['Date'])
+        return items
+
+    def query_rollup(self, grain, start_date=None, end_date=None, tracks=None, artists=None, upcs=None, sources=None):
+        """Return rollup rows at a grain ('day' or 'month') summed across statements.
+
+        Monthly rows only answer date ranges covering whole months exactly.
+        """
+        table = ROLLUP_TABLES[grain]
+        where, params = self.where_clause(start_date, end_date, tracks, artists, upcs, sources)
+        sql = (
+            f"SELECT date, track, artist, upc, source, currency, SUM(revenue), SUM(items) FROM {table}{where} "
+            "GROUP BY date, track, artist, upc, source, currency"
+        )
+        with self.lock:
+            rows = pd.read_sql_query(sql, self.connect(), params=params)
+        rows.columns = ROLLUP_COLUMNS
+        rows['Date'] = pd.to_datetime(rows['Date'])
+        return rows
+
+    def date_range(self):
+        """Return the first and last dates of the archived line items, None if empty"""
+        with self.lock:
+            first, last = self.connect().execute("SELECT MIN(date), MAX(date) FROM rollup_daily").fetchone()
+        if first is None:
+            return None, None
+        return pd.Timestamp(first), pd.Timestamp(last)
+
+    def currencies(self):
+        """Return the statement currencies present in the store"""
+        with self.lock:
+            rows = self.connect().execute("SELECT DISTINCT currency FROM statements").fetchall()
+        return [row[0] or '' for row in rows]
+
+    def table_size(self, table):
+        with self.lock:
+            return self.connect().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def distinct(self, column):
+        """Return the sorted distinct values of an indexed column"""
+        if column not in ('track', 'artist', 'upc', 'source'):
+            raise ValueError(f"Unknown line item column: {column}")
+        with self.lock:
+            rows = self.connect().execute(
+                f"SELECT DISTINCT {column} FROM line_items WHERE {column} != '' ORDER BY {column}"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def statement_count(self):
+        with self.lock:
+            return self.connect().execute("SELECT COUNT(*) FROM statements").fetchone()[0]
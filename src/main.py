@@ -1,21 +1,56 @@
 import sys
 import os
 import json
+import shutil
+import time
+
+# Process start, for the startup benchmark
+STARTUP_TIME = time.perf_counter()
+
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                            QHBoxLayout, QPushButton, QListWidget, QLabel, 
                            QComboBox, QFileDialog, QMessageBox, QLineEdit,
-                           QDateEdit, QGroupBox, QGridLayout, QTableWidget,
-                           QTableWidgetItem, QListWidgetItem, QInputDialog,
+                           QDateEdit, QGroupBox, QGridLayout, QTableView,
+                           QListWidgetItem, QInputDialog,
                            QSplitter, QTabWidget, QFrame, QMenu, QDialog,
                            QCheckBox)
-from PyQt6.QtCore import Qt, QMimeData, QDate, QRect, QTimer
+from PyQt6.QtCore import Qt, QMimeData, QDate, QRect, QTimer, QObject, QEvent, QThreadPool
 from PyQt6.QtGui import (QDragEnterEvent, QDropEvent, QPainter, QColor, QPen, 
                         QLinearGradient, QImage, QBrush)
-import pandas as pd
+from lazy_import import lazy_import, is_loaded
 from datetime import datetime
 import csv
 import traceback
 from math import cos, sin, pi, atan2
+from template_index import TemplateIndex, column_fields, column_matches_type, MATCH_THRESHOLD
+from ingest import (sniff_csv, read_statement, read_statement_header, is_statement_file, statement_paths,
+                    statement_name, statement_exists, set_sheet_cache_dir)
+from track_merge import stream_merge_tracks
+from filter_list import SearchableFilterList
+from results_model import ResultsTableModel
+from consolidation import consolidate_results, run_aggregation
+from consolidation_dialog import ConsolidationDialog
+from currency import FxRates
+from royalties import RoyaltySplits
+from advances import AdvancesLedger, leaves_out_dates
+from result_set import ResultSet
+from result_export import EXPORT_FILTERS, with_export_extension, write_results
+from dedup import DedupIndex, row_hashes
+from fingerprints import FingerprintRegistry
+from watch_folder import FolderWatcher
+from background import BackgroundTask
+from line_item_store import LineItemStore, month_aligned
+from track_identity import TrackIdentityIndex
+from cleaning import clean_text, clean_revenue, parse_dates
+from profiling import MemoryProfile
+from title_matching import propose_merges
+from reconciliation_dialog import ReconciliationDialog
+from periods import (GRAIN_MONTHS, MONTH_NAMES, month_codes, period_codes, period_labels,
+                     period_start_months)
+
+# pandas and numpy are only imported when a statement is first read
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
 
 print("Starting CSV Merge application...")
 
@@ -28,7 +63,8 @@ class ResultsWindow(QMainWindow):
         
         try:
             # Store data
-            self.results_data = results_data
+            self.results_data = ResultSet.from_records(results_data)
+            results_data = self.results_data
             
             # Create central widget
             central_widget = QWidget()
@@ -51,7 +87,7 @@ class ResultsWindow(QMainWindow):
             period_layout = QHBoxLayout()
             period_layout.addWidget(QLabel("Period:"))
             self.period_filter = QComboBox()
-            periods = sorted(set(result['Period'] for result in results_data))
+            periods = results_data.unique('Period')
             self.period_filter.addItem("All Periods")
             self.period_filter.addItems(periods)
             self.period_filter.currentTextChanged.connect(self.apply_filters)
@@ -61,7 +97,7 @@ class ResultsWindow(QMainWindow):
             artist_layout = QHBoxLayout()
             artist_layout.addWidget(QLabel("Artist:"))
             self.artist_filter = QComboBox()
-            artists = sorted(set(result.get('Artist', '') for result in results_data if 'Artist' in result))
+            artists = results_data.unique('Artist')
             self.artist_filter.addItem("All Artists")
             self.artist_filter.addItems(artists)
             self.artist_filter.currentTextChanged.connect(self.apply_filters)
@@ -82,26 +118,23 @@ class ResultsWindow(QMainWindow):
             filter_layout.addWidget(self.filter_input)
             overview_layout.addLayout(filter_layout)
             
-            # Create table
-            self.table = QTableWidget()
-            
             # Set up table columns based on available data
             headers = ['Period', 'Track']
-            if any('Artist' in result for result in results_data):
+            if results_data.has('Artist'):
                 headers.insert(1, 'Artist')
-            if any('Source' in result for result in results_data):
+            if results_data.has('Source'):
                 headers.insert(1, 'Source')
-            if any('UPC' in result for result in results_data):
+            if results_data.has('UPC'):
                 headers.insert(len(headers)-1, 'UPC')
             headers.extend(['Total Revenue', 'Artist Revenue'])
+            self.headers = headers
             
-            self.table.setColumnCount(len(headers))
-            self.table.setHorizontalHeaderLabels(headers)
+            # Create table, a view over the result set rows
+            self.model = ResultsTableModel(results_data, headers, self)
+            self.table = QTableView()
+            self.table.setModel(self.model)
             self.table.horizontalHeader().setStretchLastSection(True)
             self.table.setSortingEnabled(True)
-            
-            # Add data to table
-            self.populate_table(results_data)
             overview_layout.addWidget(self.table)
             
             # Add export options
@@ -150,7 +183,7 @@ class ResultsWindow(QMainWindow):
             group_layout.addWidget(QLabel("Group By:"))
             self.group_by = QComboBox()
             group_options = ['By Period', 'By Track']
-            if any('Artist' in result for result in results_data):
+            if results_data.has('Artist'):
                 group_options.insert(1, 'By Artist')
             self.group_by.addItems(group_options)
             group_layout.addWidget(self.group_by)
@@ -185,68 +218,43 @@ class ResultsWindow(QMainWindow):
             traceback.print_exc()
             QMessageBox.critical(self, "Error", f"Failed to initialize results window: {str(e)}")
 
-    def populate_table(self, data):
-        """Populate the table with the given data"""
-        try:
-            self.table.setRowCount(len(data))
-            headers = [self.table.horizontalHeaderItem(i).text() for i in range(self.table.columnCount())]
-            
-            for i, row in enumerate(data):
-                for j, header in enumerate(headers):
-                    if header == 'Period':
-                        value = row.get('Period', '')
-                    elif header == 'Artist':
-                        value = row.get('Artist', '')
-                    elif header == 'Source':
-                        value = row.get('Source', '')
-                    elif header == 'UPC':
-                        value = row.get('UPC', '')
-                    elif header == 'Track':
-                        value = row.get('Track', '')
-                    elif header == 'Total Revenue':
-                        value = row.get('Total Revenue', '')
-                    elif header == 'Artist Revenue':
-                        value = row.get('Artist Revenue', '')
-                    else:
-                        value = ''
-                    
-                    item = QTableWidgetItem(str(value))
-                    self.table.setItem(i, j, item)
-        except Exception as e:
-            print(f"Error populating table: {str(e)}")
-            traceback.print_exc()
+    def selected_filters(self):
+        """Return the period and artist filters as result set column values"""
+        selected_period = self.period_filter.currentText()
+        selected_artist = self.artist_filter.currentText()
+        return {
+            'Period': None if selected_period == "All Periods" else selected_period,
+            'Artist': None if selected_artist == "All Artists" else selected_artist
+        }
+
+    def filter_mask(self):
+        """Return the mask of result rows passing the filters and the search text"""
+        mask = self.results_data.mask(**self.selected_filters())
+        if self.filter_input.text():
+            mask &= self.results_data.search_mask(self.filter_input.text(), self.headers)
+        return mask
 
     def apply_filters(self):
-        """Apply period and artist filters to the data"""
+        """Apply period, artist and search filters to the table"""
         try:
-            filtered_data = self.results_data.copy()
-            
-            # Apply period filter
-            selected_period = self.period_filter.currentText()
-            if selected_period != "All Periods":
-                filtered_data = [row for row in filtered_data if row['Period'] == selected_period]
-            
-            # Apply artist filter
-            selected_artist = self.artist_filter.currentText()
-            if selected_artist != "All Artists":
-                filtered_data = [row for row in filtered_data if row.get('Artist', '') == selected_artist]
-            
-            # Update table with filtered data
-            self.populate_table(filtered_data)
-            
-            # Apply text filter if any
-            if self.filter_input.text():
-                self.filter_results(self.filter_input.text())
-                
+            # Compare dictionary codes instead of row values
+            self.model.set_mask(self.filter_mask())
         except Exception as e:
             print(f"Error applying filters: {str(e)}")
             traceback.print_exc()
 
+    def fiscal_start(self):
+        """Fiscal year start month of the main window, January if unknown"""
+        parent = self.parent()
+        return parent.get_fiscal_start() if hasattr(parent, 'get_fiscal_start') else 1
+
     def export_by_artist(self):
         """Export results grouped by artist with quarterly totals"""
         try:
+            results = self.results_data
+            
             # Get all artists
-            artists = set(result.get('Artist', '') for result in self.results_data if 'Artist' in result)
+            artists = results.unique('Artist')
             
             if not artists:
                 QMessageBox.warning(self, "Warning", "No artist data available to export.")
@@ -263,102 +271,57 @@ class ResultsWindow(QMainWindow):
             if not export_dir:
                 return
             
+            revenue_columns = ['Total Revenue', 'Artist Revenue']
+            fiscal_start = self.fiscal_start()
+            blank_row = {column: '' for column in ['Quarter', 'Period', 'Artist', 'Source', 'UPC', 'Track'] + revenue_columns}
+            
             # Export for each artist
-            for artist in sorted(artists):
-                if not artist:  # Skip empty artist names
-                    continue
-                    
+            for artist in artists:
                 # Filter data for this artist
-                artist_data = [
-                    result for result in self.results_data
-                    if result.get('Artist', '') == artist
-                ]
-                
-                if not artist_data:
+                artist_data = results.take(results.mask(Artist=artist)).sort(['Period', 'Track'])
+                if not len(artist_data):
                     continue
+                frame = artist_data.frame
                 
                 # Get all sources for this artist
-                sources = sorted(set(result.get('Source', '') for result in artist_data if result.get('Source')))
+                sources = artist_data.unique('Source')
                 sources_str = '_'.join(sources) if sources else 'No_Source'
                 
-                # Convert periods to quarters if needed and get unique quarters
-                quarters = set()
-                for result in artist_data:
-                    period = result['Period']
-                    # If period is in YYYY-MM format, convert to quarter
-                    if len(period) == 7 and period[4] == '-':
-                        year = period[:4]
-                        month = int(period[5:])
-                        quarter = f"{year}-Q{(month-1)//3 + 1}"
-                    # If period is already in YYYY-Qn format, keep it
-                    elif len(period) == 7 and period[4:6] == '-Q':
-                        quarter = period
-                    else:
-                        quarter = period
-                    quarters.add(quarter)
+                # Bucket monthly rows into quarters from their typed periods,
+                # longer periods keep their own label
+                periods = frame['Period'].astype(str)
+                starts, lengths = artist_data.period_starts()
+                monthly = (lengths == 1) & (starts >= 0)
+                quarter_codes = period_codes(starts, 'Quarter', fiscal_start)
+                quarters = np.where(monthly, period_labels(quarter_codes, 'Quarter', fiscal_start), periods.to_numpy())
+                quarter_starts = np.where(monthly, period_start_months(quarter_codes, 'Quarter', fiscal_start), starts)
+                quarter_order = pd.DataFrame({'Start': quarter_starts, 'Quarter': quarters}).drop_duplicates('Quarter')
+                unique_quarters = quarter_order.sort_values(['Start', 'Quarter'])['Quarter'].tolist()
                 
                 # Create filename
                 safe_artist_name = "".join(c for c in artist if c.isalnum() or c in (' ', '-', '_')).strip()
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M')
-                quarters_str = '_'.join(sorted(quarters)) if len(quarters) <= 2 else f"{min(quarters)}_to_{max(quarters)}"
+                quarters_str = '_'.join(unique_quarters) if len(unique_quarters) <= 2 else f"{unique_quarters[0]}_to_{unique_quarters[-1]}"
                 filename = f"Whales Records - {safe_artist_name} - Statement - {quarters_str} - {timestamp} - {sources_str}.csv"
                 filepath = os.path.join(export_dir, filename)
                 
-                # Prepare data for export with quarterly grouping
-                export_data = []
-                quarterly_totals = {}
-                
-                # First, add all detailed rows
-                for result in sorted(artist_data, key=lambda x: (x['Period'], x['Track'])):
-                    # Determine quarter
-                    period = result['Period']
-                    if len(period) == 7 and period[4] == '-':
-                        year = period[:4]
-                        month = int(period[5:])
-                        quarter = f"{year}-Q{(month-1)//3 + 1}"
-                    else:
-                        quarter = period
-                    
-                    # Get revenue values without currency
-                    total_rev = float(result['Total Revenue'].split()[0])
-                    artist_rev = float(result['Artist Revenue'].split()[0])
-                    
-                    # Update quarterly totals
-                    if quarter not in quarterly_totals:
-                        quarterly_totals[quarter] = {'Total Revenue': 0.0, 'Artist Revenue': 0.0}
-                    quarterly_totals[quarter]['Total Revenue'] += total_rev
-                    quarterly_totals[quarter]['Artist Revenue'] += artist_rev
-                    
-                    # Add row to export data
-                    row = {
-                        'Quarter': quarter,
-                        'Period': result['Period'],
-                        'Artist': artist,
-                        'Source': result.get('Source', ''),
-                        'UPC': result.get('UPC', ''),
-                        'Track': result['Track'],
-                        'Total Revenue': f"{total_rev:.2f}",
-                        'Artist Revenue': f"{artist_rev:.2f}"
-                    }
-                    export_data.append(row)
-                
-                # Add empty row before totals
-                if export_data:
-                    export_data.append({
-                        'Quarter': '',
-                        'Period': '',
-                        'Artist': '',
-                        'Source': '',
-                        'UPC': '',
-                        'Track': '',
-                        'Total Revenue': '',
-                        'Artist Revenue': ''
-                    })
-                
-                # Add quarterly totals
-                for quarter in sorted(quarterly_totals.keys()):
-                    totals = quarterly_totals[quarter]
-                    export_data.append({
+                # Detailed rows straight from the result columns
+                detail = pd.DataFrame({
+                    'Quarter': quarters,
+                    'Period': periods.to_numpy(),
+                    'Artist': artist,
+                    'Source': artist_data.formatted('Source') if artist_data.has('Source') else '',
+                    'UPC': artist_data.formatted('UPC') if artist_data.has('UPC') else '',
+                    'Track': artist_data.formatted('Track')
+                })
+                for column in revenue_columns:
+                    detail[column] = [f"{value:.2f}" for value in artist_data.amounts(column)]
+                
+                # Quarterly totals in one grouped sum
+                quarterly_totals = frame[revenue_columns].groupby(quarters).sum().reindex(unique_quarters)
+                totals_rows = [blank_row]
+                for quarter, totals in quarterly_totals.iterrows():
+                    totals_rows.append({
                         'Quarter': quarter,
                         'Period': 'TOTAL',
                         'Artist': artist,
@@ -369,36 +332,22 @@ class ResultsWindow(QMainWindow):
                         'Artist Revenue': f"{totals['Artist Revenue']:.2f}"
                     })
                 
-                # Add grand total
-                grand_total_rev = sum(totals['Total Revenue'] for totals in quarterly_totals.values())
-                grand_total_artist = sum(totals['Artist Revenue'] for totals in quarterly_totals.values())
-                
-                # Add empty row before grand total
-                export_data.append({
-                    'Quarter': '',
-                    'Period': '',
-                    'Artist': '',
-                    'Source': '',
-                    'UPC': '',
-                    'Track': '',
-                    'Total Revenue': '',
-                    'Artist Revenue': ''
-                })
-                
-                # Add grand total row
-                export_data.append({
+                # Add empty row and grand total
+                grand_totals = quarterly_totals.sum()
+                totals_rows.append(blank_row)
+                totals_rows.append({
                     'Quarter': 'TOTAL',
                     'Period': 'ALL QUARTERS',
                     'Artist': artist,
                     'Source': ', '.join(sources),
                     'UPC': '',
                     'Track': 'Grand Total',
-                    'Total Revenue': f"{grand_total_rev:.2f}",
-                    'Artist Revenue': f"{grand_total_artist:.2f}"
+                    'Total Revenue': f"{grand_totals['Total Revenue']:.2f}",
+                    'Artist Revenue': f"{grand_totals['Artist Revenue']:.2f}"
                 })
                 
                 # Save to CSV
-                df = pd.DataFrame(export_data)
+                df = pd.concat([detail, pd.DataFrame(totals_rows)], ignore_index=True)
                 df.to_csv(filepath, index=False)
             
             QMessageBox.information(
@@ -414,19 +363,7 @@ class ResultsWindow(QMainWindow):
 
     def filter_results(self, text):
         """Filter results based on search text"""
-        try:
-            text = text.lower()
-            for row in range(self.table.rowCount()):
-                show_row = False
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row, col)
-                    if item and text in item.text().lower():
-                        show_row = True
-                        break
-                self.table.setRowHidden(row, not show_row)
-        except Exception as e:
-            print(f"Error filtering results: {str(e)}")
-            traceback.print_exc()
+        self.apply_filters()
 
     def create_chart(self):
         """Create and display the chart using ChartWidget"""
@@ -442,33 +379,18 @@ class ResultsWindow(QMainWindow):
             print(f"Group by: {group_by}")
             print(f"Value type: {value_type}")
             
-            # Process data based on grouping
-            data = {}
-            for row in self.results_data:
-                # Get the key based on grouping
-                if group_by == 'By Period':
-                    key = row['Period']
-                elif group_by == 'By Track':
-                    key = row['Track']
-                elif group_by == 'By Artist' and 'Artist' in row:
-                    key = row['Artist']
-                else:
-                    continue
-                
-                # Get the value
-                try:
-                    value_str = row[value_type].split()[0]  # Remove currency symbol
-                    value = float(value_str)
-                    data[key] = data.get(key, 0) + value
-                except (ValueError, IndexError):
-                    continue
-            
-            # Sort data by value for better visualization
-            sorted_data = sorted(data.items(), key=lambda x: x[1], reverse=True)
+            # Sum the selected amount per dictionary code of the grouping column
+            column = {'By Period': 'Period', 'By Track': 'Track', 'By Artist': 'Artist'}.get(group_by)
+            frame = self.results_data.frame
+            if column in frame.columns:
+                totals = frame.groupby(column, observed=True, sort=False)[value_type].sum()
+            else:
+                totals = pd.Series(dtype=float)
             
-            # Take top 10 items for better readability
-            labels = [item[0] for item in sorted_data[:10]]
-            values = [item[1] for item in sorted_data[:10]]
+            # Take top 10 items by value for better readability
+            top = totals.sort_values(ascending=False, kind='stable').head(10)
+            labels = [str(label) for label in top.index]
+            values = top.tolist()
             
             # Update the chart widget
             self.chart_widget.set_data(labels, values, chart_type)
@@ -539,7 +461,7 @@ class ResultsWindow(QMainWindow):
             QMessageBox.critical(self, "Export Error", str(e))
 
     def export_results(self):
-        """Export the results to CSV"""
+        """Export the filtered results to CSV, Parquet or XLSX"""
         try:
             # Get current template name from parent window
             parent_window = self.parent()
@@ -556,36 +478,21 @@ class ResultsWindow(QMainWindow):
             timestamp = datetime.now().strftime('%Y%m%d_%H%M')
             default_filename = f"revenue_analysis_{timestamp}_{current_template}.csv"
             
-            file_name, _ = QFileDialog.getSaveFileName(
+            file_name, selected_filter = QFileDialog.getSaveFileName(
                 self,
                 "Export Results",
                 default_filename,
-                "CSV Files (*.csv)"
+                EXPORT_FILTERS
             )
             
             if file_name:
-                # Determine if we have artist column
-                has_artist_column = self.table.columnCount() == 5
-                
-                # Set headers based on columns
-                headers = ['Period', 'Track']
-                if has_artist_column:
-                    headers.append('Artist')
-                headers.extend(['Total Revenue', 'Artist Revenue'])
-                
-                # Collect visible rows
-                visible_results = []
-                for row in range(self.table.rowCount()):
-                    if not self.table.isRowHidden(row):
-                        row_data = []
-                        for col in range(self.table.columnCount()):
-                            item = self.table.item(row, col)
-                            row_data.append(item.text() if item else '')
-                        visible_results.append(row_data)
+                file_name = with_export_extension(file_name, selected_filter)
                 
-                # Save to CSV
-                df = pd.DataFrame(visible_results, columns=headers)
-                df.to_csv(file_name, index=False)
+                # Write the filtered rows straight from the result columns,
+                # whatever the table has rendered
+                start = time.perf_counter()
+                rows = write_results(self.results_data, self.headers, file_name, self.filter_mask())
+                print(f"Exported {rows} rows in {time.perf_counter() - start:.2f}s")
                 
                 QMessageBox.information(self, "Export Complete", 
                     f"Results exported to {file_name}")
@@ -1131,6 +1038,7 @@ class CSVMergeApp(QMainWindow):
         self.setWindowTitle("Music Revenue Analysis")
         self.setMinimumSize(1200, 900)
         self.csv_files = []
+        self.file_formats = {}
         self.currencies = ['EUR', 'USD', 'GBP', 'JPY', 'CAD', 'AUD', 'CHF']
         self.available_columns = []
         self.tracks_list = []
@@ -1141,6 +1049,14 @@ class CSVMergeApp(QMainWindow):
         self.exports_dir = os.path.join(self.data_dir, 'exports')
         self.history_dir = os.path.join(self.data_dir, 'history')
         self.templates_dir = os.path.join(self.data_dir, 'templates')
+        self.fx_dir = os.path.join(self.data_dir, 'fx')
+        self.splits_dir = os.path.join(self.data_dir, 'splits')
+        self.advances_dir = os.path.join(self.data_dir, 'advances')
+        self.dedup_dir = os.path.join(self.data_dir, 'dedup')
+        self.cache_dir = os.path.join(self.data_dir, 'cache')
+        self.store_dir = os.path.join(self.data_dir, 'store')
+        self.identity_dir = os.path.join(self.data_dir, 'identity')
+        set_sheet_cache_dir(os.path.join(self.cache_dir, 'sheets'))
         
         # Ensure directories exist
         self.ensure_directories()
@@ -1148,10 +1064,32 @@ class CSVMergeApp(QMainWindow):
         # Set file paths
         self.templates_file = os.path.join(self.templates_dir, 'column_templates.json')
         self.results_file = os.path.join(self.history_dir, 'analysis_history.json')
-        
-        self.load_templates()
-        self.load_analysis_history()
+        self.signatures_file = os.path.join(self.templates_dir, 'header_signatures.json')
+        self.watch_settings_file = os.path.join(self.data_dir, 'watch_folder.json')
+        self.fx_rates = FxRates(self.fx_dir)
+        self.royalty_splits = RoyaltySplits(os.path.join(self.splits_dir, 'royalty_splits.json'))
+        self.advances_ledger = AdvancesLedger(os.path.join(self.advances_dir, 'ledger.json'))
+        self.dedup_index = DedupIndex(self.dedup_dir)
+        self.fingerprints = FingerprintRegistry(self.cache_dir)
+        self.line_item_store = LineItemStore(os.path.join(self.store_dir, 'line_items.sqlite'))
+        self.track_identity = TrackIdentityIndex(self.identity_dir)
+        
+        # Templates and history are read in the background once the window is up
+        self.templates = {}
+        self.analysis_history = {}
+        self.saved_data_loaded = False
+        self.template_index = TemplateIndex(self.templates, self.signatures_file)
         self.setup_ui()
+        
+        # Ingest statements dropped into the inbox folder in the background
+        self.watch_folder = None
+        self.inbox_files = []
+        self.folder_watcher = FolderWatcher(self.fingerprints, self.template_index, self)
+        self.folder_watcher.ingested.connect(self.on_statement_ingested)
+        self.folder_watcher.failed.connect(self.on_ingest_failed)
+        self.folder_watcher.ready.connect(self.on_inbox_scanned)
+        
+        QTimer.singleShot(0, self.load_saved_data)
         print("Main window initialized")
 
     def ensure_directories(self):
@@ -1160,6 +1098,13 @@ class CSVMergeApp(QMainWindow):
         os.makedirs(self.exports_dir, exist_ok=True)
         os.makedirs(self.history_dir, exist_ok=True)
         os.makedirs(self.templates_dir, exist_ok=True)
+        os.makedirs(self.fx_dir, exist_ok=True)
+        os.makedirs(self.splits_dir, exist_ok=True)
+        os.makedirs(self.advances_dir, exist_ok=True)
+        os.makedirs(self.dedup_dir, exist_ok=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        os.makedirs(self.store_dir, exist_ok=True)
+        os.makedirs(self.identity_dir, exist_ok=True)
 
     def get_export_path(self, default_name):
         """Get path for export files with proper directory"""
@@ -1191,8 +1136,16 @@ class CSVMergeApp(QMainWindow):
         clean_import_button = QPushButton("Clean Import")
         clean_import_button.clicked.connect(self.clean_import)
         
+        watch_button = QPushButton("Watch Folder")
+        watch_button.clicked.connect(self.choose_watch_folder)
+        self.add_inbox_button = QPushButton("Add Inbox Files")
+        self.add_inbox_button.clicked.connect(self.add_inbox_files)
+        self.add_inbox_button.setEnabled(False)
+        
         button_layout.addWidget(add_button)
         button_layout.addWidget(clean_import_button)
+        button_layout.addWidget(watch_button)
+        button_layout.addWidget(self.add_inbox_button)
         
         header_layout.addWidget(header_label)
         header_layout.addStretch()
@@ -1204,6 +1157,8 @@ class CSVMergeApp(QMainWindow):
         self.file_list.dragEnterEvent = self.dragEnterEvent
         self.file_list.dropEvent = self.dropEvent
         file_layout.addWidget(self.file_list)
+        self.watch_label = QLabel("")
+        file_layout.addWidget(self.watch_label)
         file_group.setLayout(file_layout)
         left_layout.addWidget(file_group)
 
@@ -1287,8 +1242,7 @@ class CSVMergeApp(QMainWindow):
         track_label = QLabel("Select Tracks:")
         track_label.setStyleSheet("font-weight: bold;")
         track_section.addWidget(track_label)
-        self.track_filter = QListWidget()
-        self.track_filter.setSelectionMode(QListWidget.SelectionMode.MultiSelection)
+        self.track_filter = SearchableFilterList("All Tracks")
         self.track_filter.setMinimumHeight(150)
         track_section.addWidget(self.track_filter)
         
@@ -1297,8 +1251,7 @@ class CSVMergeApp(QMainWindow):
         artist_label = QLabel("Select Artists:")
         artist_label.setStyleSheet("font-weight: bold;")
         artist_section.addWidget(artist_label)
-        self.artist_filter = QListWidget()
-        self.artist_filter.setSelectionMode(QListWidget.SelectionMode.MultiSelection)
+        self.artist_filter = SearchableFilterList("All Artists")
         self.artist_filter.setMinimumHeight(150)
         artist_section.addWidget(self.artist_filter)
         
@@ -1323,19 +1276,43 @@ class CSVMergeApp(QMainWindow):
         self.currency_combo.addItems(self.currencies)
         revenue_layout.addWidget(self.currency_combo, 0, 1)
 
-        # Advances
-        revenue_layout.addWidget(QLabel("Advances to Recoup:"), 0, 2)
-        self.advances = QLineEdit()
-        self.advances.setPlaceholderText("e.g., 1000")
-        self.advances.setText("0")  # Default value
-        revenue_layout.addWidget(self.advances, 0, 3)
-
         # Period selection
         revenue_layout.addWidget(QLabel("Group by:"), 1, 0)
         self.period_group = QComboBox()
         self.period_group.addItems(['Month', 'Quarter', 'Year'])
         revenue_layout.addWidget(self.period_group, 1, 1)
 
+        # Fiscal year start for quarter and year grouping
+        revenue_layout.addWidget(QLabel("Fiscal Year Starts:"), 3, 0)
+        self.fiscal_start = QComboBox()
+        self.fiscal_start.addItems(MONTH_NAMES)
+        revenue_layout.addWidget(self.fiscal_start, 3, 1)
+
+        # Default artist share and per-artist split table
+        revenue_layout.addWidget(QLabel("Default Artist Share (%):"), 1, 2)
+        self.artist_percentage = QLineEdit()
+        self.artist_percentage.setText("100")
+        revenue_layout.addWidget(self.artist_percentage, 1, 3)
+
+        load_splits_button = QPushButton("Load Split Table")
+        load_splits_button.clicked.connect(self.load_split_table)
+        revenue_layout.addWidget(load_splits_button, 2, 3)
+
+        # Advances ledger
+        add_advance_button = QPushButton("Add Advance")
+        add_advance_button.clicked.connect(self.add_advance)
+        revenue_layout.addWidget(add_advance_button, 2, 0)
+
+        record_recoupment_button = QPushButton("Record Recoupment")
+        record_recoupment_button.clicked.connect(self.record_recoupment)
+        revenue_layout.addWidget(record_recoupment_button, 2, 1)
+
+        # Line item archive
+        self.archive_checkbox = QCheckBox("Analyze From Archive")
+        self.archive_checkbox.setToolTip("Statements are archived when they are analyzed")
+        self.archive_checkbox.toggled.connect(self.set_archive_mode)
+        revenue_layout.addWidget(self.archive_checkbox, 2, 2)
+
         revenue_group.setLayout(revenue_layout)
         left_layout.addWidget(revenue_group)
 
@@ -1354,6 +1331,14 @@ class CSVMergeApp(QMainWindow):
         merge_button.clicked.connect(self.merge_selected_tracks)
         button_layout.addWidget(merge_button)
         
+        consolidate_button = QPushButton("Consolidate Files")
+        consolidate_button.clicked.connect(self.consolidate_files)
+        button_layout.addWidget(consolidate_button)
+        
+        reconcile_button = QPushButton("Reconcile Titles")
+        reconcile_button.clicked.connect(self.reconcile_titles)
+        button_layout.addWidget(reconcile_button)
+        
         button_layout.addStretch()
         
         analyze_button = QPushButton("Analyze Revenue")
@@ -1397,43 +1382,40 @@ class CSVMergeApp(QMainWindow):
         
         layout.addLayout(main_layout)
 
+    def collect_distinct_values(self, columns):
+        """Read the distinct non-empty values of the given columns across all files"""
+        distinct = {col: set() for col in columns}
+        for file in self.csv_files:
+            try:
+                # Only parse the columns we need
+                df = read_statement(
+                    file, self.get_file_format(file),
+                    usecols=lambda col: col in distinct,
+                    dtype=str, keep_default_na=False
+                )
+                for col in columns:
+                    if col in df.columns:
+                        values = pd.Series(df[col].unique()).str.strip()
+                        distinct[col].update(value for value in values.unique() if value)
+            except Exception as e:
+                print(f"Error reading data from {statement_name(file)}: {str(e)}")
+                continue
+        return distinct
+
     def update_tracks_list(self):
         """Update the tracks list when track column is selected"""
         try:
             if self.csv_files and self.track_column.currentText():
-                # Read all unique tracks from the files
-                all_tracks = set()
-                for file in self.csv_files:
-                    try:
-                        df = self.read_csv_file(file)
-                        if df is not None:
-                            track_col = self.track_column.currentText()
-                            if track_col in df.columns:
-                                # Convert all values to string and clean them
-                                tracks = df[track_col].fillna('').astype(str).str.strip()
-                                # Only add non-empty tracks
-                                all_tracks.update(track for track in tracks.unique() if track)
-                    except Exception as e:
-                        print(f"Error reading tracks from {os.path.basename(file)}: {str(e)}")
-                        continue
-
-                # Update tracks filter list
-                self.track_filter.clear()
-                self.track_filter.addItem("All Tracks")
-                
-                # Sort tracks after converting to string
-                sorted_tracks = sorted(all_tracks, key=str.lower)  # Case-insensitive sort
-                for track in sorted_tracks:
-                    if track:  # Skip empty tracks
-                        item = QListWidgetItem(track)
-                        self.track_filter.addItem(item)
+                track_col = self.track_column.currentText()
+                distinct = self.collect_distinct_values([track_col])
+                self.track_filter.set_values(distinct[track_col])
 
         except Exception as e:
             QMessageBox.warning(self, "Warning", f"Error updating tracks list: {str(e)}")
 
     def get_selected_tracks(self):
         """Get list of selected tracks"""
-        return [item.text() for item in self.track_filter.selectedItems()]
+        return self.track_filter.selected_values()
 
     def get_period_label(self, date):
         """Get period label based on grouping selection"""
@@ -1441,92 +1423,57 @@ class CSVMergeApp(QMainWindow):
             return "Unknown"
             
         try:
-            if self.period_group.currentText() == 'Month':
-                return date.strftime('%Y-%m')
-            elif self.period_group.currentText() == 'Quarter':
-                quarter = (date.month - 1) // 3 + 1
-                return f"{date.year}-Q{quarter}"
-            else:  # Year
-                return str(date.year)
+            return self.get_period_labels(pd.Series([date])).iloc[0] or "Unknown"
         except Exception:
             return "Unknown"
 
+    def get_file_format(self, file_path):
+        """Sniff a file's format once and remember the decision"""
+        file_format = self.file_formats.get(file_path)
+        if file_format is None or not file_format.is_current(file_path):
+            file_format = sniff_csv(file_path)
+            self.file_formats[file_path] = file_format
+            print(f"Detected format for {statement_name(file_path)}: {file_format.to_dict()}")
+        return file_format
+
     def detect_delimiter(self, file_path):
         """Detect the delimiter used in the CSV file"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                # Read first line to detect delimiter
-                first_line = f.readline()
-                if first_line.count(';') > first_line.count(','):
-                    return ';'
-            return ','
+            return self.get_file_format(file_path).delimiter
         except Exception:
             return ','  # Default to comma if detection fails
 
-    def clean_revenue_value(self, value):
-        """Convert revenue string to float, handling different number formats"""
-        if pd.isna(value) or value == '':
-            return 0.0
-        
-        try:
-            # If it's already a number, return it
-            if isinstance(value, (int, float)):
-                return float(value)
-            
-            # Remove any currency symbols and spaces
-            value_str = str(value).strip().replace('€', '').replace('$', '').strip()
-            
-            # Try direct conversion first
-            try:
-                return float(value_str)
-            except ValueError:
-                # If failed, try replacing comma with dot
-                value_str = value_str.replace(',', '.')
-                return float(value_str)
-        except Exception:
-            return 0.0
-
     def read_csv_file(self, file_path):
         """Read CSV file with proper delimiter and handle quoted fields"""
         try:
-            # Detect delimiter
-            delimiter = self.detect_delimiter(file_path)
-            
-            # Try reading with detected delimiter and more robust settings
-            df = pd.read_csv(
-                file_path,
-                delimiter=delimiter,
-                low_memory=False,
-                quoting=csv.QUOTE_MINIMAL,  # Use csv.QUOTE_MINIMAL instead
-                escapechar='\\',
-                on_bad_lines='warn'
-            )
-            
-            # If we got only one column, try the other delimiter
-            if len(df.columns) == 1:
-                other_delimiter = ';' if delimiter == ',' else ','
-                df = pd.read_csv(
-                    file_path,
-                    delimiter=other_delimiter,
-                    low_memory=False,
-                    quoting=csv.QUOTE_MINIMAL,
-                    escapechar='\\',
-                    on_bad_lines='warn'
-                )
-            
-            # Clean the dataframe
-            df = df.fillna('')  # Replace NaN with empty string
-            
-            # Remove any completely empty columns
-            df = df.dropna(axis=1, how='all')
-            
-            # Remove any completely empty rows
-            df = df.dropna(how='all')
+            # Reuse the parsed copy of content read before, under any name
+            digest = self.fingerprints.fingerprint(file_path)
+            df = self.fingerprints.load_frame(digest)
+            if df is None:
+                # Parse once with the sniffed encoding, delimiter and header row
+                df = read_statement(file_path, self.get_file_format(file_path))
+                self.fingerprints.store_frame(digest, df)
+            
+            # Find completely empty columns and rows one column at a time,
+            # keeping native dtypes; missing values are handled per mapped column
+            empty_columns = []
+            empty_rows = np.ones(len(df), dtype=bool)
+            for column in df.columns:
+                missing = df[column].isna().to_numpy()
+                if missing.all():
+                    empty_columns.append(column)
+                empty_rows &= missing
+            
+            # Only copy when there is something to remove
+            if empty_columns:
+                df = df.drop(columns=empty_columns)
+            if empty_rows.any():
+                df = df[~empty_rows]
             
             return df
         except Exception as e:
             QMessageBox.warning(self, "Warning", 
-                f"Error reading file {os.path.basename(file_path)}: {str(e)}\n"
+                f"Error reading file {statement_name(file_path)}: {str(e)}\n"
                 "Please check if the file is properly formatted.")
             return None
 
@@ -1612,23 +1559,155 @@ class CSVMergeApp(QMainWindow):
             self,
             "Select Revenue CSV Files",
             "",
-            "CSV Files (*.csv)"
+            "Statements (*.csv *.gz *.zip *.xlsx *.xlsm);;CSV Files (*.csv);;Excel Workbooks (*.xlsx *.xlsm)"
         )
         self.add_files_to_list(files)
 
+    def expand_statement_files(self, files):
+        """List the statements in added files, each CSV of a zip and each sheet of a workbook as its own statement"""
+        statements = []
+        for file in files:
+            if not is_statement_file(file):
+                continue
+            try:
+                statements.extend(statement_paths(file))
+            except Exception as e:
+                QMessageBox.warning(self, "Warning", f"Could not open {statement_name(file)}: {str(e)}")
+        return statements
+
     def add_files_to_list(self, files):
+        """Hash the added statements on a worker thread, then add those with new content"""
+        statements = [file for file in self.expand_statement_files(files) if file not in self.csv_files]
+        if not statements:
+            return
+        task = BackgroundTask(self.fingerprint_files, statements)
+        task.signals.finished.connect(lambda digests: self.add_fingerprinted_files(statements, digests))
+        task.signals.failed.connect(
+            lambda error: QMessageBox.warning(self, "Warning", f"Could not read the added files: {error}"))
+        QThreadPool.globalInstance().start(task)
+
+    def fingerprint_files(self, files):
+        """Return the content digest of each file, None if it cannot be read (runs on a worker thread)"""
+        digests = {}
+        for file in files:
+            try:
+                digests[file] = self.fingerprints.fingerprint(file)
+            except Exception as e:
+                print(f"Could not read {file}: {str(e)}")
+                digests[file] = None
+        # One registry write for the whole batch
+        self.fingerprints.save()
+        return digests
+
+    def add_fingerprinted_files(self, files, file_digests):
         newly_added_files = []
+        skipped_files = []
+        unreadable_files = []
+        digests = {self.fingerprints.fingerprint(file): file for file in self.csv_files}
         for file in files:
-            if file.lower().endswith('.csv'):
-                if file not in self.csv_files:
-                    self.csv_files.append(file)
-                    self.file_list.addItem(os.path.basename(file))
-                    newly_added_files.append(file)
+            if file not in self.csv_files:
+                # Skip content already in the list under another name
+                digest = file_digests[file]
+                if digest is None:
+                    unreadable_files.append(file)
+                    continue
+                if digest in digests:
+                    skipped_files.append((file, digests[digest]))
+                    continue
+                original_path = self.fingerprints.original_path(digest)
+                if original_path and original_path != os.path.abspath(file):
+                    print(f"{statement_name(file)} was already ingested as {original_path}")
+                digests[digest] = file
+                self.csv_files.append(file)
+                self.file_list.addItem(statement_name(file))
+                newly_added_files.append(file)
+        
+        if unreadable_files:
+            QMessageBox.warning(self, "Warning",
+                "Could not read these files:\n" + "\n".join(f"- {statement_name(file)}" for file in unreadable_files))
+        if skipped_files:
+            QMessageBox.information(self, "Duplicate Files",
+                "Skipped files with the same content as files already added:\n" +
+                "\n".join(f"- {statement_name(file)} (same as {statement_name(original)})"
+                           for file, original in skipped_files))
         
         # Update column selections when files are added
         if newly_added_files:
             self.try_auto_detect_template(newly_added_files)
 
+    def restore_watch_folder(self):
+        """Resume watching the inbox folder chosen in a previous session"""
+        try:
+            if os.path.exists(self.watch_settings_file):
+                with open(self.watch_settings_file, 'r') as f:
+                    folder = json.load(f).get('folder')
+                if folder and os.path.isdir(folder):
+                    self.start_watching(folder)
+        except Exception as e:
+            print(f"Could not restore watch folder: {str(e)}")
+
+    def choose_watch_folder(self):
+        """Choose an inbox folder whose new statements are ingested in the background"""
+        folder = QFileDialog.getExistingDirectory(
+            self,
+            "Select Inbox Folder",
+            self.watch_folder or "",
+            QFileDialog.Option.ShowDirsOnly
+        )
+        if not folder:
+            return
+        try:
+            with open(self.watch_settings_file, 'w') as f:
+                json.dump({'folder': folder}, f, indent=4)
+        except Exception as e:
+            QMessageBox.warning(self, "Warning", f"Could not save watch folder: {str(e)}")
+        self.start_watching(folder)
+
+    def start_watching(self, folder):
+        """Watch a folder, listing statements already ingested but not added"""
+        self.watch_folder = folder
+        self.inbox_files = []
+        self.folder_watcher.start(folder)
+        self.update_watch_label()
+
+    def on_inbox_scanned(self, files):
+        """List inbox statements ingested earlier but not added yet"""
+        for file in files:
+            if file not in self.inbox_files and file not in self.csv_files:
+                self.inbox_files.append(file)
+        self.update_watch_label()
+
+    def update_watch_label(self):
+        """Show how many inbox statements are ready to add"""
+        if not self.watch_folder:
+            self.watch_label.setText("")
+            return
+        self.watch_label.setText(
+            f"Watching {self.watch_folder}: {len(self.inbox_files)} new statement(s) ready"
+        )
+        self.add_inbox_button.setEnabled(bool(self.inbox_files))
+
+    def on_statement_ingested(self, info):
+        """Record a statement the background worker parsed"""
+        print(f"Ingested {statement_name(info['path'])}: {info['rows']} rows, "
+              f"template {info['template'] or 'none'}")
+        if info['path'] not in self.inbox_files and info['path'] not in self.csv_files:
+            self.inbox_files.append(info['path'])
+        self.update_watch_label()
+
+    def on_ingest_failed(self, file_path, error):
+        print(f"Could not ingest {file_path}: {error}")
+
+    def add_inbox_files(self):
+        """Add the statements ingested from the inbox folder"""
+        files = self.inbox_files
+        self.inbox_files = []
+        for file in files:
+            self.fingerprints.annotate(self.fingerprints.fingerprint(file), in_analysis=True)
+        self.fingerprints.save()
+        self.add_files_to_list(files)
+        self.update_watch_label()
+
     def try_auto_detect_template(self, new_files):
         """Try to automatically detect and apply a template for new files"""
         try:
@@ -1639,18 +1718,11 @@ class CSVMergeApp(QMainWindow):
                 
             available_columns = df.columns.tolist()
             
-            # Calculate match scores for each template
-            best_match = None
-            best_score = 0
-            
-            for template_name, template in self.templates.items():
-                score = self.calculate_template_match_score(template, available_columns)
-                if score > best_score:
-                    best_score = score
-                    best_match = template_name
+            # Resolve the template through the header index
+            best_match, best_score = self.template_index.best_match(available_columns)
             
             # If we found a good match (more than 70% match)
-            if best_score >= 0.7:
+            if best_score >= MATCH_THRESHOLD:
                 reply = QMessageBox.question(
                     self,
                     "Template Detected",
@@ -1659,6 +1731,7 @@ class CSVMergeApp(QMainWindow):
                 )
                 
                 if reply == QMessageBox.StandardButton.Yes:
+                    self.template_index.remember(available_columns, best_match)
                     self.apply_template(self.templates[best_match])
             else:
                 # No good match found, suggest creating a template
@@ -1677,45 +1750,17 @@ class CSVMergeApp(QMainWindow):
 
     def calculate_template_match_score(self, template, available_columns):
         """Calculate how well a template matches the available columns"""
-        score = 0
-        total_fields = 0
-        
-        # Convert all to lowercase for comparison
-        available_columns_lower = [col.lower() for col in available_columns]
-        
-        # Check each template field
-        for field, value in template.items():
-            if not value:  # Skip empty fields
-                continue
-                
-            total_fields += 1
-            # Check if the exact column exists
-            if value.lower() in available_columns_lower:
-                score += 1
-                continue
-                
-            # Check for similar column names
-            field_type = field.split('_')[0]  # e.g., 'track' from 'track_column'
-            similar_columns = [
-                col for col in available_columns_lower
-                if field_type in col or self.get_column_type_keywords(field_type, col)
-            ]
-            if similar_columns:
-                score += 0.8  # Partial match
-                
-        return score / total_fields if total_fields > 0 else 0
+        columns_lower = set(col.lower() for col in available_columns)
+        matched_types = set(
+            field.split('_')[0] for field, _ in column_fields(template)
+            if any(field.split('_')[0] in col or self.get_column_type_keywords(field.split('_')[0], col)
+                   for col in columns_lower)
+        )
+        return self.template_index.score(template, columns_lower, matched_types)
 
     def get_column_type_keywords(self, field_type, column_name):
         """Check if column name contains keywords related to the field type"""
-        keywords = {
-            'track': ['title', 'song', 'tc song id'],
-            'artist': ['performer', 'artist name', 'band'],
-            'revenue': ['amount', 'earnings', 'earned', 'income'],
-            'date': ['period', 'sale date', 'transaction date', 'posted'],
-            'upc': ['barcode', 'isrc', 'identifier']
-        }
-        
-        return any(keyword in column_name.lower() for keyword in keywords.get(field_type, []))
+        return column_matches_type(field_type, column_name)
 
     def suggest_template_mapping(self, available_columns):
         """Suggest column mappings and create a new template"""
@@ -1814,6 +1859,7 @@ class CSVMergeApp(QMainWindow):
                 # Save template
                 self.templates[name] = new_template
                 self.save_templates()
+                self.template_index.remember(available_columns, name)
                 
                 # Apply the new template
                 self.apply_template(new_template)
@@ -1850,23 +1896,153 @@ class CSVMergeApp(QMainWindow):
             print(f"Error applying template: {str(e)}")
             traceback.print_exc()
 
-    def calculate_artist_revenue(self, revenue):
-        """Calculate artist revenue based on percentage and advances"""
+    def get_artist_percentage(self):
+        """Get default artist share, return 100 if invalid"""
         try:
-            percentage = float(self.artist_percentage.text())
-            artist_revenue = (revenue * percentage) / 100
-            return artist_revenue
+            return float(self.artist_percentage.text() or "100")
         except ValueError:
             QMessageBox.warning(self, "Warning", "Invalid artist percentage. Using 100%")
-            return revenue
+            return 100.0
 
-    def get_advances(self):
-        """Get advances amount, return 0 if invalid"""
+    def load_split_table(self):
+        """Import the per-artist / per-UPC royalty split table from a CSV file"""
+        file_name, _ = QFileDialog.getOpenFileName(
+            self,
+            "Select Royalty Split Table",
+            "",
+            "CSV Files (*.csv)"
+        )
+        if not file_name:
+            return
+        
         try:
-            return float(self.advances.text() or "0")
+            self.royalty_splits.import_csv(file_name)
+            QMessageBox.information(self, "Split Table Loaded",
+                f"Loaded {len(self.royalty_splits.artists)} artist and "
+                f"{len(self.royalty_splits.upcs)} UPC splits.")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not load split table: {str(e)}")
+
+    def get_statement_template(self, columns, field):
+        """Get a template field for a statement from its matching template"""
+        template_name, score = self.template_index.best_match(columns)
+        if template_name and score >= MATCH_THRESHOLD and self.templates[template_name].get(field):
+            return self.templates[template_name][field]
+        
+        # Fall back to the template matching the current column mapping
+        for template in self.templates.values():
+            if (template.get('track_column') == self.track_column.currentText() and
+                template.get('revenue_column') == self.revenue_column.currentText() and
+                template.get('date_column') == self.date_column.currentText()):
+                return template.get(field) or None
+        return None
+
+    def get_statement_currency(self, columns):
+        """Get the currency a statement pays in from its matching template"""
+        return self.get_statement_template(columns, 'currency')
+
+    def get_dedup_columns(self, columns):
+        """Get the columns identifying a statement row, all columns by default"""
+        dedup_columns = self.get_statement_template(columns, 'dedup_columns')
+        if dedup_columns:
+            return [col for col in dedup_columns if col in columns] or list(columns)
+        return list(columns)
+
+    def get_fiscal_start(self):
+        """Get the first month (1-12) of the fiscal year"""
+        return self.fiscal_start.currentIndex() + 1
+
+    def get_period_labels(self, dates):
+        """Get period labels for a Series of dates based on grouping selection"""
+        grain = self.period_group.currentText()
+        fiscal_start = self.get_fiscal_start()
+        codes = period_codes(month_codes(dates), grain, fiscal_start)
+        return pd.Series(period_labels(codes, grain, fiscal_start), index=dates.index)
+
+    def add_advance(self):
+        """Record an advance paid to an artist in the advances ledger"""
+        try:
+            dialog = QDialog(self)
+            dialog.setWindowTitle("Add Advance")
+            layout = QGridLayout(dialog)
+            
+            layout.addWidget(QLabel("Artist:"), 0, 0)
+            artist_input = QLineEdit()
+            layout.addWidget(artist_input, 0, 1)
+            
+            layout.addWidget(QLabel("Release UPC (Optional):"), 1, 0)
+            release_input = QLineEdit()
+            layout.addWidget(release_input, 1, 1)
+            
+            layout.addWidget(QLabel("Amount:"), 2, 0)
+            amount_input = QLineEdit()
+            amount_input.setPlaceholderText("e.g., 1000")
+            layout.addWidget(amount_input, 2, 1)
+            
+            layout.addWidget(QLabel("Date Paid:"), 3, 0)
+            date_input = QDateEdit()
+            date_input.setCalendarPopup(True)
+            date_input.setDate(QDate.currentDate())
+            layout.addWidget(date_input, 3, 1)
+            
+            # Buttons
+            buttons = QHBoxLayout()
+            save_button = QPushButton("Save")
+            cancel_button = QPushButton("Cancel")
+            buttons.addWidget(save_button)
+            buttons.addWidget(cancel_button)
+            layout.addLayout(buttons, 4, 0, 1, 2)
+            
+            save_button.clicked.connect(dialog.accept)
+            cancel_button.clicked.connect(dialog.reject)
+            
+            if dialog.exec() == QDialog.DialogCode.Accepted:
+                artist = artist_input.text().strip()
+                if not artist:
+                    QMessageBox.warning(self, "Warning", "Please enter the artist name.")
+                    return
+                amount = float(amount_input.text().replace(',', '.'))
+                self.advances_ledger.add_advance(
+                    artist,
+                    amount,
+                    date_input.date().toString('yyyy-MM-dd'),
+                    release=release_input.text()
+                )
+                QMessageBox.information(self, "Success", f"Advance of {amount:.2f} recorded for {artist}.")
         except ValueError:
-            QMessageBox.warning(self, "Warning", "Invalid advances amount. Using 0")
-            return 0
+            QMessageBox.warning(self, "Warning", "Invalid advance amount.")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not add advance: {str(e)}")
+
+    def record_recoupment(self):
+        """Record the recoupment of the last analysis as settled in the ledger"""
+        if getattr(self, 'current_recoupment_input', None) is None:
+            QMessageBox.warning(self, "Warning", "Run an analysis with an artist column first.")
+            return
+        
+        # Settling periods from partial revenue would close them for good
+        if self.current_recoupment_partial:
+            QMessageBox.warning(self, "Warning",
+                "The last analysis did not include all statement revenue:\n" +
+                "\n".join(f"- {reason}" for reason in self.current_recoupment_partial) +
+                "\n\nClear these filters and analyze again before recording recoupment.")
+            return
+        
+        try:
+            reply = QMessageBox.question(self, "Record Recoupment",
+                "Record the periods of the last analysis as settled in the advances ledger?\n"
+                "Later analyses will start from these balances.",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            
+            if reply == QMessageBox.StandardButton.Yes:
+                grain, fiscal_start = self.current_recoupment_periods
+                recoupment = self.advances_ledger.recoup(
+                    self.current_recoupment_input, grain, fiscal_start, commit=True
+                )
+                QMessageBox.information(self, "Success",
+                    f"Recorded {len(recoupment)} account periods in the advances ledger.")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not record recoupment: {str(e)}")
 
     def validate_dates(self):
         """Validate that From date is not after To date"""
@@ -1919,49 +2095,266 @@ class CSVMergeApp(QMainWindow):
         try:
             if self.csv_files and self.track_column.currentText() and self.artist_column.currentText():
                 # Read all unique tracks and artists from the files
-                all_tracks = set()
-                all_artists = set()
-                
-                for file in self.csv_files:
-                    try:
-                        df = self.read_csv_file(file)
-                        if df is not None:
-                            track_col = self.track_column.currentText()
-                            artist_col = self.artist_column.currentText()
-                            
-                            if track_col in df.columns:
-                                tracks = df[track_col].fillna('').astype(str).str.strip()
-                                all_tracks.update(track for track in tracks.unique() if track)
-                            
-                            if artist_col in df.columns:
-                                artists = df[artist_col].fillna('').astype(str).str.strip()
-                                all_artists.update(artist for artist in artists.unique() if artist)
-                    except Exception as e:
-                        print(f"Error reading data from {os.path.basename(file)}: {str(e)}")
-                        continue
-
-                # Update track filter
-                self.track_filter.clear()
-                self.track_filter.addItem("All Tracks")
-                for track in sorted(all_tracks, key=str.lower):
-                    self.track_filter.addItem(track)
+                track_col = self.track_column.currentText()
+                artist_col = self.artist_column.currentText()
+                distinct = self.collect_distinct_values([track_col, artist_col])
 
-                # Update artist filter
-                self.artist_filter.clear()
-                self.artist_filter.addItem("All Artists")
-                for artist in sorted(all_artists, key=str.lower):
-                    self.artist_filter.addItem(artist)
+                # Update track and artist filters
+                self.track_filter.set_values(distinct[track_col])
+                self.artist_filter.set_values(distinct[artist_col])
 
         except Exception as e:
             QMessageBox.warning(self, "Warning", f"Error updating filters: {str(e)}")
 
     def get_selected_artists(self):
         """Get list of selected artists"""
-        return [item.text() for item in self.artist_filter.selectedItems()]
+        return self.artist_filter.selected_values()
+
+    def load_statements(self, track_col, artist_col, upc_col, revenue_col, date_col, target_currency):
+        """Read, clean and combine the added statements.
+
+        Returns the combined rows and a duplicate summary, or None to stop.
+        """
+        # Make sure every statement currency can be converted
+        for file in self.csv_files:
+            source_currency = self.get_statement_currency(
+                read_statement_header(file, self.get_file_format(file))
+            )
+            if source_currency and not self.fx_rates.has_rates(source_currency, target_currency):
+                QMessageBox.warning(self, "Warning",
+                    f"No exchange rates found to convert {source_currency} to {target_currency}.\n"
+                    f"Add a {source_currency}_{target_currency}.csv file (date,rate) to {self.fx_dir}.")
+                return None
+
+        # Read and combine all CSV files
+        print("\nProcessing CSV files...")
+        all_data = []
+        duplicate_report = []
+        archive_queue = []
+        for file in self.csv_files:
+            try:
+                print(f"\nReading file: {file}")
+                with MemoryProfile(statement_name(file)):
+                    df = self.load_statement(file, track_col, artist_col, upc_col, revenue_col,
+                                             date_col, target_currency, archive_queue)
+                if df is not None:
+                    duplicates = df['Duplicate']
+                    if duplicates.any():
+                        duplicate_report.append((file, duplicates.sum(), df.loc[duplicates, revenue_col].sum()))
+                    all_data.append(df)
+            except Exception as e:
+                print(f"Error processing file {file}:")
+                print(str(e))
+                traceback.print_exc()
+                continue
+
+        if not all_data:
+            QMessageBox.warning(self, "Warning", "No valid data found in the CSV files.")
+            return None
+            
+        self.dedup_index.save()
+        self.track_identity.save()
+        self.fingerprints.save()
+            
+        print("\nCombining all data...")
+        # Combine all files
+        combined_df = pd.concat(all_data, ignore_index=True)
+        print(f"Combined data shape: {combined_df.shape}")
+
+        # Report rows already imported from other statements
+        duplicate_count = sum(count for _, count, _ in duplicate_report)
+        duplicate_status = 'none found'
+        exclude_duplicates = True
+        if duplicate_report:
+            duplicate_status = f"{duplicate_count} rows kept"
+            lines = [
+                f"- {statement_name(file)}: {count} rows, {total:.2f} {target_currency}"
+                for file, count, total in duplicate_report
+            ]
+            reply = QMessageBox.question(self, "Duplicate Rows",
+                "These statements contain rows already imported from other statements:\n\n" +
+                "\n".join(lines) +
+                "\n\nExclude the duplicate rows from the analysis?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            exclude_duplicates = reply == QMessageBox.StandardButton.Yes
+            if exclude_duplicates:
+                duplicate_status = f"{duplicate_count} rows excluded"
+                combined_df = combined_df[~combined_df['Duplicate']]
+                print(f"Excluded duplicates. Data shape: {combined_df.shape}")
+
+        # Archive each statement's rows as the analysis keeps them
+        for file, df, statement_revenue, currency, source in archive_queue:
+            rows = df[~df['Duplicate']] if exclude_duplicates else df
+            self.archive_statement(file, rows, statement_revenue, track_col, artist_col, upc_col,
+                                   date_col, currency, source, exclude_duplicates)
+
+        if combined_df.empty:
+            QMessageBox.warning(self, "Warning", "No data left after excluding duplicate rows.")
+            return None
+        return combined_df, duplicate_status
+
+    def load_statement(self, file, track_col, artist_col, upc_col, revenue_col, date_col, target_currency,
+                       archive_queue):
+        """Read one statement down to its cleaned, valid mapped columns.
+
+        Rows already imported from other statements are flagged in the
+        Duplicate column. What the archive needs is added to archive_queue,
+        to be stored once duplicates are kept or excluded. Returns None if no
+        row is valid.
+        """
+        df = self.read_csv_file(file)
+        if df is None:
+            return None
+        print(f"File loaded successfully. Shape: {df.shape}")
+        statement_columns = df.columns.tolist()
+        
+        # Hash the raw row keys before any value is converted
+        hashes = row_hashes(df, self.get_dedup_columns(statement_columns))
+        
+        # Keep only the mapped columns, cleaning each distinct value once
+        print("Cleaning track column...")
+        data = {track_col: clean_text(df[track_col])}
+        
+        print("Converting revenue values...")
+        data[revenue_col] = clean_revenue(df[revenue_col])
+        
+        if artist_col:
+            print("Processing artist column...")
+            data[artist_col] = clean_text(df[artist_col])
+        
+        if upc_col and upc_col in df.columns:
+            data[upc_col] = clean_text(df[upc_col])
+        
+        print("Parsing dates...")
+        data[date_col] = parse_dates(df[date_col])
+        df = pd.DataFrame(data)
+        
+        source_currency = self.get_statement_currency(statement_columns)
+        statement_revenue = df[revenue_col]
+        if source_currency and source_currency != target_currency:
+            print(f"Converting revenue from {source_currency} to {target_currency}...")
+            df[revenue_col] = self.fx_rates.convert(
+                df[revenue_col], df[date_col], source_currency, target_currency
+            )
+        
+        # Remove invalid rows
+        print("Filtering valid rows...")
+        valid_mask = (
+            (df[track_col].str.len() > 0) & 
+            (df[revenue_col] != 0) &
+            (df[date_col].notna())
+        )
+        df = df[valid_mask]
+        
+        if df.empty:
+            print("No valid data found in file after filtering")
+            return None
+        
+        # Check the rows against every statement seen before
+        duplicates = self.dedup_index.check(hashes[df.index], self.fingerprints.fingerprint(file))
+        print(f"Adding {len(df)} valid rows ({duplicates.sum()} duplicates)")
+        df['Source File'] = statement_name(file)
+        df['Duplicate'] = duplicates
+        df['Track ID'] = self.resolve_track_ids(df, track_col, artist_col, upc_col)
+        
+        # The archive keeps the statement's own rows in its own currency
+        source = self.get_statement_template(statement_columns, 'source') or statement_name(file)
+        archive_queue.append((file, df, statement_revenue, source_currency, source))
+        return df
+
+    def archive_statement(self, file, df, statement_revenue, track_col, artist_col, upc_col, date_col, currency, source,
+                          exclude_duplicates):
+        """Store a statement's cleaned rows in the line item archive, once per column mapping and duplicate choice"""
+        try:
+            digest = self.fingerprints.fingerprint(file)
+            mapping = json.dumps([track_col, artist_col or '', upc_col or '', date_col, str(statement_revenue.name),
+                                  currency or '', source, exclude_duplicates])
+            if self.line_item_store.has_statement(digest, mapping):
+                return
+            items = pd.DataFrame({
+                'Date': df[date_col],
+                'Track': df[track_col],
+                'Artist': df[artist_col] if artist_col else '',
+                'UPC': df[upc_col] if upc_col and upc_col in df.columns else '',
+                'Revenue': statement_revenue.loc[df.index]
+            })
+            self.line_item_store.add_statement(
+                digest, statement_name(file), items, source, currency or '', mapping
+            )
+        except Exception as e:
+            print(f"Could not archive {file}: {str(e)}")
+            traceback.print_exc()
+
+    def load_archive(self, target_currency):
+        """Query the archive rollups for the selected date range, tracks and artists.
+
+        Whole-month ranges that need no conversion are answered from the
+        monthly rollups, anything else from the daily ones so exchange rates
+        still apply per day. Returns the matching rows converted to the target
+        currency and a duplicate summary, or None to stop.
+        """
+        start_date = pd.to_datetime(self.date_from.date().toPyDate())
+        end_date = pd.to_datetime(self.date_to.date().toPyDate())
+        selected_tracks = [track for track in self.get_selected_tracks() if track != "All Tracks"]
+        selected_artists = [artist for artist in self.get_selected_artists() if artist != "All Artists"]
+
+        needs_conversion = any(
+            currency and currency != target_currency for currency in self.line_item_store.currencies()
+        )
+        grain = 'month' if month_aligned(start_date, end_date) and not needs_conversion else 'day'
+
+        print(f"\nQuerying {grain} rollups of the line item archive...")
+        items = self.line_item_store.query_rollup(grain, start_date, end_date, selected_tracks, selected_artists)
+        print(f"Rollup rows: {len(items)} covering {items['Items'].sum()} line items")
+        if items.empty:
+            QMessageBox.warning(self, "Warning", "No archived line items match the selected filters.")
+            return None
+
+        # Convert each statement currency in one pass
+        for currency in items['Currency'].unique():
+            if not currency or currency == target_currency:
+                continue
+            if not self.fx_rates.has_rates(currency, target_currency):
+                QMessageBox.warning(self, "Warning",
+                    f"No exchange rates found to convert {currency} to {target_currency}.\n"
+                    f"Add a {currency}_{target_currency}.csv file (date,rate) to {self.fx_dir}.")
+                return None
+            rows = items['Currency'] == currency
+            items.loc[rows, 'Revenue'] = self.fx_rates.convert(
+                items.loc[rows, 'Revenue'], items.loc[rows, 'Date'], currency, target_currency
+            )
+
+        items['Source File'] = items['Source']
+        items['Track ID'] = self.resolve_track_ids(items, 'Track', 'Artist', 'UPC')
+        self.track_identity.save()
+        return items, 'excluded when archived'
+
+    def resolve_track_ids(self, df, track_col, artist_col, upc_col):
+        """Map each row to its canonical track id by ISRC/UPC and normalized title"""
+        return self.track_identity.resolve(
+            df[track_col],
+            df[artist_col] if artist_col and artist_col in df.columns else None,
+            df[upc_col] if upc_col and upc_col in df.columns else None
+        )
+
+    def set_archive_mode(self, enabled):
+        """Switch the track and artist filters between the added files and the archive"""
+        try:
+            if enabled:
+                self.track_filter.set_values(self.line_item_store.distinct('track'))
+                self.artist_filter.set_values(self.line_item_store.distinct('artist'))
+                print(f"Archive holds {self.line_item_store.statement_count()} statements")
+            else:
+                self.track_filter.clear()
+                self.artist_filter.clear()
+                self.update_filters()
+        except Exception as e:
+            QMessageBox.warning(self, "Warning", f"Could not read the line item archive: {str(e)}")
 
     def analyze_revenue(self):
         print("\n=== Starting revenue analysis ===")
-        if not self.csv_files:
+        archive_mode = self.archive_checkbox.isChecked()
+        if not self.csv_files and not archive_mode:
             QMessageBox.warning(self, "Warning", "Please add at least one CSV file to analyze.")
             return
 
@@ -1970,11 +2363,14 @@ class CSVMergeApp(QMainWindow):
             return
 
         try:
-            # Get selected column names
-            track_col = self.track_column.currentText()
-            artist_col = self.artist_column.currentText()
-            revenue_col = self.revenue_column.currentText()
-            date_col = self.date_column.currentText()
+            # Get selected column names, archive line items have fixed ones
+            if archive_mode:
+                track_col, artist_col, revenue_col, date_col = 'Track', 'Artist', 'Revenue', 'Date'
+            else:
+                track_col = self.track_column.currentText()
+                artist_col = self.artist_column.currentText()
+                revenue_col = self.revenue_column.currentText()
+                date_col = self.date_column.currentText()
 
             print(f"\nSelected columns:")
             print(f"- Track: {track_col}")
@@ -1991,81 +2387,50 @@ class CSVMergeApp(QMainWindow):
                 QMessageBox.warning(self, "Warning", "Revenue column cannot be the same as Artist column.")
                 return
 
-            # Read and combine all CSV files
-            print("\nProcessing CSV files...")
-            all_data = []
-            for file in self.csv_files:
-                try:
-                    print(f"\nReading file: {file}")
-                    df = self.read_csv_file(file)
-                    if df is not None:
-                        print(f"File loaded successfully. Shape: {df.shape}")
-                        
-                        # Clean and convert data
-                        print("Cleaning track column...")
-                        df[track_col] = df[track_col].fillna('').astype(str).str.strip()
-                        
-                        print("Converting revenue values...")
-                        df[revenue_col] = df[revenue_col].apply(self.clean_revenue_value)
-                        
-                        if artist_col:
-                            print("Processing artist column...")
-                            df[artist_col] = df[artist_col].fillna('').astype(str).str.strip()
-                        
-                        print("Parsing dates...")
-                        df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-                        
-                        # Remove invalid rows
-                        print("Filtering valid rows...")
-                        valid_mask = (
-                            (df[track_col].str.len() > 0) & 
-                            (df[revenue_col] != 0) &
-                            (df[date_col].notna())
-                        )
-                        df = df[valid_mask]
-                        
-                        if not df.empty:
-                            print(f"Adding {len(df)} valid rows")
-                            df['Source File'] = os.path.basename(file)
-                            all_data.append(df)
-                        else:
-                            print("No valid data found in file after filtering")
-                except Exception as e:
-                    print(f"Error processing file {file}:")
-                    print(str(e))
-                    traceback.print_exc()
-                    continue
+            upc_col = 'UPC' if archive_mode else self.upc_column.currentText()
+            target_currency = self.currency_combo.currentText()
 
-            if not all_data:
-                QMessageBox.warning(self, "Warning", "No valid data found in the CSV files.")
+            if archive_mode:
+                loaded = self.load_archive(target_currency)
+            else:
+                loaded = self.load_statements(track_col, artist_col, upc_col, revenue_col, date_col, target_currency)
+            if loaded is None:
                 return
-                
-            print("\nCombining all data...")
-            # Combine all files
-            combined_df = pd.concat(all_data, ignore_index=True)
-            print(f"Combined data shape: {combined_df.shape}")
+            combined_df, duplicate_status = loaded
 
             # Apply filters
             print("\nApplying filters...")
             filters = []
+            # Reasons the analysis does not hold all revenue of its periods
+            partial = []
             
             selected_tracks = self.get_selected_tracks()
             if selected_tracks and "All Tracks" not in selected_tracks:
                 print(f"Filtering for tracks: {selected_tracks}")
                 filters.append(combined_df[track_col].isin(selected_tracks))
+                partial.append("tracks are filtered")
 
             selected_artists = self.get_selected_artists()
             if selected_artists and "All Artists" not in selected_artists and artist_col:
                 print(f"Filtering for artists: {selected_artists}")
                 filters.append(combined_df[artist_col].isin(selected_artists))
+                partial.append("artists are filtered")
 
             # Apply date range filter
             start_date = pd.to_datetime(self.date_from.date().toPyDate())
             end_date = pd.to_datetime(self.date_to.date().toPyDate())
             print(f"Date range: {start_date} to {end_date}")
             
-            filters.append(combined_df[date_col] >= start_date)
-            filters.append(combined_df[date_col] <= end_date)
+            in_range = (combined_df[date_col] >= start_date) & (combined_df[date_col] <= end_date)
+            filters.append(in_range)
+            # Archive queries are already limited to the range, so compare it
+            # with the dates of the whole archive instead of the loaded rows
+            if archive_mode:
+                first_date, last_date = self.line_item_store.date_range()
+            else:
+                first_date, last_date = combined_df[date_col].min(), combined_df[date_col].max()
+            if leaves_out_dates(first_date, last_date, start_date, end_date):
+                partial.append("the date range leaves out some statement rows")
 
             # Apply all filters
             print("Finalizing data filtering...")
@@ -2084,55 +2449,90 @@ class CSVMergeApp(QMainWindow):
                 return
 
             print("\nPreparing results...")
-            # Add period column based on grouping selection
-            period_format = '%Y-%m' if self.period_group.currentText() == 'Month' else '%Y-Q%q' if self.period_group.currentText() == 'Quarter' else '%Y'
-            filtered_df['Period'] = filtered_df[date_col].dt.strftime(period_format)
+            # Add integer period codes based on grouping selection
+            grain = self.period_group.currentText()
+            fiscal_start = self.get_fiscal_start()
+            # (kept beside the filtered rows rather than assigned into them)
+            period_code = pd.Series(
+                period_codes(month_codes(filtered_df[date_col]), grain, fiscal_start),
+                index=filtered_df.index, name='Period Code'
+            )
 
             # Group by period and track, calculate revenue
             print("Calculating revenue by period...")
-            revenue_by_period = filtered_df.groupby(['Period', track_col])[revenue_col].sum().reset_index()
-            revenue_by_period = revenue_by_period.sort_values(['Period', track_col])
+            # Rows of one track from any distributor share its integer id
+            revenue_by_period = filtered_df[revenue_col].groupby([period_code, filtered_df['Track ID']]).sum().reset_index()
+            revenue_by_period['Track'] = self.track_identity.titles(revenue_by_period['Track ID'])
+            revenue_by_period = revenue_by_period.sort_values(['Period Code', 'Track'])
 
             # Calculate period totals
-            period_totals = filtered_df.groupby('Period')[revenue_col].sum().reset_index()
+            period_totals = filtered_df[revenue_col].groupby(period_code).sum().reset_index()
 
             # Calculate grand total
             print("Calculating totals...")
             grand_total = filtered_df[revenue_col].sum()
 
-            # Calculate net totals after advances
-            net_total = max(0, grand_total - self.get_advances())
-
             # Format results for display
             print("\nFormatting results...")
-            target_currency = self.currency_combo.currentText()
-            formatted_results = []
             
             print("Processing results rows...")
-            for _, row in revenue_by_period.iterrows():
-                try:
-                    result = {
-                        'Period': str(row['Period']),
-                        'Track': str(row[track_col]),
-                        'Total Revenue': f"{float(row[revenue_col]):.2f} {target_currency}",
-                        'Artist Revenue': f"{float(row[revenue_col]):.2f} {target_currency}"  # Same as Total Revenue
-                    }
-                    
-                    # Add artist if available
-                    if artist_col:
-                        artist_data = filtered_df[
-                            filtered_df[track_col] == row[track_col]
-                        ][artist_col].iloc[0] if not filtered_df.empty else ''
-                        result['Artist'] = str(artist_data)
-                    
-                    formatted_results.append(result)
-                except Exception as e:
-                    print(f"Error formatting row:")
-                    print(f"Row data: {row}")
-                    print(f"Error: {str(e)}")
-                    continue
+            codes = revenue_by_period['Period Code'].to_numpy()
+            results_df = pd.DataFrame({
+                'Period': period_labels(codes, grain, fiscal_start),
+                'Track': revenue_by_period['Track'].astype(str).to_numpy(),
+                'Period Start': period_start_months(codes, grain, fiscal_start),
+                'Period Length': GRAIN_MONTHS[grain]
+            })
+            
+            # Add artist and UPC of each track's first row if available
+            if artist_col:
+                artist_by_track = filtered_df.groupby('Track ID')[artist_col].first()
+                results_df['Artist'] = revenue_by_period['Track ID'].map(artist_by_track).astype(str).to_numpy()
+            if upc_col and upc_col in filtered_df.columns:
+                upc_by_track = filtered_df.groupby('Track ID')[upc_col].first()
+                results_df['UPC'] = revenue_by_period['Track ID'].map(upc_by_track).fillna('').astype(str).to_numpy()
+            
+            # Apply royalty splits to all rows at once
+            total_revenue = revenue_by_period[revenue_col].astype(float).to_numpy()
+            percentages = self.royalty_splits.percentages(results_df, self.get_artist_percentage())
+            artist_revenue = total_revenue * percentages / 100
+            artist_total = artist_revenue.sum()
+            
+            # Recoup advances from artist revenue for all artists at once
+            self.current_recoupment_input = None
+            self.current_recoupment_periods = (grain, fiscal_start)
+            self.current_recoupment_partial = partial
+            recoupment_lines = []
+            recouped_total = 0.0
+            outstanding_total = 0.0
+            if artist_col:
+                self.current_recoupment_input = pd.DataFrame({
+                    'Artist': results_df['Artist'],
+                    'UPC': results_df['UPC'] if 'UPC' in results_df.columns else '',
+                    'Period': results_df['Period'],
+                    'Period Start': results_df['Period Start'],
+                    'Period Length': results_df['Period Length'],
+                    'Amount': artist_revenue
+                })
+                recoupment = self.advances_ledger.recoup(self.current_recoupment_input, grain, fiscal_start)
+                recouped_total = float((recoupment['Revenue'] - recoupment['Payable']).sum())
+                outstanding_total = float(recoupment.groupby(['Artist', 'Release'])['Balance'].last().sum()) if len(recoupment) else 0.0
+                for row in recoupment.itertuples(index=False):
+                    release = f" [{row.Release}]" if row.Release else ''
+                    recoupment_lines.append(
+                        f"- {row.Artist}{release} {row.Period}: payable {row.Payable:.2f}, "
+                        f"remaining advance {row.Balance:.2f} {target_currency}"
+                    )
+            
+            # Calculate net totals after the advances recouped in the ledger
+            net_total = max(0, grand_total - recouped_total)
+            
+            # Keep results columnar: dictionary-encoded text and float amounts
+            results_df['Total Revenue'] = total_revenue
+            results_df['Artist Revenue'] = artist_revenue
+            results = ResultSet.from_columns(dict(results_df.items()), currency=target_currency)
 
-            print(f"\nFormatted {len(formatted_results)} result rows")
+            print(f"\nFormatted {len(results)} result rows")
 
             # Create summary text
             print("\nCreating summary...")
@@ -2140,22 +2540,28 @@ class CSVMergeApp(QMainWindow):
 Revenue Analysis Summary:
 ------------------------
 Period: {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}
-Grouped by: {self.period_group.currentText()}
+Grouped by: {grain}{f" (fiscal year from {MONTH_NAMES[fiscal_start - 1]})" if fiscal_start > 1 else ""}
 
 Total Revenue: {grand_total:.2f} {target_currency}
-Advances to Recoup: {self.get_advances():.2f} {target_currency}
+Artist Revenue: {artist_total:.2f} {target_currency}
+Royalty Splits: {len(self.royalty_splits)} entries, default {self.get_artist_percentage():g}%
+Advances Recouped: {recouped_total:.2f} {target_currency}
+Advances Outstanding: {outstanding_total:.2f} {target_currency}
 Net Revenue: {net_total:.2f} {target_currency}
 
 Filters applied:
 - Tracks: {', '.join(selected_tracks) if selected_tracks else 'All'}
 - Artists: {', '.join(selected_artists) if selected_artists else 'All'}
 
-Number of transactions: {len(filtered_df)}
+Number of transactions: {filtered_df['Items'].sum() if 'Items' in filtered_df.columns else len(filtered_df)}
+Duplicate rows: {duplicate_status}
             """]
+            if recoupment_lines:
+                summary_text.append("Advance Recoupment:\n" + "\n".join(recoupment_lines))
 
             # Store current results for later use
             print("\nStoring results...")
-            self.current_results = formatted_results
+            self.current_results = results
             self.current_summary = summary_text
             
             # Update history list
@@ -2165,9 +2571,9 @@ Number of transactions: {len(filtered_df)}
             try:
                 # Show results window
                 print("\nOpening results window...")
-                print(f"Number of results: {len(formatted_results)}")
-                print(f"First result sample: {formatted_results[0] if formatted_results else 'No results'}")
-                self.results_window = ResultsWindow(formatted_results, summary_text, self)
+                print(f"Number of results: {len(results)}")
+                print(f"First result sample: {results[0] if len(results) else 'No results'}")
+                self.results_window = ResultsWindow(results, summary_text, self)
                 self.results_window.show()
                 print("Results window displayed successfully")
             except Exception as e:
@@ -2201,61 +2607,143 @@ Number of transactions: {len(filtered_df)}
                 QMessageBox.warning(self, "Warning", "Please select the track column first.")
                 return
 
+            # Stream matching rows into a temporary file next to the exports
+            date_col = self.date_column.currentText()
+            temp_path = self.get_export_path(f".merge_{os.getpid()}.tmp")
+            try:
+                row_count, columns = stream_merge_tracks(
+                    self.csv_files,
+                    self.get_file_format,
+                    track_col,
+                    selected_tracks,
+                    temp_path,
+                    date_col=date_col
+                )
+
+                if row_count == 0:
+                    QMessageBox.warning(self, "Warning", "No data found for selected tracks.")
+                    return
+
+                # Save merged results
+                default_filename = f"merged_tracks_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+                save_path, _ = QFileDialog.getSaveFileName(
+                    self,
+                    "Save Merged Results",
+                    self.get_export_path(default_filename),
+                    "CSV Files (*.csv)"
+                )
+                
+                if save_path:
+                    shutil.move(temp_path, save_path)
+                    
+                    # Show summary
+                    summary = f"""
+Merge Summary:
+-------------
+Number of files merged: {len(self.csv_files)}
+Tracks included: {', '.join(selected_tracks)}
+Total rows: {row_count}
+Columns: {', '.join(columns)}
+                    """
+                    QMessageBox.information(self, "Merge Complete", summary)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"An error occurred during merge: {str(e)}")
+
+    def consolidate_files(self):
+        """Consolidate all imported CSV files on key columns chosen in a dialog"""
+        if not self.csv_files:
+            QMessageBox.warning(self, "Warning", "Please add at least one CSV file to consolidate.")
+            return
+
+        try:
             # Read and combine all CSV files
             all_data = []
             for file in self.csv_files:
-                df = pd.read_csv(file, low_memory=False)
-                # Convert track column to string
-                df[track_col] = df[track_col].fillna('').astype(str)
-                # Add source file column
-                df['Source File'] = os.path.basename(file)
-                all_data.append(df)
-            
-            # Combine all files
+                df = self.read_csv_file(file)
+                if df is not None:
+                    df['Source File'] = statement_name(file)
+                    all_data.append(df)
+
+            if not all_data:
+                QMessageBox.warning(self, "Warning", "No valid data found in the CSV files.")
+                return
+
             combined_df = pd.concat(all_data, ignore_index=True)
 
-            # Filter for selected tracks
-            filtered_df = combined_df[combined_df[track_col].isin(selected_tracks)]
+            dialog = ConsolidationDialog(combined_df.columns.tolist(), self)
+            if dialog.exec() != QDialog.DialogCode.Accepted:
+                return
 
-            if filtered_df.empty:
-                QMessageBox.warning(self, "Warning", "No data found for selected tracks.")
+            spec = dialog.get_aggregation_spec()
+            if not spec['keys']:
+                QMessageBox.warning(self, "Warning", "Please select at least one key column.")
                 return
 
-            # Save merged results
-            default_filename = f"merged_tracks_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            print(f"Consolidating with spec: {spec}")
+            consolidated_df = run_aggregation(combined_df, spec)
+
+            # Save consolidated results
+            default_filename = f"consolidated_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
             save_path, _ = QFileDialog.getSaveFileName(
                 self,
-                "Save Merged Results",
+                "Save Consolidated Results",
                 self.get_export_path(default_filename),
                 "CSV Files (*.csv)"
             )
             
             if save_path:
-                # Sort by track and date if date column is selected
-                sort_columns = [track_col]
-                if self.date_column.currentText():
-                    date_col = self.date_column.currentText()
-                    if date_col in filtered_df.columns:
-                        filtered_df[date_col] = pd.to_datetime(filtered_df[date_col])
-                        sort_columns.insert(0, date_col)
-                
-                # Sort and save
-                filtered_df = filtered_df.sort_values(sort_columns)
-                filtered_df.to_csv(save_path, index=False)
-                
-                # Show summary
-                summary = f"""
-Merge Summary:
--------------
-Number of files merged: {len(self.csv_files)}
-Tracks included: {', '.join(selected_tracks)}
-Total rows: {len(filtered_df)}
-Columns: {', '.join(filtered_df.columns)}
-                """
-                QMessageBox.information(self, "Merge Complete", summary)
+                consolidated_df.to_csv(save_path, index=False)
+                QMessageBox.information(self, "Consolidation Complete",
+                    f"Consolidated {len(combined_df)} rows into {len(consolidated_df)} rows.\n"
+                    f"Saved to {save_path}")
 
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"An error occurred during merge: {str(e)}")
+            print(f"Error consolidating files: {str(e)}")
+            traceback.print_exc()
+            QMessageBox.critical(self, "Error", f"An error occurred during consolidation: {str(e)}")
+
+    def reconcile_titles(self):
+        """Propose merges of track titles differing by versions, features, accents or casing"""
+        try:
+            track_ids, titles, artists = self.track_identity.active_tracks()
+            if len(track_ids) < 2:
+                QMessageBox.information(self, "Reconcile Titles",
+                    "Analyze some statements first so their tracks are known.")
+                return
+
+            print(f"Reconciling {len(track_ids)} track titles...")
+            start = time.perf_counter()
+            proposals = []
+            for i, j, score in propose_merges(titles, artists):
+                # Merge into the shorter, undecorated title, else the one seen first
+                source, target = (i, j) if (len(titles[j]), track_ids[j]) < (len(titles[i]), track_ids[i]) else (j, i)
+                proposals.append((track_ids[source], titles[source], track_ids[target], titles[target],
+                                  artists[target], score))
+            print(f"Found {len(proposals)} candidate merges in {time.perf_counter() - start:.2f}s")
+
+            if not proposals:
+                QMessageBox.information(self, "Reconcile Titles", "No similar track titles found.")
+                return
+
+            dialog = ReconciliationDialog(proposals, self)
+            if dialog.exec() != QDialog.DialogCode.Accepted:
+                return
+
+            merges = dialog.get_merges()
+            for source_id, target_id in merges:
+                self.track_identity.merge(source_id, target_id)
+            self.track_identity.save()
+            QMessageBox.information(self, "Reconcile Titles",
+                f"Merged {len(merges)} track titles. They will be grouped together in the next analysis.")
+
+        except Exception as e:
+            print(f"Error reconciling titles: {str(e)}")
+            traceback.print_exc()
+            QMessageBox.critical(self, "Error", f"Could not reconcile titles: {str(e)}")
 
     def refresh_interface(self):
         """Refresh the interface while keeping loaded files"""
@@ -2284,10 +2772,7 @@ Columns: {', '.join(filtered_df.columns)}
             self.currency_combo.setCurrentIndex(0)
             
             # Reset artist percentage to default
-            self.artist_percentage.setText("50")
-            
-            # Reset advances to default
-            self.advances.setText("0")
+            self.artist_percentage.setText("100")
             
             # Clear file list widget
             self.file_list.clear()
@@ -2295,9 +2780,9 @@ Columns: {', '.join(filtered_df.columns)}
             # Re-add files and update columns
             self.csv_files = []
             for file in current_files:
-                if os.path.exists(file):  # Only re-add files that still exist
+                if statement_exists(file):  # Only re-add files that still exist
                     self.csv_files.append(file)
-                    self.file_list.addItem(os.path.basename(file))
+                    self.file_list.addItem(statement_name(file))
             
             # Update column selections if files exist
             if self.csv_files:
@@ -2322,7 +2807,6 @@ Columns: {', '.join(filtered_df.columns)}
                 
                 # Clear track filter
                 self.track_filter.clear()
-                self.track_filter.addItem("All Tracks")
                 
                 # Clear column selections but keep the current mapping template if any
                 current_mappings = {
@@ -2377,7 +2861,6 @@ Columns: {', '.join(filtered_df.columns)}
                 
                 # Clear track filter
                 self.track_filter.clear()
-                self.track_filter.addItem("All Tracks")
                 
                 # Reset date range to default
                 self.date_from.setDate(QDate.currentDate().addMonths(-1))
@@ -2390,10 +2873,7 @@ Columns: {', '.join(filtered_df.columns)}
                 self.currency_combo.setCurrentIndex(0)
                 
                 # Reset artist percentage to default
-                self.artist_percentage.setText("50")
-                
-                # Reset advances to default
-                self.advances.setText("0")
+                self.artist_percentage.setText("100")
                 
                 QMessageBox.information(self, "Clear Complete", "All data and settings have been cleared.")
         except Exception as e:
@@ -2407,24 +2887,56 @@ Columns: {', '.join(filtered_df.columns)}
             self.refresh_interface()
         super().keyPressEvent(event)
 
-    def load_templates(self):
-        """Load saved templates from JSON file"""
-        try:
-            if os.path.exists(self.templates_file):
-                with open(self.templates_file, 'r') as f:
-                    self.templates = json.load(f)
-            else:
-                self.templates = {}
-        except Exception as e:
-            self.templates = {}
-            QMessageBox.warning(self, "Warning", f"Could not load templates: {str(e)}")
+    def read_saved_data(self):
+        """Read templates and analysis history from disk (runs on a worker thread)"""
+        data = {'templates': {}, 'history': {}, 'errors': []}
+        for key, file_path, label in ((
+            'templates', self.templates_file, 'templates'), (
+            'history', self.results_file, 'analysis history')):
+            try:
+                if os.path.exists(file_path):
+                    with open(file_path, 'r') as f:
+                        data[key] = json.load(f)
+            except Exception as e:
+                data['errors'].append(f"Could not load {label}: {str(e)}")
+        return data
+
+    def load_saved_data(self):
+        """Load templates and analysis history without blocking the first paint"""
+        task = BackgroundTask(self.read_saved_data)
+        task.signals.finished.connect(self.apply_saved_data)
+        task.signals.failed.connect(lambda error: print(f"Could not load saved data: {error}"))
+        QThreadPool.globalInstance().start(task)
+
+    def apply_saved_data(self, data):
+        """Use the templates and history read in the background"""
+        if self.saved_data_loaded:
+            return
+        self.saved_data_loaded = True
+        for error in data['errors']:
+            QMessageBox.warning(self, "Warning", error)
+        # Keep templates and analyses created before the load finished
+        self.templates = {**data['templates'], **self.templates}
+        self.template_index.rebuild(self.templates)
+        self.analysis_history = {**data['history'], **self.analysis_history}
+        self.update_history_list()
+        print(f"Loaded {len(self.templates)} templates and {len(self.analysis_history)} saved analyses "
+              f"after {time.perf_counter() - STARTUP_TIME:.3f}s")
+        self.restore_watch_folder()
+
+    def ensure_saved_data(self):
+        """Read saved data now if the background load has not finished, so saving never drops it"""
+        if not self.saved_data_loaded:
+            self.apply_saved_data(self.read_saved_data())
 
     def save_templates(self):
         """Save templates to JSON file"""
         try:
+            self.ensure_saved_data()
             os.makedirs(os.path.dirname(self.templates_file), exist_ok=True)
             with open(self.templates_file, 'w') as f:
                 json.dump(self.templates, f, indent=4)
+            self.template_index.rebuild(self.templates)
         except Exception as e:
             QMessageBox.warning(self, "Warning", f"Could not save templates: {str(e)}")
 
@@ -2512,21 +3024,10 @@ Columns: {', '.join(filtered_df.columns)}
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Could not delete template: {str(e)}")
 
-    def load_analysis_history(self):
-        """Load saved analysis history from JSON file"""
-        try:
-            if os.path.exists(self.results_file):
-                with open(self.results_file, 'r') as f:
-                    self.analysis_history = json.load(f)
-            else:
-                self.analysis_history = {}
-        except Exception as e:
-            self.analysis_history = {}
-            QMessageBox.warning(self, "Warning", f"Could not load analysis history: {str(e)}")
-
     def save_analysis_history(self):
         """Save analysis history to JSON file"""
         try:
+            self.ensure_saved_data()
             os.makedirs(os.path.dirname(self.results_file), exist_ok=True)
             with open(self.results_file, 'w') as f:
                 json.dump(self.analysis_history, f, indent=4)
@@ -2564,7 +3065,7 @@ Columns: {', '.join(filtered_df.columns)}
                 self.analysis_history[name] = {
                     'date': datetime.now().isoformat(),
                     'template': current_template,
-                    'results': self.current_results,
+                    'results': self.current_results.to_records(),
                     'summary': self.current_summary
                 }
                 self.save_analysis_history()
@@ -2594,7 +3095,7 @@ Columns: {', '.join(filtered_df.columns)}
             analysis = self.analysis_history[name]
             
             # Load the results into the current view
-            self.current_results = analysis['results']
+            self.current_results = ResultSet.from_records(analysis['results'])
             self.current_summary = analysis['summary']
             
             # Update tables with the loaded data
@@ -2684,8 +3185,8 @@ Columns: {', '.join(filtered_df.columns)}
                     QMessageBox.warning(self, "Warning", "Please select at least one analysis to combine with.")
                     return
                 
-                # Collect all results
-                all_results = []
+                # Collect all result sets
+                result_sets = []
                 sources = set()
                 
                 # Add current results
@@ -2697,53 +3198,39 @@ Columns: {', '.join(filtered_df.columns)}
                         current_template = name
                         break
                 
-                for result in self.current_results:
-                    result_copy = result.copy()
-                    if add_source_cb.isChecked():
-                        source = self.templates.get(current_template, {}).get('source', current_template)
-                        result_copy['Source'] = source
-                        sources.add(source)
-                    all_results.append(result_copy)
+                current_results = self.current_results
+                if add_source_cb.isChecked():
+                    source = self.templates.get(current_template, {}).get('source', current_template)
+                    current_results = current_results.with_column('Source', source)
+                    sources.add(source)
+                result_sets.append(current_results)
                 
                 # Add selected analyses
                 for item in selected_items:
                     analysis = self.analysis_history[item.text()]
                     template_name = analysis['template']
                     
-                    for result in analysis['results']:
-                        result_copy = result.copy()
-                        if add_source_cb.isChecked():
-                            source = self.templates.get(template_name, {}).get('source', template_name)
-                            result_copy['Source'] = source
-                            sources.add(source)
-                        all_results.append(result_copy)
+                    previous_results = ResultSet.from_records(analysis['results'])
+                    if add_source_cb.isChecked():
+                        source = self.templates.get(template_name, {}).get('source', template_name)
+                        previous_results = previous_results.with_column('Source', source)
+                        sources.add(source)
+                    result_sets.append(previous_results)
+                
+                # Name every track by its canonical title so consolidation
+                # joins the same track across distributors
+                result_sets = [self.canonical_tracks(result_set) for result_set in result_sets]
+                self.track_identity.save()
+                
+                # Concatenate without copying rows, merging the dictionaries
+                all_results = ResultSet.concat(result_sets)
                 
                 # Consolidate results if requested
                 if consolidate_cb.isChecked():
-                    consolidated_results = {}
-                    for result in all_results:
-                        key = (result['Period'], result['Track'])
-                        if key not in consolidated_results:
-                            consolidated_results[key] = result.copy()
-                        else:
-                            # Add revenues
-                            total_rev = float(consolidated_results[key]['Total Revenue'].split()[0]) + float(result['Total Revenue'].split()[0])
-                            artist_rev = float(consolidated_results[key]['Artist Revenue'].split()[0]) + float(result['Artist Revenue'].split()[0])
-                            currency = result['Total Revenue'].split()[1]
-                            
-                            consolidated_results[key]['Total Revenue'] = f"{total_rev:.2f} {currency}"
-                            consolidated_results[key]['Artist Revenue'] = f"{artist_rev:.2f} {currency}"
-                            
-                            if 'Source' in result:
-                                if 'Source' in consolidated_results[key]:
-                                    consolidated_results[key]['Source'] += f", {result['Source']}"
-                                else:
-                                    consolidated_results[key]['Source'] = result['Source']
-                    
-                    all_results = list(consolidated_results.values())
+                    all_results = consolidate_results(all_results)
                 
                 # Sort results by period and track
-                all_results.sort(key=lambda x: (x['Period'], x['Track']))
+                all_results = all_results.sort(['Period', 'Track'])
                 
                 # Update current results
                 self.current_results = all_results
@@ -2771,6 +3258,14 @@ Columns: {', '.join(filtered_df.columns)}
             traceback.print_exc()
             QMessageBox.critical(self, "Error", f"Could not combine analyses: {str(e)}")
 
+    def canonical_tracks(self, results):
+        """Relabel a result set's tracks with their canonical titles"""
+        track_ids = self.resolve_track_ids(
+            pd.DataFrame({column: results.formatted(column) for column in ('Track', 'Artist', 'UPC') if results.has(column)}),
+            'Track', 'Artist', 'UPC'
+        )
+        return results.with_column('Track', self.track_identity.titles(track_ids))
+
     def display_results(self, results_data):
         """Display results in the tables"""
         try:
@@ -2859,6 +3354,24 @@ Columns: {', '.join(filtered_df.columns)}
                 source_layout.addWidget(source_input)
                 layout.addLayout(source_layout)
                 
+                # Add statement currency field
+                currency_layout = QHBoxLayout()
+                currency_layout.addWidget(QLabel("Statement Currency:"))
+                currency_input = QComboBox()
+                currency_input.addItem("")
+                currency_input.addItems(self.currencies)
+                currency_input.setCurrentText(template.get('currency', ''))
+                currency_layout.addWidget(currency_input)
+                layout.addLayout(currency_layout)
+                
+                # Add duplicate key columns field
+                dedup_layout = QHBoxLayout()
+                dedup_layout.addWidget(QLabel("Duplicate Key Columns:"))
+                dedup_input = QLineEdit(', '.join(template.get('dedup_columns', [])))
+                dedup_input.setPlaceholderText("All columns")
+                dedup_layout.addWidget(dedup_input)
+                layout.addLayout(dedup_layout)
+                
                 # Buttons
                 buttons = QHBoxLayout()
                 save_button = QPushButton("Save")
@@ -2885,6 +3398,10 @@ Columns: {', '.join(filtered_df.columns)}
                     
                     # Add source information
                     updated_template['source'] = source_input.text().strip()
+                    updated_template['currency'] = currency_input.currentText()
+                    updated_template['dedup_columns'] = [
+                        col.strip() for col in dedup_input.text().split(',') if col.strip()
+                    ]
                     
                     # If name changed, delete old template
                     if new_template_name != template_name:
@@ -2972,11 +3489,30 @@ class ChartTheme:
             )
         }
 
+class FirstPaintTimer(QObject):
+    """Report the time from process start to the first paint, then quit"""
+
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            self.app.removeEventFilter(self)
+            print(f"Startup benchmark: first paint after {time.perf_counter() - STARTUP_TIME:.3f}s "
+                  f"(pandas loaded: {is_loaded('pandas')})")
+            QTimer.singleShot(500, self.app.quit)
+        return False
+
+
 if __name__ == "__main__":
     print("Creating QApplication instance...")
     app = QApplication(sys.argv)
     print("Creating main window...")
     window = CSVMergeApp()
+    if '--startup-benchmark' in sys.argv:
+        first_paint_timer = FirstPaintTimer(app)
+        app.installEventFilter(first_paint_timer)
     print("Showing main window...")
     window.show()
     print("Entering main event loop...")
@@ -0,0 +1,94 @@
+import re
+
+from lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Months per period for each grouping choice
+GRAIN_MONTHS = {'Month': 1, 'Quarter': 3, 'Year': 12}
+
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+               'August', 'September', 'October', 'November', 'December']
+
+# Labels written by period_labels, e.g. 2024-03, 2024-Q1, 2024, FY2025-Q2, FY2025
+LABEL_PATTERN = re.compile(r'^(FY)?(\d{4})(?:-(\d{2})|-Q([1-4]))?$')
+
+# Code of unknown periods (missing dates or unparseable labels)
+MISSING = -1
+
+
+def month_codes(dates):
+    """Convert dates to integer month codes (year * 12 + month - 1), MISSING for NaT"""
+    dates = pd.to_datetime(pd.Series(dates), errors='coerce')
+    codes = dates.dt.year * 12 + dates.dt.month - 1
+    return codes.fillna(MISSING).astype(np.int64).to_numpy()
+
+
+def fiscal_shift(fiscal_start):
+    """Months to subtract so a fiscal year starting in fiscal_start begins at month 0"""
+    return fiscal_start - 1
+
+
+def period_codes(months, grain, fiscal_start=1):
+    """Bucket month codes into ordered integer period codes of a grain.
+
+    Fiscal years are named after the calendar year they end in.
+    """
+    months = np.asarray(months, dtype=np.int64)
+    size = GRAIN_MONTHS[grain]
+    if size == 1:
+        return months.copy()
+    shifted = months - fiscal_shift(fiscal_start) + (12 if fiscal_start > 1 else 0)
+    return np.where(months >= 0, shifted // size, MISSING)
+
+
+def period_start_months(codes, grain, fiscal_start=1):
+    """Return the calendar month code each period starts in"""
+    codes = np.asarray(codes, dtype=np.int64)
+    size = GRAIN_MONTHS[grain]
+    if size == 1:
+        return codes.copy()
+    starts = codes * size + fiscal_shift(fiscal_start) - (12 if fiscal_start > 1 else 0)
+    return np.where(codes >= 0, starts, MISSING)
+
+
+def format_period(code, grain, fiscal_start=1):
+    """Format one period code as its label"""
+    if code < 0:
+        return ''
+    prefix = 'FY' if fiscal_start > 1 and grain != 'Month' else ''
+    if grain == 'Month':
+        return f"{code // 12}-{code % 12 + 1:02d}"
+    if grain == 'Quarter':
+        return f"{prefix}{code // 4}-Q{code % 4 + 1}"
+    return f"{prefix}{code}"
+
+
+def period_labels(codes, grain, fiscal_start=1):
+    """Format period codes as labels, formatting each distinct code once"""
+    positions, uniques = pd.factorize(np.asarray(codes, dtype=np.int64))
+    labels = np.array([format_period(code, grain, fiscal_start) for code in uniques] + [''], dtype=object)
+    return labels[positions]
+
+
+def parse_period_labels(labels):
+    """Parse calendar period labels back into start month codes and lengths in months.
+
+    Unparseable and fiscal labels get MISSING starts.
+    """
+    positions, uniques = pd.factorize(pd.Series(labels, dtype=object).fillna('').astype(str))
+    starts = np.full(len(uniques) + 1, MISSING, dtype=np.int64)
+    lengths = np.zeros(len(uniques) + 1, dtype=np.int64)
+    for i, label in enumerate(uniques):
+        match = LABEL_PATTERN.match(label)
+        if not match or match.group(1):
+            continue
+        year = int(match.group(2))
+        if match.group(3):
+            starts[i], lengths[i] = year * 12 + int(match.group(3)) - 1, 1
+        elif match.group(4):
+            starts[i], lengths[i] = year * 12 + (int(match.group(4)) - 1) * 3, 3
+        else:
+            starts[i], lengths[i] = year * 12, 12
+    return starts[positions], lengths[positions]
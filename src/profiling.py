@@ -0,0 +1,37 @@
+import os
+import tracemalloc
+
+# Set this environment variable to print the peak memory of each loaded statement
+PROFILE_MEMORY_VARIABLE = 'CSV_MERGE_PROFILE_MEMORY'
+
+
+def memory_profiling_enabled():
+    return os.environ.get(PROFILE_MEMORY_VARIABLE, '') not in ('', '0')
+
+
+class MemoryProfile:
+    """Print the traced peak memory of a block when memory profiling is enabled.
+
+    Peaks are reported above the memory in use when the block started, so
+    each statement's figure covers its own parse, clean and filter steps.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.enabled = memory_profiling_enabled()
+        self.start = 0
+
+    def __enter__(self):
+        if self.enabled:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self.start = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self.enabled:
+            current, peak = tracemalloc.get_traced_memory()
+            print(f"Memory {self.label}: peak {(peak - self.start) / 1048576:.1f} MB, "
+                  f"kept {(current - self.start) / 1048576:.1f} MB")
+        return False
@@ -0,0 +1,63 @@
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
+                           QListWidget, QListWidgetItem, QPushButton)
+from PyQt6.QtCore import Qt
+
+# Proposals scoring at least this are checked by default
+AUTO_CHECK_SCORE = 0.9
+
+
+class ReconciliationDialog(QDialog):
+    """Review proposed track merges before they are applied"""
+
+    def __init__(self, proposals, parent=None):
+        # proposals: (source id, source title, target id, target title, artist, score)
+        super().__init__(parent)
+        self.proposals = proposals
+        self.setup_ui()
+
+    def setup_ui(self):
+        self.setWindowTitle("Reconcile Track Titles")
+        self.setMinimumSize(700, 450)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"{len(self.proposals)} proposed merges. Checked titles are merged into the title on the right:"))
+
+        self.proposal_list = QListWidget()
+        for source_id, source_title, target_id, target_title, artist, score in self.proposals:
+            artist_str = f" [{artist}]" if artist else ''
+            item = QListWidgetItem(f"{source_title}  →  {target_title}{artist_str}  ({score:.0%})")
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if score >= AUTO_CHECK_SCORE else Qt.CheckState.Unchecked)
+            item.setData(Qt.ItemDataRole.UserRole, (source_id, target_id))
+            self.proposal_list.addItem(item)
+        layout.addWidget(self.proposal_list)
+
+        # Buttons
+        button_layout = QHBoxLayout()
+        check_all_button = QPushButton("Check All")
+        check_all_button.clicked.connect(lambda: self.set_all(Qt.CheckState.Checked))
+        uncheck_all_button = QPushButton("Uncheck All")
+        uncheck_all_button.clicked.connect(lambda: self.set_all(Qt.CheckState.Unchecked))
+        ok_button = QPushButton("Merge Checked")
+        ok_button.clicked.connect(self.accept)
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(check_all_button)
+        button_layout.addWidget(uncheck_all_button)
+        button_layout.addStretch()
+        button_layout.addWidget(ok_button)
+        button_layout.addWidget(cancel_button)
+        layout.addLayout(button_layout)
+
+    def set_all(self, state):
+        for i in range(self.proposal_list.count()):
+            self.proposal_list.item(i).setCheckState(state)
+
+    def get_merges(self):
+        """Return the (source id, target id) pairs the user kept checked"""
+        merges = []
+        for i in range(self.proposal_list.count()):
+            item = self.proposal_list.item(i)
+            if item.checkState() == Qt.CheckState.Checked:
+                merges.append(item.data(Qt.ItemDataRole.UserRole))
+        return merges
@@ -0,0 +1,125 @@
+import os
+import re
+
+from lazy_import import lazy_import
+from result_set import AMOUNT_COLUMNS
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Save dialog filters, the first one being the default
+EXPORT_FILTERS = "CSV Files (*.csv);;Parquet Files (*.parquet);;Excel Workbooks (*.xlsx)"
+
+# Export formats by file extension
+EXPORT_FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.xlsx': 'xlsx'
+}
+
+# Rows formatted and written per step
+CHUNK_ROWS = 100000
+
+# Bytes buffered before a CSV export touches the disk
+BUFFER_SIZE = 1024 * 1024
+
+# Rows a worksheet can hold, header included
+XLSX_MAX_ROWS = 1048576
+
+
+def export_format(file_name):
+    """Return the export format of a file name, CSV if the extension is unknown"""
+    return EXPORT_FORMATS.get(os.path.splitext(file_name)[1].lower(), 'csv')
+
+
+def with_export_extension(file_name, selected_filter):
+    """Add the extension of the chosen dialog filter to a file name without a known one"""
+    if os.path.splitext(file_name)[1].lower() in EXPORT_FORMATS:
+        return file_name
+    match = re.search(r'\*(\.\w+)', selected_filter or '')
+    return file_name + (match.group(1) if match else '.csv')
+
+
+def export_chunks(results, columns, rows, typed, chunk_rows=CHUNK_ROWS):
+    """Yield the selected rows of a result set as DataFrames of export columns.
+
+    CSV exports keep amounts as displayed ("<amount> <currency>"); typed
+    formats get float amounts and a Currency column instead. An empty
+    selection still yields one empty chunk so the header is written.
+    """
+    for start in range(0, max(len(rows), 1), chunk_rows):
+        chunk = results.take(rows[start:start + chunk_rows])
+        data = {}
+        for column in columns:
+            if not chunk.has(column):
+                data[column] = np.full(len(chunk), '', dtype=object)
+            elif typed and column in AMOUNT_COLUMNS:
+                data[column] = chunk.amounts(column)
+            elif typed:
+                data[column] = chunk.frame[column].astype(str).to_numpy()
+            else:
+                data[column] = chunk.formatted(column)
+        if typed:
+            data['Currency'] = chunk.frame['Currency'].astype(str).to_numpy()
+        yield pd.DataFrame(data)
+
+
+def write_csv(chunks, file_name):
+    with open(file_name, 'w', encoding='utf-8', newline='', buffering=BUFFER_SIZE) as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, index=False, header=i == 0)
+
+
+def write_parquet(chunks, file_name):
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Exporting to Parquet requires pyarrow (pip install pyarrow)")
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pyarrow.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(file_name, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_xlsx(chunks, file_name):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError("Exporting to Excel requires openpyxl (pip install openpyxl)")
+    # Write-only workbooks stream rows to disk instead of keeping cells in memory
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Results')
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            sheet.append(list(chunk.columns))
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(file_name)
+
+
+def write_results(results, columns, file_name, mask=None, chunk_rows=CHUNK_ROWS):
+    """Write the rows of a result set selected by mask to a CSV, Parquet or XLSX file.
+
+    Rows are formatted and written one chunk at a time. Returns the number
+    of rows written.
+    """
+    rows = np.flatnonzero(mask) if mask is not None else np.arange(len(results))
+    file_format = export_format(file_name)
+    if file_format == 'xlsx' and len(rows) >= XLSX_MAX_ROWS:
+        raise ValueError(f"{len(rows)} rows do not fit in an Excel worksheet, export to CSV or Parquet instead")
+
+    chunks = export_chunks(results, columns, rows, file_format != 'csv', chunk_rows)
+    if file_format == 'parquet':
+        write_parquet(chunks, file_name)
+    elif file_format == 'xlsx':
+        write_xlsx(chunks, file_name)
+    else:
+        write_csv(chunks, file_name)
+    return len(rows)
@@ -0,0 +1,251 @@
+from lazy_import import lazy_import
+from periods import parse_period_labels
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Dictionary-encoded text columns, in display order
+TEXT_COLUMNS = ['Period', 'Source', 'Artist', 'UPC', 'Track']
+
+# Float amount columns, formatted with the row currency for display
+AMOUNT_COLUMNS = ['Total Revenue', 'Artist Revenue']
+
+# Typed period of each row: first month code and length in months
+PERIOD_COLUMNS = ['Period Start', 'Period Length']
+
+# Column order of result records
+RECORD_COLUMNS = ['Period', 'Track', 'Total Revenue', 'Artist Revenue', 'Artist', 'UPC', 'Source']
+
+
+def encode(values):
+    """Dictionary-encode text values with sorted categories"""
+    values = pd.Series(np.asarray(values, dtype=object)).fillna('').astype(str)
+    return pd.Categorical(values)
+
+
+def parse_amounts(values):
+    """Split "<amount> <currency>" values into float amounts and currencies"""
+    # Parse each distinct value once and broadcast back through the codes
+    codes, uniques = pd.factorize(pd.Series(np.asarray(values, dtype=object)))
+    if len(uniques) == 0:
+        return np.zeros(len(codes)), np.full(len(codes), '', dtype=object)
+    parts = pd.Series(uniques, dtype=object).astype(str).str.strip().str.split(n=1, expand=True)
+    amounts = pd.to_numeric(parts[0], errors='coerce').fillna(0.0).to_numpy()
+    if 1 in parts.columns:
+        currencies = parts[1].fillna('').to_numpy()
+    else:
+        currencies = np.full(len(uniques), '', dtype=object)
+    return np.where(codes >= 0, amounts[codes], 0.0), np.where(codes >= 0, currencies[codes], '')
+
+
+class ResultSet:
+    """Columnar analysis results.
+
+    Period, Track, Artist, UPC, Source and Currency are stored as
+    categoricals (integer codes into a sorted dictionary of strings) and
+    amounts as float64. Each period label also carries its start month code
+    and length so periods can be re-bucketed without parsing strings. Row
+    dicts are only built when a row is read.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame.reset_index(drop=True)
+
+    @classmethod
+    def from_columns(cls, columns, currency=''):
+        """Build a result set from column arrays with float amounts"""
+        length = len(next(iter(columns.values()))) if columns else 0
+        data = {}
+        for column in TEXT_COLUMNS:
+            if column in columns:
+                data[column] = encode(columns[column])
+        for column in AMOUNT_COLUMNS:
+            data[column] = np.asarray(columns.get(column, np.zeros(length)), dtype=np.float64)
+        data['Currency'] = encode(columns.get('Currency', [currency] * length))
+        if 'Period Start' in columns:
+            for column in PERIOD_COLUMNS:
+                data[column] = np.asarray(columns[column], dtype=np.int64)
+        else:
+            data['Period Start'], data['Period Length'] = parse_period_labels(data['Period'].astype(str))
+        return cls(pd.DataFrame(data, index=range(length)))
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a result set from result dicts ("<amount> <currency>" strings)"""
+        if isinstance(records, ResultSet):
+            return records
+        records = list(records)
+        columns = {}
+        for column in TEXT_COLUMNS:
+            if any(column in record for record in records):
+                columns[column] = [record.get(column, '') for record in records]
+        currencies = None
+        for column in AMOUNT_COLUMNS:
+            amounts, column_currencies = parse_amounts([record.get(column, 0.0) for record in records])
+            columns[column] = amounts
+            if currencies is None:
+                currencies = column_currencies
+        columns['Currency'] = currencies if currencies is not None else []
+        if records and all('Period Start' in record for record in records):
+            for column in PERIOD_COLUMNS:
+                columns[column] = [record[column] for record in records]
+        if 'Period' not in columns:
+            columns['Period'] = [''] * len(records)
+        if 'Track' not in columns:
+            columns['Track'] = [''] * len(records)
+        return cls.from_columns(columns)
+
+    @classmethod
+    def concat(cls, result_sets):
+        """Concatenate result sets, merging their dictionaries"""
+        result_sets = [rs for rs in result_sets if rs is not None]
+        if not result_sets:
+            return cls.from_columns({'Period': [], 'Track': []})
+        columns = []
+        for rs in result_sets:
+            columns.extend(col for col in rs.frame.columns if col not in columns)
+
+        data = {}
+        for column in columns:
+            if column in AMOUNT_COLUMNS or column in PERIOD_COLUMNS:
+                data[column] = np.concatenate([
+                    rs.frame[column].to_numpy() if column in rs.frame.columns else np.zeros(len(rs))
+                    for rs in result_sets
+                ])
+            else:
+                parts = [
+                    rs.frame[column].array if column in rs.frame.columns else encode([''] * len(rs))
+                    for rs in result_sets
+                ]
+                data[column] = pd.api.types.union_categoricals(parts, sort_categories=True)
+        return cls(pd.DataFrame(data))
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __iter__(self):
+        for i in range(len(self.frame)):
+            yield self.row(i)
+
+    def __getitem__(self, i):
+        return self.row(i)
+
+    @property
+    def columns(self):
+        """Display columns present in the result set"""
+        return [col for col in RECORD_COLUMNS if col in self.frame.columns]
+
+    def has(self, column):
+        """Check a column is present in the result set"""
+        return column in self.frame.columns
+
+    def unique(self, column):
+        """Return the sorted distinct values of a text column"""
+        if column not in self.frame.columns:
+            return []
+        values = self.frame[column].cat.remove_unused_categories().cat.categories
+        return [value for value in values if value]
+
+    def amounts(self, column):
+        """Return an amount column as a float array"""
+        return self.frame[column].to_numpy()
+
+    def period_starts(self):
+        """Return each row's period start month code and length in months"""
+        return self.frame['Period Start'].to_numpy(), self.frame['Period Length'].to_numpy()
+
+    def formatted(self, column):
+        """Return a column as display strings"""
+        if column in AMOUNT_COLUMNS:
+            currencies = self.frame['Currency'].astype(str).to_numpy()
+            return [
+                f"{amount:.2f} {currency}" if currency else f"{amount:.2f}"
+                for amount, currency in zip(self.frame[column].to_numpy(), currencies)
+            ]
+        return self.frame[column].astype(str).tolist()
+
+    def value(self, i, column):
+        """Return one display value"""
+        if column in AMOUNT_COLUMNS:
+            currency = self.frame['Currency'].iat[i]
+            amount = self.frame[column].iat[i]
+            return f"{amount:.2f} {currency}" if currency else f"{amount:.2f}"
+        return self.frame[column].iat[i]
+
+    def row(self, i):
+        """Return a row as a result dict"""
+        return {column: self.value(i, column) for column in self.columns}
+
+    def to_records(self):
+        """Return all rows as result dicts for saving"""
+        formatted = {column: self.formatted(column) for column in self.columns}
+        starts, lengths = self.period_starts()
+        return [
+            {**{column: formatted[column][i] for column in self.columns},
+             'Period Start': int(starts[i]), 'Period Length': int(lengths[i])}
+            for i in range(len(self))
+        ]
+
+    def mask(self, **filters):
+        """Return a boolean mask of rows whose columns equal the given values"""
+        mask = np.ones(len(self), dtype=bool)
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if column not in self.frame.columns:
+                return np.zeros(len(self), dtype=bool)
+            categories = self.frame[column].cat.categories
+            if value not in categories:
+                return np.zeros(len(self), dtype=bool)
+            mask &= self.frame[column].cat.codes.to_numpy() == categories.get_loc(value)
+        return mask
+
+    def search_mask(self, text, columns=None):
+        """Return a boolean mask of rows where any display column contains text, ignoring case"""
+        text = text.lower()
+        mask = np.zeros(len(self), dtype=bool)
+        # Formatted amounts only hold digits, signs, points, spaces and currency
+        # codes, so other text can skip formatting every amount
+        amount_chars = set('0123456789-. ') | set(''.join(self.frame['Currency'].cat.categories).lower())
+        for column in columns if columns is not None else self.columns:
+            if column not in self.frame.columns:
+                continue
+            if column in AMOUNT_COLUMNS:
+                if not set(text) <= amount_chars:
+                    continue
+                mask |= pd.Series(self.formatted(column)).str.lower().str.contains(text, regex=False).to_numpy()
+            else:
+                # Search the dictionary once and look rows up by code
+                categories = self.frame[column].cat.categories
+                if not len(categories):
+                    continue
+                matches = np.asarray(categories.str.lower().str.contains(text, regex=False), dtype=bool)
+                codes = self.frame[column].cat.codes.to_numpy()
+                mask |= (codes >= 0) & matches[np.maximum(codes, 0)]
+        return mask
+
+    def take(self, rows):
+        """Return a result set with the selected rows (mask or indices)"""
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        return ResultSet(self.frame.iloc[rows])
+
+    def with_column(self, column, values):
+        """Return a copy with a text column set to values or to one constant value"""
+        frame = self.frame.copy()
+        if isinstance(values, str):
+            frame[column] = pd.Categorical.from_codes(np.zeros(len(frame), dtype=np.int8), [values])
+        else:
+            frame[column] = encode(values)
+        return ResultSet(frame)
+
+    def sort(self, columns):
+        """Return a copy sorted by columns (sorted dictionaries sort like strings).
+
+        Sorting by Period orders by period start first, then by label.
+        """
+        if 'Period' in columns:
+            position = columns.index('Period')
+            columns = columns[:position] + ['Period Start', 'Period Length'] + columns[position:]
+        return ResultSet(self.frame.sort_values(columns, kind='stable'))
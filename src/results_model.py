@@ -0,0 +1,88 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from lazy_import import lazy_import
+from result_set import AMOUNT_COLUMNS
+
+np = lazy_import('numpy')
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """Table model over the rows of a ResultSet.
+
+    The model only holds the indices of the rows passing the current filter,
+    in display order. Cells are formatted when the view paints them, so
+    filtering and sorting never create per-row items.
+    """
+
+    def __init__(self, results, headers, parent=None):
+        super().__init__(parent)
+        self.results = results
+        self.headers = list(headers)
+        self.rows = np.arange(len(results))
+        self.sort_column = None
+        self.sort_order = Qt.SortOrder.AscendingOrder
+
+    def set_mask(self, mask):
+        """Show only the rows selected by a boolean mask, keeping the sort order"""
+        self.beginResetModel()
+        self.rows = self.sorted_rows(np.flatnonzero(mask))
+        self.endResetModel()
+
+    def sort_keys(self, column):
+        """Return the keys ordering a column, innermost last"""
+        frame = self.results.frame
+        if column in AMOUNT_COLUMNS:
+            return [frame[column].to_numpy()]
+        # Sorted dictionaries, so codes sort like the strings
+        keys = [frame[column].cat.codes.to_numpy()]
+        if column == 'Period':
+            keys = [frame['Period Start'].to_numpy(), frame['Period Length'].to_numpy()] + keys
+        return keys
+
+    def sorted_rows(self, rows):
+        """Return rows ordered by the current sort column"""
+        if self.sort_column is None or not self.results.has(self.sort_column) or not len(rows):
+            return rows
+        keys = [key[rows] for key in self.sort_keys(self.sort_column)]
+        order = np.lexsort(keys[::-1])
+        if self.sort_order == Qt.SortOrder.DescendingOrder:
+            order = order[::-1]
+        return rows[order]
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        self.sort_column = self.headers[column]
+        self.sort_order = order
+        self.rows = self.sorted_rows(np.sort(self.rows))
+        self.layoutChanged.emit()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.headers)
+
+    def value(self, row, column):
+        """Return the display value of a cell"""
+        header = self.headers[column]
+        if not self.results.has(header):
+            return ''
+        return str(self.results.value(int(self.rows[row]), header))
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.value(index.row(), index.column())
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return section + 1
@@ -0,0 +1,88 @@
+import json
+import os
+
+from lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+def normalize_key(value):
+    """Normalize an artist name or UPC for split lookups"""
+    return ' '.join(str(value).split()).casefold()
+
+
+def normalize_keys(values):
+    """Vectorized normalize_key over a Series"""
+    return values.fillna('').astype(str).str.split().str.join(' ').str.casefold()
+
+
+class RoyaltySplits:
+    """Royalty percentages per artist and per release UPC.
+
+    UPC entries take precedence over artist entries, and rows matching
+    neither get the default percentage.
+    """
+
+    def __init__(self, splits_file):
+        self.splits_file = splits_file
+        self.artists = {}
+        self.upcs = {}
+        self.load()
+
+    def __len__(self):
+        return len(self.artists) + len(self.upcs)
+
+    def load(self):
+        """Load the split table from disk"""
+        self.artists = {}
+        self.upcs = {}
+        if not os.path.exists(self.splits_file):
+            return
+        try:
+            with open(self.splits_file, 'r') as f:
+                data = json.load(f)
+            self.artists = {normalize_key(k): float(v) for k, v in data.get('artists', {}).items()}
+            self.upcs = {normalize_key(k): float(v) for k, v in data.get('upcs', {}).items()}
+        except Exception as e:
+            print(f"Could not load royalty splits: {str(e)}")
+
+    def save(self):
+        """Save the split table to disk"""
+        os.makedirs(os.path.dirname(self.splits_file), exist_ok=True)
+        with open(self.splits_file, 'w') as f:
+            json.dump({'artists': self.artists, 'upcs': self.upcs}, f, indent=4)
+
+    def import_csv(self, file_path):
+        """Replace the split table from a CSV with artist and/or upc and percentage columns"""
+        df = pd.read_csv(file_path, dtype=str, keep_default_na=False, sep=None, engine='python')
+        columns = {str(col).strip().lower(): col for col in df.columns}
+        percentage_col = columns.get('percentage') or columns.get('percent') or columns.get('share')
+        if percentage_col is None:
+            raise ValueError("The split table needs a 'percentage' column")
+
+        percentages = pd.to_numeric(df[percentage_col].str.replace('%', '').str.replace(',', '.'), errors='coerce')
+        artists = {}
+        upcs = {}
+        for key_name, target in (('artist', artists), ('upc', upcs)):
+            if key_name not in columns:
+                continue
+            keys = normalize_keys(df[columns[key_name]])
+            valid = (keys != '') & percentages.notna()
+            target.update(zip(keys[valid], percentages[valid]))
+
+        if not artists and not upcs:
+            raise ValueError("The split table needs an 'artist' or 'upc' column")
+
+        self.artists = artists
+        self.upcs = upcs
+        self.save()
+
+    def percentages(self, results, default_percentage, artist_col='Artist', upc_col='UPC'):
+        """Return the royalty percentage for every row of a results frame"""
+        percentages = pd.Series(np.nan, index=results.index)
+        if self.upcs and upc_col in results.columns:
+            percentages = normalize_keys(results[upc_col]).map(self.upcs)
+        if self.artists and artist_col in results.columns:
+            percentages = percentages.fillna(normalize_keys(results[artist_col]).map(self.artists))
+        return percentages.fillna(default_percentage).astype(float).to_numpy()
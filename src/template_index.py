@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+
+# Keywords used to recognise a column's role when its exact name differs
+COLUMN_TYPE_KEYWORDS = {
+    'track': ['title', 'song', 'tc song id'],
+    'artist': ['performer', 'artist name', 'band'],
+    'revenue': ['amount', 'earnings', 'earned', 'income'],
+    'date': ['period', 'sale date', 'transaction date', 'posted'],
+    'upc': ['barcode', 'isrc', 'identifier']
+}
+
+# Lowest score at which a template is offered for a file
+MATCH_THRESHOLD = 0.7
+
+# Score of a template field whose column is only matched by keyword
+PARTIAL_MATCH_SCORE = 0.8
+
+
+def normalize_column(name):
+    """Normalize a column name for index lookups"""
+    return ' '.join(str(name).lower().split())
+
+
+def header_signature(columns):
+    """Return a stable hash of a file header (order-insensitive)"""
+    normalized = sorted(normalize_column(col) for col in columns)
+    return hashlib.sha1('\x1f'.join(normalized).encode('utf-8')).hexdigest()
+
+
+def column_fields(template):
+    """Return the (field, column) pairs of a template's column mapping.
+
+    Templates also hold settings such as source, currency and dedup keys,
+    which are not columns and must not count when matching headers.
+    """
+    return [
+        (field, value) for field, value in template.items()
+        if field.endswith('_column') and isinstance(value, str) and value
+    ]
+
+
+def column_matches_type(field_type, column_name):
+    """Check if column name contains keywords related to the field type"""
+    column_lower = column_name.lower()
+    return any(keyword in column_lower for keyword in COLUMN_TYPE_KEYWORDS.get(field_type, []))
+
+
+class TemplateIndex:
+    """Index of column templates for fast header-based template resolution.
+
+    Keeps an inverted index from normalized column name to the templates that
+    map it, plus a table of exact header signatures for files whose template
+    has already been confirmed, so only a handful of templates are ever scored.
+    """
+
+    def __init__(self, templates=None, signatures_file=None):
+        self.signatures_file = signatures_file
+        self.templates = {}
+        self.column_index = {}
+        self.signatures = {}
+        self.load_signatures()
+        self.rebuild(templates or {})
+
+    def rebuild(self, templates):
+        """Rebuild the inverted column index from the given templates"""
+        self.templates = templates
+        self.column_index = {}
+        for name, template in templates.items():
+            for field, value in column_fields(template):
+                self.column_index.setdefault(normalize_column(value), set()).add(name)
+
+        # Forget signatures pointing at templates that no longer exist
+        self.signatures = {
+            signature: name for signature, name in self.signatures.items()
+            if name in templates
+        }
+
+    def load_signatures(self):
+        """Load confirmed header signatures from disk"""
+        self.signatures = {}
+        if not self.signatures_file or not os.path.exists(self.signatures_file):
+            return
+        try:
+            with open(self.signatures_file, 'r') as f:
+                self.signatures = json.load(f)
+        except Exception as e:
+            print(f"Could not load header signatures: {str(e)}")
+
+    def save_signatures(self):
+        """Save confirmed header signatures to disk"""
+        if not self.signatures_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.signatures_file), exist_ok=True)
+            with open(self.signatures_file, 'w') as f:
+                json.dump(self.signatures, f, indent=4)
+        except Exception as e:
+            print(f"Could not save header signatures: {str(e)}")
+
+    def remember(self, columns, template_name):
+        """Record that files with this header use the given template"""
+        if template_name not in self.templates:
+            return
+        signature = header_signature(columns)
+        if self.signatures.get(signature) != template_name:
+            self.signatures[signature] = template_name
+            self.save_signatures()
+
+    def lookup(self, columns):
+        """Return the template confirmed for this exact header, if any"""
+        return self.signatures.get(header_signature(columns))
+
+    def candidates(self, columns):
+        """Return the templates sharing at least one column with the header"""
+        found = set()
+        for col in columns:
+            found.update(self.column_index.get(normalize_column(col), ()))
+        # Keep template order stable so ties resolve like a full scan
+        return [name for name in self.templates if name in found]
+
+    def score(self, template, columns_lower, matched_types):
+        """Calculate how well a template matches a header"""
+        score = 0
+        total_fields = 0
+
+        for field, value in column_fields(template):
+            total_fields += 1
+            # Check if the exact column exists
+            if value.lower() in columns_lower:
+                score += 1
+                continue
+
+            # Check for similar column names
+            if field.split('_')[0] in matched_types:
+                score += PARTIAL_MATCH_SCORE
+
+        return score / total_fields if total_fields > 0 else 0
+
+    def best_match(self, columns):
+        """Return (template_name, score) for the best template for a header"""
+        confirmed = self.lookup(columns)
+        if confirmed:
+            return confirmed, 1.0
+
+        columns_lower = set(col.lower() for col in columns)
+
+        # Field types with a similar column only depend on the header, so
+        # work them out once instead of once per template field
+        field_types = set(
+            field.split('_')[0]
+            for template in self.templates.values()
+            for field, _ in column_fields(template)
+        )
+        matched_types = set(
+            field_type for field_type in field_types
+            if any(field_type in col or column_matches_type(field_type, col)
+                   for col in columns_lower)
+        )
+
+        # Score templates sharing a column with the file first. A template
+        # without any exact column scores at most PARTIAL_MATCH_SCORE, so
+        # only when no candidate beats that can another template win (or win
+        # a tie by coming first) and every template is scored like a full scan
+        best_match, best_score = self.best_of(self.candidates(columns), columns_lower, matched_types)
+        if best_score <= PARTIAL_MATCH_SCORE + 1e-9:
+            best_match, best_score = self.best_of(list(self.templates), columns_lower, matched_types)
+        return best_match, best_score
+
+    def best_of(self, names, columns_lower, matched_types):
+        """Return (template_name, score) for the best scoring of the named templates"""
+        best_match = None
+        best_score = 0
+        for name in names:
+            score = self.score(self.templates[name], columns_lower, matched_types)
+            if score > best_score:
+                best_score = score
+                best_match = name
+        return best_match, best_score
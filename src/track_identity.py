@@ -0,0 +1,217 @@
+import json
+import os
+import re
+import unicodedata
+
+from cleaning import clean_text
+from lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# ISRC: country, registrant, year and designation code, e.g. USRC17607839
+ISRC_PATTERN = re.compile(r'^[A-Z]{2}[A-Z0-9]{3}\d{7}$')
+
+
+def normalize_title(value):
+    """Normalize a track title or artist name for identity matching"""
+    return ' '.join(unicodedata.normalize('NFKC', str(value)).casefold().split())
+
+
+def normalize_code(value):
+    """Normalize an ISRC or UPC: uppercase without separators, barcodes without leading zeros"""
+    code = str(value).strip().upper()
+    # Barcodes read as numbers come back as floats
+    if re.fullmatch(r'\d+\.0', code):
+        code = code[:-2]
+    code = re.sub(r'[\s\-_.]', '', code)
+    if code.isdigit():
+        code = code.lstrip('0')
+    return code
+
+
+def identity_keys(title, artist, code):
+    """Return the keys identifying a track, strongest first.
+
+    An ISRC names a recording on its own; a UPC names a release, so it only
+    identifies a track together with the title. Every track is also keyed by
+    artist and title.
+    """
+    keys = []
+    if code:
+        if ISRC_PATTERN.match(code):
+            keys.append(f"isrc:{code}")
+        else:
+            keys.append(f"upc:{code}|{title}")
+    keys.append(f"title:{artist}|{title}")
+    return keys
+
+
+def key_hashes(keys):
+    """Hash identity keys into uint64"""
+    return pd.util.hash_array(np.asarray(keys, dtype=object))
+
+
+def factorize_text(values, length):
+    """Factorize a cleaned text column into int64 codes and unique strings, '' if absent"""
+    if values is None:
+        return np.zeros(length, dtype=np.int64), np.array([''], dtype=object)
+    codes, uniques = pd.factorize(clean_text(pd.Series(np.asarray(values, dtype=object))))
+    return codes.astype(np.int64), np.asarray(uniques, dtype=object)
+
+
+class TrackIdentityIndex:
+    """Persistent index from track identifiers to canonical track ids.
+
+    Each track gets an integer id and keeps the title and artist it was
+    first seen with. ISRC, UPC + title and artist + title keys are hashed
+    into one sorted uint64 array with a parallel array of track ids, so
+    resolving a statement is a vectorized search; a row matching any known
+    key takes that track's id and teaches the index its other keys. Merged
+    tracks point at the track they were merged into.
+    """
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        self.keys_file = os.path.join(index_dir, 'track_keys.npz')
+        self.tracks_file = os.path.join(index_dir, 'tracks.json')
+        self.hashes = None
+        self.track_ids = None
+        self.tracks = []
+        self.dirty = False
+
+    def __len__(self):
+        self.ensure_loaded()
+        return len(self.tracks)
+
+    def ensure_loaded(self):
+        """Load the index on first use"""
+        if self.hashes is None:
+            self.load()
+
+    def load(self):
+        """Load the index from disk"""
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.track_ids = np.empty(0, dtype=np.int32)
+        self.tracks = []
+        if not os.path.exists(self.keys_file) or not os.path.exists(self.tracks_file):
+            return
+        try:
+            with open(self.tracks_file, 'r') as f:
+                self.tracks = json.load(f)
+            data = np.load(self.keys_file)
+            self.hashes = data['hashes']
+            self.track_ids = data['tracks']
+        except Exception as e:
+            print(f"Could not load track identity index: {str(e)}")
+            self.hashes = np.empty(0, dtype=np.uint64)
+            self.track_ids = np.empty(0, dtype=np.int32)
+            self.tracks = []
+
+    def save(self):
+        """Save the index to disk if it changed"""
+        if not self.dirty:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        np.savez(self.keys_file, hashes=self.hashes, tracks=self.track_ids)
+        with open(self.tracks_file, 'w') as f:
+            json.dump(self.tracks, f, indent=4)
+        self.dirty = False
+
+    def lookup(self, hashes):
+        """Return the track id each key hash belongs to, -1 if unknown"""
+        self.ensure_loaded()
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(self.hashes):
+            return np.full(len(hashes), -1, dtype=np.int32)
+        positions = np.searchsorted(self.hashes, hashes)
+        positions = np.minimum(positions, len(self.hashes) - 1)
+        found = self.hashes[positions] == hashes
+        return np.where(found, self.track_ids[positions], -1)
+
+    def resolve(self, titles, artists=None, codes=None):
+        """Return the canonical track id of each row, adding tracks not seen before.
+
+        titles, artists and codes (ISRC or UPC) are parallel sequences;
+        each distinct combination is only resolved once.
+        """
+        self.ensure_loaded()
+        # Factorize each column and combine the integer codes, so only the
+        # distinct combinations are ever built as strings
+        columns = [factorize_text(values, len(titles)) for values in (titles, artists, codes)]
+        (title_codes, title_values), (artist_codes, artist_values), (code_codes, code_values) = columns
+        combined = (title_codes * len(artist_values) + artist_codes) * len(code_values) + code_codes
+        positions, distinct = pd.factorize(combined)
+        distinct_codes, code_index = np.divmod(distinct, len(code_values))
+        title_index, artist_index = np.divmod(distinct_codes, len(artist_values))
+        combos = pd.DataFrame({
+            'title': title_values[title_index],
+            'artist': artist_values[artist_index],
+            'code': code_values[code_index]
+        })
+
+        combo_keys = [
+            identity_keys(normalize_title(title), normalize_title(artist), normalize_code(code))
+            for title, artist, code in combos.itertuples(index=False, name=None)
+        ]
+        flat_hashes = key_hashes([key for keys in combo_keys for key in keys])
+        known = self.lookup(flat_hashes)
+
+        # Link each combination to the first track any of its keys belongs to
+        combo_ids = np.empty(len(combo_keys), dtype=np.int32)
+        new_keys = {}
+        offset = 0
+        for i, (keys, title, artist) in enumerate(zip(combo_keys, combos['title'], combos['artist'])):
+            hashes = flat_hashes[offset:offset + len(keys)]
+            found = known[offset:offset + len(keys)]
+            offset += len(keys)
+            track_id = next((int(t) for t in found if t >= 0), None)
+            if track_id is None:
+                track_id = next((new_keys[int(h)] for h in hashes if int(h) in new_keys), None)
+            if track_id is None:
+                track_id = len(self.tracks)
+                self.tracks.append({'title': title, 'artist': artist})
+                self.dirty = True
+            for h, t in zip(hashes, found):
+                if t < 0:
+                    new_keys.setdefault(int(h), track_id)
+            combo_ids[i] = track_id
+
+        if new_keys:
+            merged = np.concatenate([self.hashes, np.fromiter(new_keys.keys(), dtype=np.uint64, count=len(new_keys))])
+            merged_ids = np.concatenate([self.track_ids, np.fromiter(new_keys.values(), dtype=np.int32, count=len(new_keys))])
+            order = np.argsort(merged, kind='stable')
+            self.hashes = merged[order]
+            self.track_ids = merged_ids[order]
+            self.dirty = True
+        return combo_ids[positions]
+
+    def canonical_id(self, track_id):
+        """Follow merges to the track an id now belongs to"""
+        while 'merged_into' in self.tracks[track_id]:
+            track_id = self.tracks[track_id]['merged_into']
+        return track_id
+
+    def titles(self, track_ids):
+        """Return the canonical title of each track id"""
+        self.ensure_loaded()
+        titles = np.asarray([self.tracks[self.canonical_id(i)]['title'] for i in range(len(self.tracks))], dtype=object)
+        return titles[np.asarray(track_ids, dtype=np.int64)]
+
+    def active_tracks(self):
+        """Return the ids, titles and artists of tracks not merged into another"""
+        self.ensure_loaded()
+        active = [(i, track['title'], track['artist']) for i, track in enumerate(self.tracks) if 'merged_into' not in track]
+        return [list(values) for values in zip(*active)] if active else [[], [], []]
+
+    def merge(self, source_id, target_id):
+        """Merge a track into another: every key of the source now resolves to the target"""
+        self.ensure_loaded()
+        # Ids read from resolve() are numpy integers, which json cannot save
+        source_id = self.canonical_id(int(source_id))
+        target_id = self.canonical_id(int(target_id))
+        if source_id == target_id:
+            return
+        self.track_ids[self.track_ids == source_id] = target_id
+        self.tracks[source_id]['merged_into'] = target_id
+        self.dirty = True
@@ -0,0 +1,191 @@
+import csv
+import heapq
+import os
+import tempfile
+
+from cleaning import map_unique
+from lazy_import import lazy_import
+from ingest import read_statement_chunks, read_statement_header, statement_name
+
+pd = lazy_import('pandas')
+
+# Rows read per chunk while streaming statements
+DEFAULT_CHUNK_SIZE = 100000
+
+# Matching rows held in memory before a sorted run is spilled to disk
+DEFAULT_RUN_ROWS = 500000
+
+SOURCE_COLUMN = 'Source File'
+
+# Hidden column carrying each row's parsed date in sorted runs, never exported
+SORT_KEY_COLUMN = '__sort_date'
+
+# Line ending for merged output, shared by every write path so the same
+# rows give the same bytes whether or not they were spilled
+LINE_TERMINATOR = '\n'
+
+
+def date_sort_keys(values):
+    """Return ISO date strings to sort text dates by, '' where a date cannot be parsed.
+
+    Each distinct value is parsed on its own, so statements mixing date
+    formats across rows or chunks still sort by date.
+    """
+    def parse(uniques):
+        dates = pd.to_datetime(uniques, errors='coerce', format='mixed')
+        # ISO strings compare in date order, so runs can be merged as text
+        return (dates.dt.strftime('%Y-%m-%d %H:%M:%S')
+                     .str.replace(' 00:00:00', '', regex=False)
+                     .fillna(''))
+    return map_unique(values, parse, '')
+
+
+def union_columns(files, get_format):
+    """Return the union of all statement headers in first-seen order"""
+    columns = []
+    seen = set()
+    for file in files:
+        for col in read_statement_header(file, get_format(file)) + [SOURCE_COLUMN]:
+            if col not in seen:
+                seen.add(col)
+                columns.append(col)
+    return columns
+
+
+def iter_track_rows(files, get_format, track_col, selected_tracks, columns,
+                    chunksize=DEFAULT_CHUNK_SIZE):
+    """Yield chunks of rows matching the selected tracks, aligned to columns"""
+    selected = set(selected_tracks)
+    for file in files:
+        chunks = read_statement_chunks(
+            file, get_format(file), chunksize=chunksize,
+            dtype=str, keep_default_na=False
+        )
+        for chunk in chunks:
+            if track_col not in chunk.columns:
+                break
+            matched = chunk[chunk[track_col].isin(selected)]
+            if matched.empty:
+                continue
+            matched = matched.assign(**{SOURCE_COLUMN: statement_name(file)})
+            yield matched.reindex(columns=columns, fill_value='')
+
+
+class ExternalSorter:
+    """Sort merged rows by date then track with bounded memory.
+
+    Rows are buffered up to run_rows, sorted and spilled to temporary files
+    as sorted runs, then combined with a k-way merge. Statements are usually
+    date-ordered already, so sorting each run is close to linear. Rows are
+    sorted on a parsed copy of the date kept in a hidden last column, and
+    the original date text is written out unchanged.
+    """
+
+    def __init__(self, columns, date_col, track_col, run_rows=DEFAULT_RUN_ROWS, temp_dir=None):
+        self.columns = columns
+        self.date_col = date_col
+        self.track_col = track_col
+        self.run_rows = run_rows
+        self.temp_dir = temp_dir
+        self.buffer = []
+        self.buffered_rows = 0
+        self.runs = []
+        self.row_count = 0
+
+    def add(self, chunk):
+        """Add a chunk of text rows aligned to the merge columns"""
+        chunk = chunk.assign(**{SORT_KEY_COLUMN: date_sort_keys(chunk[self.date_col])})
+        self.buffer.append(chunk)
+        self.buffered_rows += len(chunk)
+        self.row_count += len(chunk)
+        if self.buffered_rows >= self.run_rows:
+            self.spill()
+
+    def sorted_buffer(self):
+        """Return the buffered rows as one sorted frame"""
+        frame = pd.concat(self.buffer, ignore_index=True)
+        keys = pd.DataFrame({
+            'missing': frame[SORT_KEY_COLUMN] == '',
+            'date': frame[SORT_KEY_COLUMN],
+            'track': frame[self.track_col]
+        })
+        order = keys.sort_values(['missing', 'date', 'track'], kind='stable').index
+        return frame.iloc[order]
+
+    def spill(self):
+        """Write the buffered rows to disk as a sorted run"""
+        if not self.buffer:
+            return
+        fd, path = tempfile.mkstemp(prefix='merge_run_', suffix='.csv', dir=self.temp_dir)
+        os.close(fd)
+        self.runs.append(path)
+        self.sorted_buffer().to_csv(path, header=False, index=False, lineterminator=LINE_TERMINATOR)
+        self.buffer = []
+        self.buffered_rows = 0
+
+    def write(self, output_path):
+        """Write all rows in sorted order to output_path"""
+        if not self.runs:
+            # Everything fit in memory, no merge needed
+            if self.buffer:
+                frame = self.sorted_buffer().drop(columns=SORT_KEY_COLUMN)
+            else:
+                frame = pd.DataFrame(columns=self.columns)
+            frame.to_csv(output_path, index=False, lineterminator=LINE_TERMINATOR)
+            return self.row_count
+
+        self.spill()
+        track_index = self.columns.index(self.track_col)
+
+        # Run rows end with the sort key column
+        def sort_key(row):
+            return (row[-1] == '', row[-1], row[track_index])
+
+        files = [open(path, 'r', newline='', encoding='utf-8') for path in self.runs]
+        try:
+            with open(output_path, 'w', newline='', encoding='utf-8') as out:
+                writer = csv.writer(out, lineterminator=LINE_TERMINATOR)
+                writer.writerow(self.columns)
+                writer.writerows(row[:-1] for row in heapq.merge(*[csv.reader(f) for f in files], key=sort_key))
+        finally:
+            for f in files:
+                f.close()
+        return self.row_count
+
+    def close(self):
+        """Remove spilled runs"""
+        for path in self.runs:
+            if os.path.exists(path):
+                os.remove(path)
+        self.runs = []
+
+
+def stream_merge_tracks(files, get_format, track_col, selected_tracks, output_path,
+                        date_col=None, chunksize=DEFAULT_CHUNK_SIZE, run_rows=DEFAULT_RUN_ROWS):
+    """Merge the selected tracks of all files into output_path chunk by chunk.
+
+    Only one chunk of each statement is held in memory at a time. Rows are
+    written under the union of all headers with a Source File column, sorted
+    by date and track when a date column is given.
+    Returns (row_count, columns).
+    """
+    columns = union_columns(files, get_format)
+    rows = iter_track_rows(files, get_format, track_col, selected_tracks, columns, chunksize)
+
+    if date_col and date_col in columns:
+        sorter = ExternalSorter(columns, date_col, track_col, run_rows,
+                                temp_dir=os.path.dirname(os.path.abspath(output_path)))
+        try:
+            for chunk in rows:
+                sorter.add(chunk)
+            return sorter.write(output_path), columns
+        finally:
+            sorter.close()
+
+    row_count = 0
+    pd.DataFrame(columns=columns).to_csv(output_path, index=False, lineterminator=LINE_TERMINATOR)
+    for chunk in rows:
+        chunk.to_csv(output_path, mode='a', header=False, index=False,
+                     lineterminator=LINE_TERMINATOR)
+        row_count += len(chunk)
+    return row_count, columns
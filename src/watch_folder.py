@@ -0,0 +1,280 @@
+import json
+import os
+import sys
+import time
+import traceback
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, QFileSystemWatcher, pyqtSignal
+
+from background import BackgroundTask
+from fingerprints import FingerprintRegistry
+from ingest import (sniff_csv, read_statement, is_statement_file, statement_paths, statement_name,
+                    statement_stat, set_sheet_cache_dir)
+from template_index import TemplateIndex, MATCH_THRESHOLD
+
+# Seconds a new file must keep the same size before it is ingested
+SETTLE_SECONDS = 2
+
+# Default polling interval of the headless watcher
+POLL_SECONDS = 30
+
+
+def folder_statements(folder, listings=None):
+    """Return the statements in a folder, each CSV of a zip and each sheet of a workbook as its own statement.
+
+    listings caches the statements of each file by size and mtime, so zips
+    and workbooks are only opened again when they change.
+    """
+    if not os.path.isdir(folder):
+        return []
+    files = []
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if not is_statement_file(name) or not os.path.isfile(path):
+            continue
+        try:
+            stat = os.stat(path)
+            cached = listings.get(path) if listings is not None else None
+            if cached and cached[0] == (stat.st_size, stat.st_mtime_ns):
+                files.extend(cached[1])
+                continue
+            paths = statement_paths(path)
+            if listings is not None:
+                listings[path] = ((stat.st_size, stat.st_mtime_ns), paths)
+            files.extend(paths)
+        except Exception as e:
+            # Archives still being written cannot be opened yet
+            print(f"Could not list {name}: {str(e)}")
+    return files
+
+
+def pending_files(folder, fingerprints, listings=None, statements=None):
+    """Return statements in a folder that were not ingested in their current state"""
+    if statements is None:
+        statements = folder_statements(folder, listings)
+    return [path for path in statements if not fingerprints.is_current(path)]
+
+
+def ready_files(folder, fingerprints, listings=None, statements=None):
+    """Return statements in a folder that were ingested but not added to an analysis yet"""
+    if statements is None:
+        statements = folder_statements(folder, listings)
+    files = []
+    for path in statements:
+        digest = fingerprints.current_digest(path)
+        if digest is None:
+            continue
+        info = fingerprints.file_info(digest)
+        if 'template' in info and not info.get('in_analysis'):
+            files.append(path)
+    return files
+
+
+def scan_folder(folder, fingerprints, listings):
+    """List a folder's settled statements to ingest, those still being written and those ready to add"""
+    statements = folder_statements(folder, listings)
+    pending, waiting = [], []
+    for path in pending_files(folder, fingerprints, statements=statements):
+        (pending if is_settled(path) else waiting).append(path)
+    return pending, waiting, ready_files(folder, fingerprints, statements=statements)
+
+
+def is_settled(file_path, settle_seconds=SETTLE_SECONDS):
+    """Check a file is no longer being written"""
+    try:
+        return time.time() - statement_stat(file_path).st_mtime >= settle_seconds
+    except OSError:
+        return False
+
+
+def ingest_statement(file_path, fingerprints, template_index):
+    """Sniff, match and parse a statement into the parsed cache without any dialog.
+
+    The path is only recorded as ingested once it was parsed and matched,
+    so a statement that fails is tried again on the next scan. Returns a
+    dict describing the ingested file.
+    """
+    stat = statement_stat(file_path)
+    digest = fingerprints.fingerprint(file_path, record=False)
+    info = {'path': file_path, 'digest': digest, 'cached': True}
+
+    df = fingerprints.load_frame(digest)
+    if df is None:
+        info['cached'] = False
+        df = read_statement(file_path, sniff_csv(file_path))
+        fingerprints.store_frame(digest, df)
+
+    # Same matching as try_auto_detect_template, recorded instead of asked
+    template_name, score = template_index.best_match(df.columns.tolist())
+    info['rows'] = len(df)
+    info['template'] = template_name if score >= MATCH_THRESHOLD else None
+    info['score'] = score
+    fingerprints.annotate(digest, template=info['template'], rows=info['rows'])
+    fingerprints.record(file_path, digest, stat)
+    fingerprints.save()
+    return info
+
+
+class IngestSignals(QObject):
+    finished = pyqtSignal(dict)
+    failed = pyqtSignal(str, str)
+
+
+class IngestWorker(QRunnable):
+    """Ingest one statement on a worker thread"""
+
+    def __init__(self, file_path, fingerprints, template_index):
+        super().__init__()
+        self.file_path = file_path
+        self.fingerprints = fingerprints
+        self.template_index = template_index
+        self.signals = IngestSignals()
+
+    def run(self):
+        try:
+            info = ingest_statement(self.file_path, self.fingerprints, self.template_index)
+            self.signals.finished.emit(info)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(self.file_path, str(e))
+
+
+class FolderWatcher(QObject):
+    """Watch an inbox folder and ingest new statements in the background.
+
+    Directory change notifications are debounced, then the folder is listed
+    on a worker thread and every statement not yet ingested in its current
+    state is handed to a single ingest thread, so statements are processed
+    one at a time off the UI thread.
+    """
+
+    ingested = pyqtSignal(dict)
+    failed = pyqtSignal(str, str)
+    ready = pyqtSignal(list)
+
+    def __init__(self, fingerprints, template_index, parent=None):
+        super().__init__(parent)
+        self.fingerprints = fingerprints
+        self.template_index = template_index
+        self.folder = None
+        self.queued = set()
+        self.listings = {}
+        self.scanning = False
+        self.rescan = False
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.schedule_scan)
+
+        self.scan_timer = QTimer(self)
+        self.scan_timer.setSingleShot(True)
+        self.scan_timer.timeout.connect(self.scan)
+
+    def start(self, folder):
+        """Start watching a folder and ingest what is already there"""
+        self.stop()
+        self.folder = folder
+        self.watcher.addPath(folder)
+        print(f"Watching {folder} for new statements")
+        self.scan()
+
+    def stop(self):
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        self.folder = None
+        self.listings = {}
+
+    def schedule_scan(self, *args):
+        self.scan_timer.start(SETTLE_SECONDS * 1000)
+
+    def scan(self):
+        """List the folder on a worker thread, one scan at a time"""
+        if not self.folder:
+            return
+        if self.scanning:
+            self.rescan = True
+            return
+        self.scanning = True
+        task = BackgroundTask(scan_folder, self.folder, self.fingerprints, self.listings)
+        task.signals.finished.connect(self.on_scanned)
+        task.signals.failed.connect(self.on_scan_failed)
+        QThreadPool.globalInstance().start(task)
+
+    def on_scanned(self, result):
+        """Queue every settled statement that was not ingested yet"""
+        self.scanning = False
+        pending, waiting, ready = result
+        if self.folder:
+            for file_path in pending:
+                if file_path in self.queued:
+                    continue
+                self.queued.add(file_path)
+                worker = IngestWorker(file_path, self.fingerprints, self.template_index)
+                worker.signals.finished.connect(self.on_finished)
+                worker.signals.failed.connect(self.on_failed)
+                self.pool.start(worker)
+            self.ready.emit(ready)
+        # Come back for files still being written
+        if self.rescan:
+            self.rescan = False
+            self.scan()
+        elif waiting:
+            self.schedule_scan()
+
+    def on_scan_failed(self, error):
+        self.scanning = False
+        print(f"Could not scan {self.folder}: {error}")
+
+    def on_finished(self, info):
+        self.queued.discard(info['path'])
+        self.ingested.emit(info)
+
+    def on_failed(self, file_path, error):
+        self.queued.discard(file_path)
+        self.failed.emit(file_path, error)
+
+
+def watch(folder, data_dir, interval=POLL_SECONDS, once=False):
+    """Poll a folder and ingest new statements without the UI"""
+    templates_dir = os.path.join(data_dir, 'templates')
+    templates_file = os.path.join(templates_dir, 'column_templates.json')
+    templates = {}
+    if os.path.exists(templates_file):
+        with open(templates_file, 'r') as f:
+            templates = json.load(f)
+    template_index = TemplateIndex(templates, os.path.join(templates_dir, 'header_signatures.json'))
+    fingerprints = FingerprintRegistry(os.path.join(data_dir, 'cache'))
+    set_sheet_cache_dir(os.path.join(data_dir, 'cache', 'sheets'))
+
+    print(f"Watching {folder} every {interval}s")
+    listings = {}
+    while True:
+        for file_path in pending_files(folder, fingerprints, listings):
+            if not is_settled(file_path):
+                continue
+            try:
+                info = ingest_statement(file_path, fingerprints, template_index)
+                print(f"Ingested {statement_name(file_path)}: {info['rows']} rows, "
+                      f"template {info['template'] or 'none'}{' (cached)' if info['cached'] else ''}")
+            except Exception as e:
+                print(f"Could not ingest {file_path}: {str(e)}")
+        if once:
+            break
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest statements dropped into an inbox folder")
+    parser.add_argument('folder', help="Folder to watch")
+    parser.add_argument('--interval', type=int, default=POLL_SECONDS, help="Seconds between scans")
+    parser.add_argument('--once', action='store_true', help="Scan once and exit")
+    parser.add_argument('--data-dir', default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data'))
+    args = parser.parse_args()
+    try:
+        watch(args.folder, args.data_dir, args.interval, args.once)
+    except KeyboardInterrupt:
+        sys.exit(0)
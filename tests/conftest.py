@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The application modules are imported flat from src, as main.py does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,115 @@
+import pandas as pd
+import pytest
+
+from advances import AdvancesLedger, RECOUPMENT_COLUMNS, leaves_out_dates
+from line_item_store import LineItemStore
+from periods import parse_period_labels
+
+
+def revenue(rows):
+    """Build a recoupment input frame from (artist, period label, amount) rows"""
+    labels = [period for _, period, _ in rows]
+    starts, lengths = parse_period_labels(labels)
+    return pd.DataFrame({
+        'Artist': [artist for artist, _, _ in rows],
+        'Period': labels,
+        'Period Start': starts,
+        'Period Length': lengths,
+        'Amount': [amount for _, _, amount in rows]
+    })
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return AdvancesLedger(str(tmp_path / 'ledger.json'))
+
+
+def test_no_advances(ledger):
+    result = ledger.recoup(revenue([('A', '2024-01', 10.0)]), 'Month')
+    assert list(result.columns) == RECOUPMENT_COLUMNS
+    assert result.empty
+
+
+def test_running_balance(ledger):
+    ledger.add_advance('A', 100.0, '2024-01-15')
+    result = ledger.recoup(revenue([
+        ('A', '2024-01', 30.0), ('A', '2024-02', 50.0), ('A', '2024-03', 40.0), ('B', '2024-01', 5.0)
+    ]), 'Month')
+    assert result['Period'].tolist() == ['2024-01', '2024-02', '2024-03']
+    assert result['Balance'].tolist() == pytest.approx([70.0, 20.0, 0.0])
+    assert result['Payable'].tolist() == pytest.approx([0.0, 0.0, 20.0])
+
+
+def test_recorded_periods_are_compared_by_month_not_label(ledger):
+    ledger.add_advance('A', 100.0, '2024-01-15')
+    ledger.recoup(revenue([('A', '2024-Q1', 30.0)]), 'Quarter', commit=True)
+    assert ledger.state['a|']['balance'] == pytest.approx(70.0)
+
+    # "2024-04" sorts before "2024-Q1" as text but comes after it
+    result = ledger.recoup(revenue([('A', '2024-02', 99.0), ('A', '2024-04', 20.0)]), 'Month')
+    assert result['Period'].tolist() == ['2024-04']
+    assert result['Balance'].tolist() == pytest.approx([50.0])
+
+
+def test_year_after_months(ledger):
+    ledger.add_advance('A', 10.0, '2023-06-01')
+    ledger.recoup(revenue([('A', '2023-12', 4.0)]), 'Month', commit=True)
+    result = ledger.recoup(revenue([('A', '2023', 50.0), ('A', '2024', 3.0)]), 'Year')
+    assert result['Period'].tolist() == ['2024']
+    assert result['Balance'].tolist() == pytest.approx([3.0])
+
+
+def test_commit_persists_and_marks_advances(ledger):
+    ledger.add_advance('A', 10.0, '2024-01-01')
+    ledger.recoup(revenue([('A', '2024-01', 4.0)]), 'Month', commit=True)
+    reloaded = AdvancesLedger(ledger.ledger_file)
+    assert reloaded.state['a|'] == {'period': '2024-01', 'end': 2024 * 12, 'balance': 6.0}
+    assert all(advance['applied'] for advance in reloaded.advances)
+
+
+def test_late_advance_counts_towards_next_period(ledger):
+    ledger.add_advance('A', 10.0, '2024-01-01')
+    ledger.recoup(revenue([('A', '2024-02', 4.0)]), 'Month', commit=True)
+    # Paid in an already recorded month
+    ledger.add_advance('A', 5.0, '2024-01-20')
+    result = ledger.recoup(revenue([('A', '2024-03', 1.0)]), 'Month')
+    assert result['Balance'].tolist() == pytest.approx([10.0])
+
+
+def test_release_advance_recouped_from_release_revenue(ledger):
+    ledger.add_advance('A', 10.0, '2024-01-01', release='123')
+    frame = revenue([('A', '2024-01', 4.0), ('A', '2024-01', 6.0)])
+    frame['UPC'] = ['123', '999']
+    result = ledger.recoup(frame, 'Month')
+    assert result['Release'].tolist() == ['123']
+    assert result['Balance'].tolist() == pytest.approx([6.0])
+
+
+def test_date_range_leaving_out_statement_rows():
+    assert not leaves_out_dates(pd.Timestamp('2024-01-05'), pd.Timestamp('2024-03-10'), '2024-01-01', '2024-03-31')
+    assert leaves_out_dates(pd.Timestamp('2023-12-31'), pd.Timestamp('2024-03-10'), '2024-01-01', '2024-03-31')
+    assert leaves_out_dates(pd.Timestamp('2024-01-05'), pd.Timestamp('2024-04-01'), '2024-01-01', '2024-03-31')
+    # Nothing dated means nothing left out
+    assert not leaves_out_dates(pd.NaT, pd.NaT, '2024-01-01', '2024-03-31')
+
+
+def test_archive_range_is_compared_with_the_whole_archive(tmp_path):
+    store = LineItemStore(str(tmp_path / 'store.sqlite'))
+    assert store.date_range() == (None, None)
+    store.add_statement('digest', 'a.csv', pd.DataFrame({
+        'Date': pd.to_datetime(['2024-01-05', '2024-02-10', '2024-03-20']),
+        'Track': ['A', 'A', 'A'],
+        'Artist': ['X', 'X', 'X'],
+        'Revenue': [1.0, 2.0, 3.0]
+    }))
+
+    # A query limited to February only returns February rows, so the rows
+    # loaded for the analysis never fall outside the range
+    start_date, end_date = pd.Timestamp('2024-02-01'), pd.Timestamp('2024-02-29')
+    items = store.query_rollup('month', start_date, end_date)
+    assert not leaves_out_dates(items['Date'].min(), items['Date'].max(), start_date, end_date)
+
+    first_date, last_date = store.date_range()
+    assert (first_date, last_date) == (pd.Timestamp('2024-01-05'), pd.Timestamp('2024-03-20'))
+    assert leaves_out_dates(first_date, last_date, start_date, end_date)
+    assert not leaves_out_dates(first_date, last_date, pd.Timestamp('2024-01-01'), pd.Timestamp('2024-03-31'))
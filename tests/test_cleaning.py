@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning import clean_revenue, clean_text, map_unique, parse_dates, parse_revenue
+
+
+def clean_cells(frame):
+    """Per-cell cleaning the per-unique functions replaced, kept as the reference output"""
+    return pd.DataFrame({
+        'Track': frame['Track'].fillna('').astype(str).str.strip(),
+        'Artist': frame['Artist'].fillna('').astype(str).str.strip(),
+        'Date': pd.to_datetime(frame['Date'], errors='coerce'),
+        'Revenue': frame['Revenue'].apply(parse_revenue)
+    })
+
+
+def clean_unique(frame):
+    return pd.DataFrame({
+        'Track': clean_text(frame['Track']),
+        'Artist': clean_text(frame['Artist']),
+        'Date': parse_dates(frame['Date']),
+        'Revenue': clean_revenue(frame['Revenue'])
+    })
+
+
+def statement(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    tracks = np.array([f" Track {i} " for i in range(200)] + [None, np.nan, '', '  '], dtype=object)
+    artists = np.array([f"Artist {i}" for i in range(20)] + [None, 42], dtype=object)
+    dates = np.array([f"2024-{month:02d}-01" for month in range(1, 13)] + [None, 'not a date', ''], dtype=object)
+    amounts = np.array(
+        [f"{value:.4f}".replace('.', ',') for value in rng.random(100)] +
+        ['€1,50', '$2.25', ' 3 ', '', None, 'n/a', 4.5], dtype=object)
+    return pd.DataFrame({
+        'Track': tracks[rng.integers(0, len(tracks), rows)],
+        'Artist': artists[rng.integers(0, len(artists), rows)],
+        'Date': dates[rng.integers(0, len(dates), rows)],
+        'Revenue': amounts[rng.integers(0, len(amounts), rows)]
+    })
+
+
+def test_matches_per_cell_cleaning():
+    frame = statement(20000)
+    pd.testing.assert_frame_equal(clean_unique(frame), clean_cells(frame))
+
+
+def test_keeps_the_index():
+    frame = statement(100).set_index(pd.RangeIndex(1000, 1100))
+    cleaned = clean_unique(frame)
+    assert cleaned.index.equals(frame.index)
+    pd.testing.assert_frame_equal(cleaned, clean_cells(frame))
+
+
+def test_na_handling():
+    values = pd.Series([None, np.nan, pd.NA, ' a '], dtype=object)
+    assert clean_text(values).tolist() == ['', '', '', 'a']
+    assert clean_revenue(values).tolist() == [0.0, 0.0, 0.0, 0.0]
+    assert parse_dates(values).isna().all()
+
+
+def test_all_missing_column():
+    values = pd.Series([None, None], index=[5, 6], name='Track', dtype=object)
+    cleaned = clean_text(values)
+    assert cleaned.tolist() == ['', '']
+    assert cleaned.index.tolist() == [5, 6] and cleaned.name == 'Track'
+
+
+def test_native_dtypes_are_not_reparsed():
+    numbers = pd.Series([1.5, np.nan, 2])
+    assert clean_revenue(numbers).tolist() == [1.5, 0.0, 2.0]
+    dates = pd.Series(pd.to_datetime(['2024-01-01', None]))
+    assert parse_dates(dates) is dates
+
+
+def test_functions_see_each_distinct_value_once():
+    seen = []
+
+    def record(uniques):
+        seen.extend(uniques.tolist())
+        return uniques.str.upper()
+
+    values = pd.Series(['a', 'b', 'a', None, 'b'], dtype=object)
+    assert map_unique(values, record, '').tolist() == ['A', 'B', 'A', '', 'B']
+    assert seen == ['a', 'b']
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('1,50', 1.5), ('€ 2.25', 2.25), ('$3', 3.0), ('', 0.0), (None, 0.0), ('abc', 0.0), (7, 7.0)
+])
+def test_parse_revenue(value, expected):
+    assert parse_revenue(value) == expected
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from consolidation import build_aggregation_spec, consolidate_results, join_unique, run_aggregation
+from result_set import ResultSet
+
+
+def consolidate_loop(results):
+    """The dict loop consolidation replaced, kept as the reference output"""
+    consolidated_results = {}
+    for result in results:
+        key = (result['Period'], result['Track'])
+        if key not in consolidated_results:
+            consolidated_results[key] = result.copy()
+        else:
+            total_rev = float(consolidated_results[key]['Total Revenue'].split()[0]) + float(result['Total Revenue'].split()[0])
+            artist_rev = float(consolidated_results[key]['Artist Revenue'].split()[0]) + float(result['Artist Revenue'].split()[0])
+            currency = result['Total Revenue'].split()[1]
+            consolidated_results[key]['Total Revenue'] = f"{total_rev:.2f} {currency}"
+            consolidated_results[key]['Artist Revenue'] = f"{artist_rev:.2f} {currency}"
+    return list(consolidated_results.values())
+
+
+def random_results(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return ResultSet.from_columns({
+        'Period': rng.choice(np.array(['2024-01', '2024-02', 'Q1 2024'], dtype=object), rows),
+        'Track': np.array([f"Track {i}" for i in range(40)], dtype=object)[rng.integers(0, 40, rows)],
+        # Amounts with more than two decimals and half-cent values
+        'Total Revenue': np.round(rng.random(rows) * 100, 3) + rng.choice([0, 0.005], rows),
+        'Artist Revenue': rng.random(rows) * 0.1,
+        'Currency': ['EUR'] * rows
+    })
+
+
+def test_matches_rounded_loop():
+    results = random_results(5000)
+    expected = consolidate_loop(results.to_records())
+    actual = consolidate_results(results).to_records()
+
+    columns = ['Period', 'Track', 'Total Revenue', 'Artist Revenue']
+    assert [[row[c] for c in columns] for row in actual] == [[row[c] for c in columns] for row in expected]
+
+
+def test_sources_listed_once_in_first_seen_order():
+    results = ResultSet.from_records([
+        {'Period': '2024-01', 'Track': 'A', 'Total Revenue': '1.00 EUR', 'Artist Revenue': '0.50 EUR', 'Source': 'Believe'},
+        {'Period': '2024-01', 'Track': 'A', 'Total Revenue': '2.00 EUR', 'Artist Revenue': '1.00 EUR', 'Source': 'Tunecore'},
+        {'Period': '2024-01', 'Track': 'A', 'Total Revenue': '3.00 EUR', 'Artist Revenue': '1.50 EUR', 'Source': 'Believe'},
+        {'Period': '2024-01', 'Track': 'B', 'Total Revenue': '4.00 EUR', 'Artist Revenue': '2.00 EUR', 'Source': 'Tunecore'},
+    ])
+    records = consolidate_results(results).to_records()
+    assert [(r['Track'], r['Total Revenue'], r['Source']) for r in records] == [
+        ('A', '6.00 EUR', 'Believe, Tunecore'),
+        ('B', '4.00 EUR', 'Tunecore'),
+    ]
+
+
+def test_join_unique():
+    joined = join_unique(np.array([0, 1, 0, 0, 1]), np.array(['x', 'y', 'z', 'x', ''], dtype=object))
+    assert joined.to_dict() == {0: 'x, z', 1: 'y'}
+
+
+def test_run_aggregation():
+    frame = pd.DataFrame({
+        'Track': ['A', 'A', 'B'],
+        'Store': ['Spotify', 'Deezer', 'Spotify'],
+        'Country': ['FR', 'US', 'FR'],
+        'Revenue': [1.0, 2.0, 3.0]
+    })
+    spec = build_aggregation_spec(['Track'], {'Country': 'join', 'Revenue': 'sum'}, frame.columns)
+    result = run_aggregation(frame, spec)
+    assert result.to_dict('records') == [
+        {'Track': 'A', 'Store': 'Spotify, Deezer', 'Country': 'FR; US', 'Revenue': 3.0},
+        {'Track': 'B', 'Store': 'Spotify', 'Country': 'FR', 'Revenue': 3.0},
+    ]
+
+
+def test_join_unique_skewed_groups():
+    # One large group of distinct ids next to many single-row groups
+    rows = 200000
+    groups = np.concatenate([np.zeros(rows, dtype=np.int64), np.arange(1, 1001)])
+    values = np.array([f"ID{i}" for i in range(rows + 1000)], dtype=object)
+    joined = join_unique(groups, values)
+    assert len(joined) == 1001
+    assert joined[0].startswith('ID0, ID1, ') and joined[0].endswith(f", ID{rows - 1}")
+    assert joined[1000] == f"ID{rows + 999}"
+
+
+def test_run_aggregation_sums_statement_amounts():
+    frame = pd.DataFrame({
+        'Track': ['A', 'A', 'B', 'B'],
+        'Revenue': ['€1,23', '$2.00', '', None],
+        'Note': ['x', None, 'y', 'z']
+    })
+    spec = build_aggregation_spec(['Track'], {'Revenue': 'sum', 'Note': 'join'}, frame.columns)
+    result = run_aggregation(frame, spec)
+    assert result['Revenue'].tolist() == pytest.approx([3.23, 0.0])
+    assert result['Note'].tolist() == ['x', 'y; z']
@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from currency import FxRates
+
+
+@pytest.fixture
+def fx(tmp_path):
+    (tmp_path / 'EUR_USD.csv').write_text('Date,Rate\n2024-01-01,1.10\n2024-02-01,1.20\n2024-03-01,bad\n')
+    return FxRates(str(tmp_path))
+
+
+def test_latest_rate_on_or_before_each_date(fx):
+    dates = pd.to_datetime(['2024-01-15', '2024-02-01', '2024-03-10', '2023-06-01'])
+    converted = fx.convert([10.0, 10.0, 10.0, 10.0], dates, 'EUR', 'USD')
+    # Unparseable rates are ignored, dates before the table use its first rate
+    assert converted.tolist() == pytest.approx([11.0, 12.0, 12.0, 11.0])
+
+
+def test_inverse_table(fx):
+    assert fx.has_rates('USD', 'EUR')
+    converted = fx.convert([11.0, 12.0], ['2024-01-15', '2024-02-15'], 'USD', 'EUR')
+    assert converted.tolist() == pytest.approx([10.0, 10.0])
+
+
+def test_undated_rows_convert_to_nan(fx):
+    converted = fx.convert([10.0, 10.0, 10.0], [pd.NaT, '2024-01-15', 'not a date'], 'EUR', 'USD')
+    assert np.isnan(converted[0]) and np.isnan(converted[2])
+    assert converted[1] == pytest.approx(11.0)
+
+
+def test_same_currency_is_unchanged(fx):
+    assert fx.has_rates('GBP', 'GBP')
+    assert fx.convert([1.5, 2.0], [pd.NaT, pd.NaT], 'GBP', 'GBP').tolist() == [1.5, 2.0]
+
+
+def test_missing_rates(fx, tmp_path):
+    assert not fx.has_rates('EUR', 'GBP')
+    with pytest.raises(ValueError):
+        fx.convert([1.0], ['2024-01-01'], 'EUR', 'GBP')
+    (tmp_path / 'EUR_GBP.csv').write_text('date,rate\n')
+    with pytest.raises(ValueError):
+        fx.convert([1.0], ['2024-01-01'], 'EUR', 'GBP')
+
+
+def test_tables_are_reloaded_when_changed(fx, tmp_path):
+    path = tmp_path / 'EUR_USD.csv'
+    assert fx.convert([10.0], ['2024-01-15'], 'EUR', 'USD')[0] == pytest.approx(11.0)
+    assert fx.rates('EUR', 'USD') is fx.rates('EUR', 'USD')
+
+    path.write_text('date,rate\n2024-01-01,1.50\n')
+    os.utime(path, (os.path.getatime(path), os.path.getmtime(path) + 1))
+    assert fx.convert([10.0], ['2024-01-15'], 'EUR', 'USD')[0] == pytest.approx(15.0)
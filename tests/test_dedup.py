@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from dedup import DedupIndex, row_hashes
+
+
+def test_row_hashes_ignore_whitespace_and_column_order():
+    a = pd.DataFrame({'Track': ['A ', 'B'], 'Revenue': ['1.0', '2.0']})
+    b = pd.DataFrame({'Revenue': ['1.0', '2.0'], 'Track': ['A', 'B']})
+    assert row_hashes(a, ['Track', 'Revenue']).tolist() == row_hashes(b, ['Track', 'Revenue']).tolist()
+
+
+def test_repeated_rows_get_distinct_hashes():
+    df = pd.DataFrame({'Track': ['A', 'A', 'B']})
+    hashes = row_hashes(df).tolist()
+    assert len(set(hashes)) == 3
+    # A file with the row once only overlaps the first occurrence
+    assert row_hashes(pd.DataFrame({'Track': ['A']})).tolist() == hashes[:1]
+
+
+def test_missing_key_columns_fall_back_to_all_columns():
+    df = pd.DataFrame({'Track': ['A', 'B'], 'Revenue': [1.0, 2.0]})
+    assert row_hashes(df, ['ISRC']).tolist() == row_hashes(df).tolist()
+    assert row_hashes(df, ['Track', 'ISRC']).tolist() == row_hashes(df, ['Track']).tolist()
+
+
+def test_check_flags_rows_from_other_statements(tmp_path):
+    index = DedupIndex(str(tmp_path))
+    first = row_hashes(pd.DataFrame({'Track': ['A', 'B', 'C']}))
+    second = row_hashes(pd.DataFrame({'Track': ['C', 'D']}))
+
+    assert not index.check(first, 'a.csv').any()
+    assert index.check(second, 'b.csv').tolist() == [True, False]
+    # Re-reading a statement does not flag its own rows
+    assert not index.check(first, 'a.csv').any()
+    assert len(index) == 4
+
+
+def test_index_persists(tmp_path):
+    index = DedupIndex(str(tmp_path))
+    hashes = row_hashes(pd.DataFrame({'Track': ['A', 'B']}))
+    index.check(hashes, 'a.csv')
+    index.save()
+    assert not index.dirty
+
+    reloaded = DedupIndex(str(tmp_path))
+    assert reloaded.lookup(hashes).tolist() == [0, 0]
+    assert reloaded.check(hashes, 'b.csv').all()
+
+
+def test_corrupt_index_starts_empty(tmp_path):
+    (tmp_path / 'row_hashes.npz').write_bytes(b'not an archive')
+    (tmp_path / 'sources.json').write_text('[]')
+    index = DedupIndex(str(tmp_path))
+    assert len(index) == 0
+
+
+def test_index_stays_sorted_as_statements_are_added(tmp_path):
+    index = DedupIndex(str(tmp_path))
+    rng = np.random.default_rng(0)
+    added = []
+    for source in range(5):
+        hashes = rng.integers(0, 2 ** 63, 1000, dtype=np.uint64)
+        # Half of each statement overlaps the one before
+        if added:
+            hashes[:500] = added[-1][:500]
+        index.check(hashes, f"{source}.csv")
+        added.append(hashes)
+    assert (np.diff(index.hashes.astype(np.float64)) >= 0).all()
+    assert len(index) == len(np.unique(np.concatenate(added)))
+    assert index.lookup(added[0]).tolist() == [0] * 1000
+    assert index.source_ids.dtype == np.int32
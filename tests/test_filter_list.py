@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt6.QtCore import QItemSelectionModel
+from PyQt6.QtWidgets import QApplication
+
+from filter_list import DistinctValuesModel, SearchableFilterList
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def displayed(model):
+    return [model.value(row) for row in range(model.rowCount())]
+
+
+def test_values_are_distinct_and_sorted_without_case(app):
+    model = DistinctValuesModel('All Tracks')
+    model.set_values(['beta', 'Alpha', 'gamma', 'beta'])
+    assert displayed(model) == ['All Tracks', 'Alpha', 'beta', 'gamma']
+
+
+def test_search_lists_prefix_matches_first(app):
+    model = DistinctValuesModel('All Tracks')
+    model.set_values(['Another Love', 'Love Story', 'Lovely', 'Glove', 'Rain'])
+    model.set_search_text(' LOVE ')
+    assert displayed(model) == ['All Tracks', 'Love Story', 'Lovely', 'Another Love', 'Glove']
+    model.set_search_text('')
+    assert model.rowCount() == 6
+
+
+def test_model_without_label(app):
+    model = DistinctValuesModel()
+    model.set_values(['b', 'a'])
+    assert displayed(model) == ['a', 'b']
+    assert model.data(model.index(0)) == 'a'
+
+
+def select(widget, value):
+    for row in range(widget.model.rowCount()):
+        if widget.model.value(row) == value:
+            widget.view.selectionModel().select(widget.model.index(row), QItemSelectionModel.SelectionFlag.Select)
+
+
+def test_selection_survives_search_and_repopulating(app):
+    widget = SearchableFilterList('All Tracks')
+    widget.set_values(['Alpha', 'Beta', 'Gamma'])
+    select(widget, 'Gamma')
+    select(widget, 'Alpha')
+    assert widget.selected_values() == ['Alpha', 'Gamma']
+
+    # Hidden values stay selected while searching
+    widget.search_input.setText('gam')
+    assert widget.selected_values() == ['Alpha', 'Gamma']
+    assert [index.row() for index in widget.view.selectionModel().selectedRows()] == [1]
+    widget.search_input.setText('')
+
+    # Values that disappear are deselected
+    widget.set_values(['Alpha', 'Delta'])
+    assert widget.selected_values() == ['Alpha']
+    select(widget, 'All Tracks')
+    assert widget.selected_values() == ['All Tracks', 'Alpha']
+
+    widget.clear()
+    assert widget.selected_values() == [] and widget.model.rowCount() == 1
+
+
+def test_large_catalog(app):
+    widget = SearchableFilterList('All Tracks')
+    widget.set_values([f"Track {i}" for i in range(50000)])
+    widget.search_input.setText('track 4999')
+    assert displayed(widget.model)[:3] == ['All Tracks', 'Track 4999', 'Track 49990']
@@ -0,0 +1,82 @@
+import os
+
+import pandas as pd
+
+from fingerprints import FingerprintRegistry, file_fingerprint
+
+
+def write(path, text, mtime_offset=0):
+    path.write_text(text)
+    if mtime_offset:
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset * 10 ** 9))
+
+
+def test_unchanged_files_are_hashed_once(tmp_path, monkeypatch):
+    registry = FingerprintRegistry(str(tmp_path / 'cache'))
+    path = tmp_path / 'a.csv'
+    write(path, 'Track\nSong\n')
+    digest = registry.fingerprint(str(path))
+    assert digest == file_fingerprint(str(path))
+
+    monkeypatch.setattr('fingerprints.file_fingerprint', lambda *args: 'rehashed')
+    assert registry.fingerprint(str(path)) == digest
+    write(path, 'Track\nOther\n', mtime_offset=1)
+    assert registry.fingerprint(str(path)) == 'rehashed'
+
+
+def test_unrecorded_paths_stay_changed(tmp_path):
+    registry = FingerprintRegistry(str(tmp_path / 'cache'))
+    path = tmp_path / 'a.csv'
+    write(path, 'Track\nSong\n')
+    digest = registry.fingerprint(str(path), record=False)
+    assert registry.current_digest(str(path)) is None
+    registry.record(str(path), digest, os.stat(path))
+    assert registry.current_digest(str(path)) == digest
+
+
+def test_saves_are_batched(tmp_path):
+    registry = FingerprintRegistry(str(tmp_path / 'cache'))
+    for name in ('a.csv', 'b.csv'):
+        write(tmp_path / name, f'Track\n{name}\n')
+        registry.fingerprint(str(tmp_path / name))
+    assert not os.path.exists(registry.registry_file)
+    registry.save()
+    assert len(FingerprintRegistry(str(tmp_path / 'cache')).paths) == 2
+
+
+def test_replaced_content_drops_its_parsed_copy(tmp_path):
+    registry = FingerprintRegistry(str(tmp_path / 'cache'))
+    shared = tmp_path / 'copy.csv'
+    path = tmp_path / 'a.csv'
+    write(path, 'Track\nSong\n')
+    write(shared, 'Track\nSong\n')
+    old = registry.fingerprint(str(path))
+    registry.store_frame(old, pd.DataFrame({'Track': ['Song']}))
+
+    # Another path still holds the old content
+    registry.fingerprint(str(shared))
+    write(path, 'Track\nOther\n', mtime_offset=1)
+    registry.fingerprint(str(path))
+    assert registry.load_frame(old) is not None
+
+    write(shared, 'Track\nThird\n', mtime_offset=1)
+    registry.fingerprint(str(shared))
+    assert registry.load_frame(old) is None
+
+
+def test_least_recently_used_copies_are_evicted(tmp_path):
+    frame = pd.DataFrame({'Track': ['x' * 1000]})
+    registry = FingerprintRegistry(str(tmp_path / 'cache'), max_cache_bytes=1)
+    registry.store_frame('a', frame)
+    size = os.path.getsize(registry.cache_path('a'))
+    registry.max_cache_bytes = size * 2
+
+    registry.store_frame('b', frame)
+    os.utime(registry.cache_path('a'), (0, 0))
+    os.utime(registry.cache_path('b'), (1, 1))
+    # Reading a copy makes it the most recently used
+    assert registry.load_frame('a') is not None
+    registry.store_frame('c', frame)
+    assert registry.load_frame('b') is None
+    assert registry.load_frame('a') is not None and registry.load_frame('c') is not None
@@ -0,0 +1,131 @@
+import gzip
+import os
+import zipfile
+from datetime import date, datetime
+
+import pytest
+
+import ingest
+from ingest import (open_statement, read_statement, read_statement_header, sniff_csv, statement_exists,
+                    statement_name, statement_paths)
+
+CSV = 'Track,Artist,Revenue\nSong,Artist,1.50\nOther,Artist,2.00\n'
+
+
+def test_plain_csv(tmp_path):
+    path = tmp_path / 'a.csv'
+    path.write_text(CSV)
+    assert statement_paths(str(path)) == [str(path)]
+    assert read_statement(str(path))['Revenue'].tolist() == [1.5, 2.0]
+
+
+def test_preamble_delimiter_and_encoding(tmp_path):
+    path = tmp_path / 'a.csv'
+    path.write_bytes('Royalty statement\nJanuary 2024\nTrack;Artist;Revenue\nCafé;Ané;1.50\nSong;Ané;2.00\n'.encode('cp1252'))
+    sniff = sniff_csv(str(path))
+    assert (sniff.encoding, sniff.delimiter, sniff.header_row) == ('cp1252', ';', 2)
+    assert sniff.is_current(str(path))
+    df = read_statement(str(path), sniff)
+    assert df.columns.tolist() == ['Track', 'Artist', 'Revenue']
+    assert df['Track'].tolist() == ['Café', 'Song']
+
+
+def test_utf8_bom(tmp_path):
+    path = tmp_path / 'a.csv'
+    path.write_bytes(CSV.encode('utf-8-sig'))
+    assert read_statement_header(str(path)) == ['Track', 'Artist', 'Revenue']
+
+
+def test_gzip(tmp_path):
+    path = tmp_path / 'a.csv.gz'
+    with gzip.open(path, 'wt') as f:
+        f.write(CSV)
+    assert statement_paths(str(path)) == [str(path)]
+    assert read_statement(str(path))['Track'].tolist() == ['Song', 'Other']
+
+
+def test_zip_members(tmp_path):
+    path = tmp_path / 'export.zip'
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('2024-01.csv', CSV)
+        archive.writestr('reports/2024-02.csv', CSV.replace('Song', 'Later'))
+        archive.writestr('readme.txt', 'not a statement')
+        archive.writestr('__MACOSX/._2024-01.csv', 'metadata')
+
+    members = statement_paths(str(path))
+    assert members == [f"{path}::2024-01.csv", f"{path}::reports/2024-02.csv"]
+    assert statement_name(members[1]) == 'export.zip::2024-02.csv'
+    assert read_statement(members[1])['Track'].tolist() == ['Later', 'Other']
+    assert statement_exists(members[0])
+    assert not statement_exists(f"{path}::missing.csv")
+    assert not statement_exists(str(tmp_path / 'missing.zip'))
+
+
+def test_bad_zip_does_not_exist(tmp_path):
+    path = tmp_path / 'export.zip'
+    path.write_bytes(b'not a zip')
+    assert not statement_exists(f"{path}::a.csv")
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    cache_dir = ingest.SHEET_CACHE_DIR
+    ingest.set_sheet_cache_dir(str(tmp_path / 'sheets'))
+    path = tmp_path / 'report.xlsx'
+    book = openpyxl.Workbook()
+    sales = book.active
+    sales.title = 'Sales'
+    sales.append(['Royalty statement'])
+    sales.append([])
+    sales.append(['Track', 'Date', 'Revenue', 'Note'])
+    sales.append(['Song', datetime(2024, 1, 5), 1.5, None])
+    sales.append(['Other', datetime(2024, 1, 5, 10, 30), 2, 'late'])
+    book.create_sheet('Summary').append(['Total', 3.5])
+    book.save(path)
+    yield path
+    ingest.set_sheet_cache_dir(cache_dir)
+
+
+def test_workbook_sheets(workbook):
+    sheets = statement_paths(str(workbook))
+    assert sheets == [f"{workbook}::Sales", f"{workbook}::Summary"]
+    assert statement_exists(sheets[0])
+    assert not statement_exists(f"{workbook}::Missing")
+
+
+def test_sheet_is_converted_once(workbook, tmp_path):
+    sheet = f"{workbook}::Sales"
+    sniff = sniff_csv(sheet)
+    assert sniff.header_row == 2
+    df = read_statement(sheet, sniff)
+    assert df.columns.tolist() == ['Track', 'Date', 'Revenue', 'Note']
+    assert df['Date'].tolist() == ['2024-01-05', '2024-01-05 10:30:00']
+    assert df['Revenue'].tolist() == [1.5, 2.0]
+
+    converted = os.listdir(tmp_path / 'sheets')
+    assert len(converted) == 1
+    mtime = os.stat(tmp_path / 'sheets' / converted[0]).st_mtime_ns
+    with open_statement(sheet) as f:
+        f.read()
+    assert os.stat(tmp_path / 'sheets' / converted[0]).st_mtime_ns == mtime
+
+
+def test_changed_workbook_replaces_its_conversion(workbook, tmp_path):
+    import openpyxl
+    sheet = f"{workbook}::Sales"
+    read_statement(sheet)
+    book = openpyxl.load_workbook(workbook)
+    book['Sales'].append(['New', datetime(2024, 2, 1), 3.0])
+    book.save(workbook)
+    os.utime(workbook, ns=(os.stat(workbook).st_atime_ns, os.stat(workbook).st_mtime_ns + 10 ** 9))
+
+    assert read_statement(sheet)['Track'].tolist() == ['Song', 'Other', 'New']
+    assert len(os.listdir(tmp_path / 'sheets')) == 1
+
+
+def test_sheet_cell_text():
+    assert ingest.sheet_cell_text(None) == ''
+    assert ingest.sheet_cell_text(datetime(2024, 3, 1)) == '2024-03-01'
+    assert ingest.sheet_cell_text(date(2024, 3, 1)) == '2024-03-01'
+    assert ingest.sheet_cell_text(1.25) == '1.25'
@@ -0,0 +1,35 @@
+import sys
+
+import pytest
+
+from lazy_import import LazyModule, is_loaded, lazy_import
+
+
+@pytest.fixture
+def lazy_module(tmp_path, monkeypatch):
+    (tmp_path / 'lazy_sample.py').write_text(
+        "VALUE = 1\n"
+        "\n"
+        "def __getattr__(name):\n"
+        "    if name == 'DYNAMIC':\n"
+        "        return 2\n"
+        "    raise AttributeError(name)\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield LazyModule('lazy_sample')
+    sys.modules.pop('lazy_sample', None)
+
+
+def test_imports_on_first_use(lazy_module):
+    assert not is_loaded('lazy_sample')
+    assert lazy_module.VALUE == 1
+    assert is_loaded('lazy_sample')
+    assert lazy_import('lazy_sample') is sys.modules['lazy_sample']
+
+
+def test_module_getattr_is_delegated_after_loading(lazy_module):
+    assert lazy_module.VALUE == 1
+    assert lazy_module.DYNAMIC == 2
+    with pytest.raises(AttributeError):
+        lazy_module.MISSING
+    assert 'VALUE' in dir(lazy_module)
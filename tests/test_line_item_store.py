@@ -0,0 +1,68 @@
+import sqlite3
+
+import pandas as pd
+
+from line_item_store import LineItemStore, month_aligned
+
+
+def items():
+    return pd.DataFrame({
+        'Date': pd.to_datetime(['2024-01-05', '2024-01-05', '2024-02-10', None]),
+        'Track': ['A', 'A', 'B', 'C'],
+        'Artist': ['X', 'X', 'Y', 'Z'],
+        'UPC': ['1', '1', '2', '3'],
+        'Revenue': [1.0, 2.0, 3.0, 4.0]
+    })
+
+
+def test_statement_stored_once_per_mapping(tmp_path):
+    store = LineItemStore(str(tmp_path / 'store.sqlite'))
+    assert store.add_statement('digest', 'a.csv', items(), 'Believe', 'EUR', mapping='m1')
+    assert store.has_statement('digest', 'm1')
+    assert not store.has_statement('digest', 'm2')
+
+    # The same statement and mapping is not written again
+    assert not store.add_statement('digest', 'a.csv', items(), 'Believe', 'EUR', mapping='m1')
+    assert store.statement_count() == 1
+    assert store.table_size('line_items') == 3
+
+    # Another mapping replaces the rows
+    assert store.add_statement('digest', 'a.csv', items().iloc[:2], 'Believe', 'EUR', mapping='m2')
+    assert store.statement_count() == 1
+    assert store.table_size('line_items') == 2
+
+
+def test_rollups(tmp_path):
+    store = LineItemStore(str(tmp_path / 'store.sqlite'))
+    store.add_statement('digest', 'a.csv', items(), 'Believe', 'EUR')
+    daily = store.query_rollup('day')
+    monthly = store.query_rollup('month', tracks=['A'])
+    assert len(daily) == 2
+    assert monthly['Revenue'].tolist() == [3.0]
+    assert monthly['Items'].tolist() == [2]
+
+
+def test_archive_without_mapping_column(tmp_path):
+    db_path = str(tmp_path / 'store.sqlite')
+    connection = sqlite3.connect(db_path)
+    connection.execute("CREATE TABLE statements (id INTEGER PRIMARY KEY, digest TEXT UNIQUE NOT NULL, "
+                       "name TEXT, source TEXT, currency TEXT, rows INTEGER, added TEXT)")
+    connection.close()
+    store = LineItemStore(db_path)
+    assert store.add_statement('digest', 'a.csv', items(), mapping='m1')
+    assert store.has_statement('digest', 'm1')
+
+
+def test_month_aligned():
+    assert month_aligned('2024-01-01', '2024-03-31')
+    assert not month_aligned('2024-01-02', '2024-03-31')
+    assert not month_aligned('2024-01-01', '2024-03-30')
+
+
+def test_filters_on_more_values_than_sql_variables(tmp_path):
+    store = LineItemStore(str(tmp_path / 'store.sqlite'))
+    store.add_statement('digest', 'a.csv', items(), 'Believe', 'EUR')
+    tracks = ['A'] + [f"Track {i}" for i in range(100000)]
+    assert store.query(tracks=tracks)['Revenue'].sum() == 3.0
+    rollup = store.query_rollup('day', tracks=tracks, artists=['X', "O'Brien"])
+    assert rollup['Items'].tolist() == [2]
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from periods import (MISSING, format_period, month_codes, parse_period_labels, period_codes,
+                     period_labels, period_start_months)
+
+
+def test_month_codes():
+    codes = month_codes(pd.to_datetime(['2024-01-31', None, '2023-12-01']))
+    assert codes.tolist() == [2024 * 12, MISSING, 2023 * 12 + 11]
+
+
+def test_calendar_periods():
+    months = month_codes(pd.to_datetime(['2024-02-10', '2024-05-01', None]))
+    assert period_labels(period_codes(months, 'Month'), 'Month').tolist() == ['2024-02', '2024-05', '']
+    assert period_labels(period_codes(months, 'Quarter'), 'Quarter').tolist() == ['2024-Q1', '2024-Q2', '']
+    assert period_labels(period_codes(months, 'Year'), 'Year').tolist() == ['2024', '2024', '']
+
+
+def test_fiscal_periods_are_named_after_the_year_they_end_in():
+    months = month_codes(pd.to_datetime(['2024-06-30', '2024-07-01', '2024-10-15', None]))
+    quarters = period_codes(months, 'Quarter', fiscal_start=7)
+    assert period_labels(quarters, 'Quarter', 7).tolist() == ['FY2024-Q4', 'FY2025-Q1', 'FY2025-Q2', '']
+    years = period_codes(months, 'Year', fiscal_start=7)
+    assert period_labels(years, 'Year', 7).tolist() == ['FY2024', 'FY2025', 'FY2025', '']
+
+    # Period codes map back to the calendar month they start in
+    starts = period_start_months(quarters, 'Quarter', 7)
+    assert starts.tolist() == [2024 * 12 + 3, 2024 * 12 + 6, 2024 * 12 + 9, MISSING]
+
+
+def test_period_codes_order_like_time():
+    months = np.arange(2023 * 12, 2026 * 12)
+    for grain in ('Month', 'Quarter', 'Year'):
+        for fiscal_start in (1, 4, 7):
+            codes = period_codes(months, grain, fiscal_start)
+            assert (np.diff(codes) >= 0).all()
+            assert (period_start_months(codes, grain, fiscal_start) <= months).all()
+
+
+def test_format_missing_period():
+    assert format_period(MISSING, 'Quarter') == ''
+
+
+def test_parse_period_labels():
+    starts, lengths = parse_period_labels(['2024-03', '2024-Q2', '2024', 'FY2025-Q1', 'March', None, '2024-03'])
+    assert starts.tolist() == [2024 * 12 + 2, 2024 * 12 + 3, 2024 * 12, MISSING, MISSING, MISSING, 2024 * 12 + 2]
+    assert lengths.tolist() == [1, 3, 12, 0, 0, 0, 1]
+
+
+def test_parse_round_trips_calendar_labels():
+    months = np.arange(2023 * 12, 2025 * 12)
+    for grain in ('Month', 'Quarter', 'Year'):
+        codes = period_codes(months, grain)
+        starts, _ = parse_period_labels(period_labels(codes, grain))
+        assert starts.tolist() == period_start_months(codes, grain).tolist()
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from result_export import export_format, with_export_extension, write_results
+from result_set import ResultSet
+
+COLUMNS = ['Period', 'Track', 'Total Revenue', 'Artist Revenue', 'Artist', 'UPC', 'Source']
+
+
+def results():
+    return ResultSet.from_columns({
+        'Period': ['2024-01', '2024-01', '2024-02'],
+        'Track': ['Song', 'Other', 'Song'],
+        'Artist': ['A', 'B', 'A'],
+        'Total Revenue': [1.5, 2.25, 3.0],
+        'Artist Revenue': [0.75, 1.0, 1.5],
+        'Currency': ['EUR', 'EUR', 'USD']
+    })
+
+
+def test_export_format():
+    assert export_format('out.PARQUET') == 'parquet'
+    assert export_format('out.xlsx') == 'xlsx'
+    assert export_format('out.txt') == 'csv'
+    assert with_export_extension('out', 'Parquet Files (*.parquet)') == 'out.parquet'
+    assert with_export_extension('out.csv', 'Parquet Files (*.parquet)') == 'out.csv'
+    assert with_export_extension('out', None) == 'out.csv'
+
+
+def test_csv_keeps_displayed_amounts(tmp_path):
+    path = str(tmp_path / 'out.csv')
+    assert write_results(results(), COLUMNS, path, chunk_rows=2) == 3
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    assert df.columns.tolist() == COLUMNS
+    assert df['Total Revenue'].tolist() == ['1.50 EUR', '2.25 EUR', '3.00 USD']
+    # Columns missing from the results are written empty
+    assert df['UPC'].tolist() == ['', '', '']
+
+
+def test_mask_selects_rows(tmp_path):
+    rs = results()
+    path = str(tmp_path / 'out.csv')
+    assert write_results(rs, COLUMNS, path, mask=rs.search_mask('song')) == 2
+    assert pd.read_csv(path)['Period'].tolist() == ['2024-01', '2024-02']
+
+
+def test_empty_selection_writes_the_header(tmp_path):
+    rs = results()
+    path = str(tmp_path / 'out.csv')
+    assert write_results(rs, COLUMNS, path, mask=rs.search_mask('missing')) == 0
+    df = pd.read_csv(path)
+    assert df.columns.tolist() == COLUMNS
+    assert df.empty
+
+
+def test_parquet_has_typed_amounts(tmp_path):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'out.parquet')
+    write_results(results(), COLUMNS, path, chunk_rows=2)
+    df = pd.read_parquet(path)
+    assert df.columns.tolist() == COLUMNS + ['Currency']
+    assert df['Total Revenue'].tolist() == [1.5, 2.25, 3.0]
+    assert df['Currency'].tolist() == ['EUR', 'EUR', 'USD']
+
+
+def test_xlsx_has_typed_amounts(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    path = str(tmp_path / 'out.xlsx')
+    rs = results()
+    write_results(rs, COLUMNS, path, mask=rs.mask(Artist='A'))
+    rows = list(openpyxl.load_workbook(path).active.iter_rows(values_only=True))
+    assert rows[0] == tuple(COLUMNS + ['Currency'])
+    assert [row[2] for row in rows[1:]] == [1.5, 3.0]
+
+
+def test_search_mask():
+    rs = results()
+    assert rs.search_mask('OTHER').tolist() == [False, True, False]
+    # Amounts are searched as displayed
+    assert rs.search_mask('usd').tolist() == [False, False, True]
+    assert rs.search_mask('song', columns=['Artist']).tolist() == [False, False, False]
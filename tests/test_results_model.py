@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication
+
+from result_set import ResultSet
+from results_model import ResultsTableModel
+
+HEADERS = ['Period', 'Artist', 'Track', 'Total Revenue']
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def results():
+    return ResultSet.from_records([
+        {'Period': '2024-02', 'Artist': 'Beta', 'Track': 'Rain', 'Total Revenue': '2.50 EUR', 'Artist Revenue': '1.25 EUR'},
+        {'Period': '2024-Q1', 'Artist': 'Alpha', 'Track': 'Sun', 'Total Revenue': '10.00 EUR', 'Artist Revenue': '5.00 EUR'},
+        {'Period': '2023-12', 'Artist': 'Alpha', 'Track': 'Moon', 'Total Revenue': '1.00 EUR', 'Artist Revenue': '0.50 EUR'},
+    ])
+
+
+def column(model, name):
+    j = model.headers.index(name)
+    return [model.data(model.index(i, j)) for i in range(model.rowCount())]
+
+
+def test_cells_are_formatted_from_the_result_set(app, results):
+    model = ResultsTableModel(results, HEADERS + ['UPC'])
+    assert model.rowCount() == 3 and model.columnCount() == 5
+    assert column(model, 'Track') == ['Rain', 'Sun', 'Moon']
+    assert column(model, 'Total Revenue') == ['2.50 EUR', '10.00 EUR', '1.00 EUR']
+    assert column(model, 'UPC') == ['', '', '']
+    assert model.headerData(3, Qt.Orientation.Horizontal) == 'Total Revenue'
+
+
+def test_mask_selects_rows(app, results):
+    model = ResultsTableModel(results, HEADERS)
+    model.set_mask(results.mask(Artist='Alpha') & results.search_mask('moon', HEADERS))
+    assert column(model, 'Track') == ['Moon']
+    # Amounts are still searched as displayed
+    model.set_mask(results.search_mask('10.00 eur', HEADERS))
+    assert column(model, 'Track') == ['Sun']
+    model.set_mask(np.zeros(len(results), dtype=bool))
+    assert model.rowCount() == 0
+
+
+def test_sorting_survives_filtering(app, results):
+    model = ResultsTableModel(results, HEADERS)
+    # Amounts sort by value and periods by date, not as text
+    model.sort(3, Qt.SortOrder.DescendingOrder)
+    assert column(model, 'Total Revenue') == ['10.00 EUR', '2.50 EUR', '1.00 EUR']
+    model.sort(0)
+    assert column(model, 'Period') == ['2023-12', '2024-Q1', '2024-02']
+
+    model.set_mask(results.mask(Artist='Alpha'))
+    assert column(model, 'Period') == ['2023-12', '2024-Q1']
+    model.sort(2)
+    assert column(model, 'Track') == ['Moon', 'Sun']
@@ -0,0 +1,66 @@
+import json
+
+import pandas as pd
+import pytest
+
+from royalties import RoyaltySplits, normalize_key, normalize_keys
+
+
+@pytest.fixture
+def splits(tmp_path):
+    return RoyaltySplits(str(tmp_path / 'splits' / 'royalty_splits.json'))
+
+
+def results():
+    return pd.DataFrame({
+        'Artist': ['Alpha', ' alpha ', 'Beta', 'Gamma', None],
+        'UPC': ['111', '222', '333', '', '111']
+    })
+
+
+def test_normalize_keys():
+    assert normalize_key('  The   Artist ') == 'the artist'
+    assert normalize_keys(pd.Series(['  The   Artist ', None, 'ÉTÉ'])).tolist() == ['the artist', '', 'été']
+
+
+def test_default_percentage_without_splits(splits):
+    assert len(splits) == 0
+    assert splits.percentages(results(), 70.0).tolist() == [70.0] * 5
+
+
+def test_upc_rates_take_precedence_over_artist_rates(splits):
+    splits.artists = {'alpha': 50.0, 'beta': 60.0}
+    splits.upcs = {'222': 80.0, '111': 40.0}
+    assert splits.percentages(results(), 70.0).tolist() == [40.0, 80.0, 60.0, 70.0, 40.0]
+
+
+def test_missing_columns_use_the_default(splits):
+    splits.artists = {'alpha': 50.0}
+    splits.upcs = {'111': 40.0}
+    frame = pd.DataFrame({'Track': ['A']})
+    assert splits.percentages(frame, 70.0).tolist() == [70.0]
+    assert splits.percentages(results()[['Artist']], 70.0).tolist() == [50.0, 50.0, 70.0, 70.0, 70.0]
+
+
+def test_import_csv(splits, tmp_path):
+    table = tmp_path / 'splits.csv'
+    table.write_text('Artist;UPC;Share\nAlpha;;50%\n;222;"80,5"\nBeta;;not a number\n')
+    splits.import_csv(str(table))
+    assert splits.artists == {'alpha': 50.0}
+    assert splits.upcs == {'222': 80.5}
+
+    # The table is saved and read back
+    with open(splits.splits_file) as f:
+        assert json.load(f) == {'artists': {'alpha': 50.0}, 'upcs': {'222': 80.5}}
+    reloaded = RoyaltySplits(splits.splits_file)
+    assert reloaded.percentages(results(), 70.0).tolist() == [50.0, 80.5, 70.0, 70.0, 70.0]
+
+
+def test_import_csv_needs_percentages_and_keys(splits, tmp_path):
+    table = tmp_path / 'splits.csv'
+    table.write_text('Artist,Amount\nAlpha,50\n')
+    with pytest.raises(ValueError):
+        splits.import_csv(str(table))
+    table.write_text('Track,Percentage\nSong,50\n')
+    with pytest.raises(ValueError):
+        splits.import_csv(str(table))
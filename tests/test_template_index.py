@@ -0,0 +1,89 @@
+import pytest
+
+from template_index import TemplateIndex, header_signature, MATCH_THRESHOLD
+
+
+def full_scan_index(templates):
+    """An index scoring every template, as detection did before the column index"""
+    index = TemplateIndex(templates)
+    index.candidates = lambda columns: list(index.templates)
+    return index
+
+
+def test_exact_columns_match():
+    index = TemplateIndex({
+        'Tunecore': {'track_column': 'Song Title', 'revenue_column': 'Total Earned', 'date_column': 'Sales Period'},
+        'Believe': {'track_column': 'Track title', 'revenue_column': 'Net Income', 'date_column': 'Operation Date'}
+    })
+    assert index.best_match(['Song Title', 'Total Earned', 'Sales Period']) == ('Tunecore', 1.0)
+    assert index.best_match(['Track title', 'Net Income', 'Operation Date', 'UPC']) == ('Believe', 1.0)
+
+
+def test_keyword_match_beats_weak_candidate():
+    # "Keywords" shares no exact column with the file but matches every
+    # field by keyword; "Weak" shares one exact column and little else
+    index = TemplateIndex({
+        'Keywords': {'track_column': 'Track', 'revenue_column': 'Revenue EUR', 'date_column': 'Sale Period Start'},
+        'Weak': {'track_column': 'Song Name', 'revenue_column': 'Gross', 'date_column': 'Day', 'upc_column': 'EAN'}
+    })
+    columns = ['Song Name', 'Amount', 'Period', 'Artist']
+    name, score = index.best_match(columns)
+    assert name == 'Keywords'
+    assert score == pytest.approx(0.8)
+    assert score >= MATCH_THRESHOLD
+
+
+def test_same_result_as_full_scan():
+    templates = {
+        'Keywords': {'track_column': 'Track', 'revenue_column': 'Revenue EUR'},
+        'Weak': {'track_column': 'Song Name', 'revenue_column': 'Gross', 'date_column': 'Day'},
+        'Exact': {'track_column': 'Song Name', 'revenue_column': 'Amount', 'date_column': 'Period'},
+        'Other': {'track_column': 'Title', 'artist_column': 'Band', 'revenue_column': 'Income'}
+    }
+    headers = [
+        ['Song Name', 'Amount', 'Period'],
+        ['Song Name', 'Earnings'],
+        ['Title', 'Band', 'Net Income', 'Barcode'],
+        ['Track', 'Revenue'],
+        ['Nothing', 'Useful']
+    ]
+    index = TemplateIndex(templates)
+    full_scan = full_scan_index(templates)
+    for columns in headers:
+        assert index.best_match(columns) == full_scan.best_match(columns)
+
+
+def test_confirmed_signature(tmp_path):
+    signatures_file = str(tmp_path / 'header_signatures.json')
+    templates = {'Tunecore': {'track_column': 'Song Title', 'revenue_column': 'Total Earned'}}
+    index = TemplateIndex(templates, signatures_file)
+    index.remember(['Song Title', 'Whatever'], 'Tunecore')
+    assert TemplateIndex(templates, signatures_file).lookup(['whatever', 'song title']) == 'Tunecore'
+    assert header_signature(['A', 'b']) == header_signature([' b ', 'a'])
+
+    # Signatures of removed templates are forgotten
+    index.rebuild({})
+    assert index.lookup(['Song Title', 'Whatever']) is None
+
+
+def test_no_templates():
+    assert TemplateIndex({}).best_match(['Song Title']) == (None, 0)
+
+
+def test_settings_do_not_lower_the_score():
+    columns = ['Song Title', 'Total Earned', 'Sales Period']
+    mapping = {'track_column': 'Song Title', 'revenue_column': 'Total Earned', 'date_column': 'Sales Period'}
+    index = TemplateIndex({'Tunecore': dict(mapping, source='Tunecore', currency='USD')})
+    assert index.best_match(columns) == ('Tunecore', 1.0)
+
+
+def test_dedup_keys_in_template():
+    # Dedup keys are stored as a list next to the column mapping
+    templates = {
+        'Believe': {'track_column': 'Track title', 'revenue_column': 'Net Income', 'dedup_columns': ['Title']},
+        'Empty keys': {'track_column': 'Song', 'dedup_columns': []}
+    }
+    index = TemplateIndex(templates)
+    assert index.best_match(['Track title', 'Net Income']) == ('Believe', 1.0)
+    assert index.best_match(['Title', 'Amount'])[0] is not None
+    assert index.candidates(['Title']) == []
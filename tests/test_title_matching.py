@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from title_matching import (DEFAULT_THRESHOLD, candidate_pairs, clean_title, core_title, propose_merges,
+                            similarity, title_grams)
+
+
+def all_pairs_merges(titles, artists, threshold=DEFAULT_THRESHOLD):
+    """Score every pair of distinct cores of an artist, the comparison blocking avoids"""
+    groups = {}
+    for i, (title, artist) in enumerate(zip(titles, artists)):
+        groups.setdefault((clean_title(artist), core_title(title)), []).append(i)
+    keys = list(groups)
+    found = set()
+    for a in range(len(keys)):
+        for b in range(a + 1, len(keys)):
+            if keys[a][0] != keys[b][0]:
+                continue
+            if similarity(title_grams(keys[a][1]), title_grams(keys[b][1])) >= threshold:
+                found.add(frozenset((groups[keys[a]][0], groups[keys[b]][0])))
+    return found
+
+
+def test_core_title():
+    assert clean_title('  Été,  Déjà-Vu! ') == 'ete deja vu'
+    assert core_title('Summer Night (Extended Version)') == 'summer night'
+    assert core_title('Summer Night [Remastered]') == 'summer night'
+    assert core_title('Summer Night - Radio Edit') == 'summer night'
+    assert core_title('Summer Night feat. Someone') == 'summer night'
+    # A dash without a version word is part of the title
+    assert core_title('Side A - Side B') == 'side a side b'
+    # A title that is only decoration keeps its text
+    assert core_title('(Intro)') == 'intro'
+
+
+def test_versions_of_one_track_are_proposed_together():
+    titles = ['Summer Night', 'SUMMER NIGHT (Extended Version)', 'Summer Night feat. X', 'Other Song']
+    proposals = propose_merges(titles, ['A', 'A', 'a', 'A'])
+    assert proposals == [(0, 1, 1.0), (0, 2, 1.0)]
+
+
+def test_titles_of_other_artists_are_not_merged():
+    assert propose_merges(['Summer Night', 'Summer Night'], ['A', 'B']) == []
+
+
+def test_close_titles_are_scored():
+    proposals = propose_merges(['Midnight City Lights', 'Midnight City Light', 'Winter'], ['A', 'A', 'A'])
+    assert len(proposals) == 1
+    i, j, score = proposals[0]
+    assert {i, j} == {0, 1} and DEFAULT_THRESHOLD <= score < 1.0
+
+
+def test_prefix_filtering_misses_no_pair():
+    random.seed(1)
+    words = ['love', 'night', 'city', 'dream', 'fire', 'summer', 'heart', 'road']
+    titles, artists = [], []
+    for i in range(400):
+        title = ' '.join(random.choice(words) for _ in range(random.randint(1, 3)))
+        titles.append(title + random.choice(['', 's', ' (Live)', f" {i % 7}"]))
+        artists.append(f"Artist {i % 5}")
+
+    proposed = {frozenset((i, j)) for i, j, _ in propose_merges(titles, artists, max_block_size=10 ** 6)}
+    assert proposed >= all_pairs_merges(titles, artists)
+
+
+@pytest.mark.parametrize('threshold', [0.5, 0.8, 0.95])
+def test_candidate_pairs_cover_every_similar_pair(threshold):
+    random.seed(2)
+    gram_sets = [title_grams(clean_title(''.join(random.choice('abcde') for _ in range(random.randint(3, 8)))))
+                 for _ in range(150)]
+    blocks = [''] * len(gram_sets)
+    candidates = {frozenset(pair) for pair in candidate_pairs(gram_sets, blocks, threshold, 10 ** 6)}
+    for a in range(len(gram_sets)):
+        for b in range(a + 1, len(gram_sets)):
+            if similarity(gram_sets[a], gram_sets[b]) >= threshold and gram_sets[a] != gram_sets[b]:
+                assert frozenset((a, b)) in candidates
@@ -0,0 +1,73 @@
+from track_identity import TrackIdentityIndex, identity_keys, normalize_code, normalize_title
+
+
+def test_normalize():
+    assert normalize_title('  Hello   WORLD ') == 'hello world'
+    assert normalize_title('ﬁre') == 'fire'
+    assert normalize_code('us-rc1-76-07839') == 'USRC17607839'
+    assert normalize_code('00123') == '123'
+    assert normalize_code('123.0') == '123'
+
+
+def test_identity_keys():
+    assert identity_keys('song', 'artist', 'USRC17607839') == ['isrc:USRC17607839', 'title:artist|song']
+    assert identity_keys('song', 'artist', '123') == ['upc:123|song', 'title:artist|song']
+    assert identity_keys('song', 'artist', '') == ['title:artist|song']
+
+
+def test_resolve_links_rows_sharing_any_key(tmp_path):
+    index = TrackIdentityIndex(str(tmp_path))
+    ids = index.resolve(
+        ['Song', 'song ', 'Song (Remix)', 'Other'],
+        ['Artist', 'ARTIST', 'Artist', 'Artist'],
+        ['USRC17607839', '', 'USRC17607839', '']
+    )
+    # The ISRC links the remix title to the same recording
+    assert ids[0] == ids[1] == ids[2]
+    assert ids[3] != ids[0]
+    assert len(index) == 2
+
+
+def test_resolve_learns_keys_across_statements(tmp_path):
+    index = TrackIdentityIndex(str(tmp_path))
+    first = index.resolve(['Song'], ['Artist'], ['USRC17607839'])
+    # A later statement only carries the ISRC, under another title
+    second = index.resolve(['Song - Radio Edit'], ['Label'], ['USRC17607839'])
+    # And then the new title without any code
+    third = index.resolve(['Song - Radio Edit'], ['Label'])
+    assert first[0] == second[0] == third[0]
+    assert len(index) == 1
+
+
+def test_resolve_without_artists_or_codes(tmp_path):
+    index = TrackIdentityIndex(str(tmp_path))
+    ids = index.resolve(['A', 'B', 'A', None])
+    assert ids[0] == ids[2]
+    assert len(set(ids.tolist())) == 3
+
+
+def test_merge(tmp_path):
+    index = TrackIdentityIndex(str(tmp_path))
+    ids = index.resolve(['Song', 'Song (Live)'], ['Artist', 'Artist'])
+    index.merge(ids[1], ids[0])
+    assert index.canonical_id(ids[1]) == ids[0]
+    assert index.resolve(['Song (Live)'], ['Artist'])[0] == ids[0]
+    assert index.titles(ids).tolist() == ['Song', 'Song']
+    assert index.active_tracks() == [[ids[0]], ['Song'], ['Artist']]
+
+    # Merging into a merged track follows it to its target
+    other = index.resolve(['Other'], ['Artist'])[0]
+    index.merge(other, ids[1])
+    assert index.canonical_id(other) == ids[0]
+
+
+def test_index_persists(tmp_path):
+    index = TrackIdentityIndex(str(tmp_path))
+    ids = index.resolve(['Song', 'Other'], ['Artist', 'Artist'], ['USRC17607839', ''])
+    index.merge(ids[1], ids[0])
+    index.save()
+
+    reloaded = TrackIdentityIndex(str(tmp_path))
+    assert len(reloaded) == 2
+    assert reloaded.resolve(['x'], ['y'], ['USRC17607839'])[0] == ids[0]
+    assert reloaded.resolve(['Other'], ['Artist'])[0] == ids[0]
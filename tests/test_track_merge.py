@@ -0,0 +1,70 @@
+import csv
+
+import pytest
+
+from ingest import sniff_csv
+from track_merge import stream_merge_tracks, SOURCE_COLUMN
+
+ROWS = [
+    ['Song', 'Date', 'Revenue'],
+    ['B', '2024-03-01', '1.0'],
+    ['A', '15/02/2024', '2.0'],
+    ['A', 'sometime in spring', '3.0'],
+    ['B', '2024-01-10', '4.0'],
+    ['C', '2024-01-05', '5.0'],
+]
+
+
+def write_statement(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+    return str(path)
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+@pytest.mark.parametrize('run_rows', [1000, 2])
+def test_dates_are_written_back_unchanged(tmp_path, run_rows):
+    statement = write_statement(tmp_path / 'a.csv', ROWS)
+    output = str(tmp_path / 'merged.csv')
+    count, columns = stream_merge_tracks([statement], sniff_csv, 'Song', ['A', 'B'], output,
+                                         date_col='Date', chunksize=2, run_rows=run_rows)
+
+    rows = read_rows(output)
+    assert count == 4
+    assert rows[0] == ['Song', 'Date', 'Revenue', SOURCE_COLUMN]
+    # Sorted by parsed date, unparseable dates last, original text kept
+    assert [row[:3] for row in rows[1:]] == [
+        ['B', '2024-01-10', '4.0'],
+        ['A', '15/02/2024', '2.0'],
+        ['B', '2024-03-01', '1.0'],
+        ['A', 'sometime in spring', '3.0'],
+    ]
+
+
+def test_union_of_headers(tmp_path):
+    first = write_statement(tmp_path / 'a.csv', [['Song', 'Date'], ['A', '2024-02-01']])
+    second = write_statement(tmp_path / 'b.csv', [['Song', 'Date', 'UPC'], ['A', '2024-01-01', '123']])
+    output = str(tmp_path / 'merged.csv')
+    count, columns = stream_merge_tracks([first, second], sniff_csv, 'Song', ['A'], output, date_col='Date')
+
+    assert count == 2
+    assert columns == ['Song', 'Date', SOURCE_COLUMN, 'UPC']
+    assert read_rows(output)[1:] == [['A', '2024-01-01', 'b.csv', '123'], ['A', '2024-02-01', 'a.csv', '']]
+
+
+def test_spilled_and_in_memory_output_match(tmp_path):
+    rows = ROWS + [['A', '2024-02-20', 'note, with "quotes"\nand a newline']]
+    statement = write_statement(tmp_path / 'a.csv', rows)
+    outputs = []
+    for run_rows in (1000, 2):
+        output = tmp_path / f'merged_{run_rows}.csv'
+        stream_merge_tracks([statement], sniff_csv, 'Song', ['A', 'B'], str(output),
+                            date_col='Date', chunksize=2, run_rows=run_rows)
+        outputs.append(output.read_bytes())
+
+    assert outputs[0] == outputs[1]
+    assert b'\r\n' not in outputs[0]
@@ -0,0 +1,75 @@
+import os
+import zipfile
+
+import pytest
+
+from fingerprints import FingerprintRegistry
+from template_index import TemplateIndex
+from watch_folder import folder_statements, ingest_statement, pending_files, ready_files
+
+TEMPLATES = {'Believe': {'track_column': 'Track', 'revenue_column': 'Revenue', 'date_column': 'Date'}}
+
+
+@pytest.fixture
+def inbox(tmp_path):
+    folder = tmp_path / 'inbox'
+    folder.mkdir()
+    return folder
+
+
+@pytest.fixture
+def fingerprints(tmp_path):
+    return FingerprintRegistry(str(tmp_path / 'cache'))
+
+
+@pytest.fixture
+def template_index(tmp_path):
+    return TemplateIndex(TEMPLATES, str(tmp_path / 'signatures.json'))
+
+
+def test_ingested_statement_is_ready_until_added(inbox, fingerprints, template_index):
+    path = inbox / 'a.csv'
+    path.write_text('Track,Revenue,Date\nSong,1.5,2024-01-01\n')
+    assert pending_files(str(inbox), fingerprints) == [str(path)]
+
+    info = ingest_statement(str(path), fingerprints, template_index)
+    assert (info['template'], info['rows']) == ('Believe', 1)
+    assert pending_files(str(inbox), fingerprints) == []
+    assert ready_files(str(inbox), fingerprints) == [str(path)]
+
+    fingerprints.annotate(info['digest'], in_analysis=True)
+    assert ready_files(str(inbox), fingerprints) == []
+
+
+def test_failed_statement_is_retried(inbox, fingerprints, template_index, monkeypatch):
+    path = inbox / 'a.csv'
+    path.write_text('Track,Revenue,Date\nSong,1.5,2024-01-01\n')
+
+    def fail(*args, **kwargs):
+        raise ValueError("cannot parse")
+    monkeypatch.setattr('watch_folder.read_statement', fail)
+    with pytest.raises(ValueError):
+        ingest_statement(str(path), fingerprints, template_index)
+    assert pending_files(str(inbox), fingerprints) == [str(path)]
+    assert ready_files(str(inbox), fingerprints) == []
+
+    monkeypatch.undo()
+    ingest_statement(str(path), fingerprints, template_index)
+    assert pending_files(str(inbox), fingerprints) == []
+
+
+def test_archive_listings_are_reused_until_the_archive_changes(inbox, monkeypatch):
+    path = inbox / 'export.zip'
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('a.csv', 'Track\nSong\n')
+    listings = {}
+    assert folder_statements(str(inbox), listings) == [f"{path}::a.csv"]
+
+    opened = []
+    monkeypatch.setattr('watch_folder.statement_paths', lambda file: opened.append(file) or [])
+    assert folder_statements(str(inbox), listings) == [f"{path}::a.csv"]
+    assert opened == []
+
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+    assert folder_statements(str(inbox), listings) == []
+    assert opened == [str(path)]